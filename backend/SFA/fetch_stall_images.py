@@ -1,9 +1,12 @@
-import os, re, time, json
+import os, re, sys, time, json
 from pathlib import Path
 import requests
-import pandas as pd
 from slugify import slugify
 
+# Make the backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.utils.sfa_snapshot import load_snapshot
+
 # ---- CONFIG ----
 INPUT_DIR  = Path("hawkersg/backend/SFA/centres_output")
 OUTPUT_DIR = Path("hawkersg/backend/SFA/stall_images")
@@ -53,18 +56,6 @@ def download(url: str, outpath: Path) -> bool:
     except Exception:
         return False
 
-def get_hawker_name_from_df_or_filename(df: pd.DataFrame, xlsx_path: Path) -> str:
-    # Try column first (some files have "Hawker Centre")
-    for col in df.columns:
-        if str(col).strip().lower() == "hawker centre":
-            val = df[col].dropna().astype(str).str.strip()
-            if len(val) > 0:
-                return val.iloc[0]
-    # Fallback: derive from filename after first underscore
-    base = xlsx_path.stem
-    parts = base.split("_", 1)
-    return parts[1] if len(parts) > 1 else base
-
 # ---- MAIN ----
 def main():
     assert BING_KEY, "BING_KEY env var is not set."
@@ -72,35 +63,21 @@ def main():
     ensure_dir(OUTPUT_DIR)
     misses = []
 
-    xlsx_files = sorted(INPUT_DIR.glob("*.xlsx"))
-    for xfile in xlsx_files:
-        try:
-            df = pd.read_excel(xfile, engine="openpyxl")
-        except Exception as e:
-            misses.append({"file": xfile.name, "stall": None, "reason": f"read_error:{type(e).__name__}"})
-            continue
+    # Every indexed workbook from the SFA snapshot; headers and hawker centre names come back normalised
+    stalls_df = load_snapshot(str(INPUT_DIR.parent / "index.json")).stalls
 
-        # Normalize headers
-        df.columns = [str(c).strip() for c in df.columns]
-        # Find the Business Name column (exact match preferred, fallback to fuzzy)
-        bn_col = None
-        for c in df.columns:
-            if c.lower() == "business name":
-                bn_col = c; break
-        if not bn_col:
-            for c in df.columns:
-                if "business" in c.lower() and "name" in c.lower():
-                    bn_col = c; break
-        if not bn_col:
+    for source_file, df in stalls_df.groupby("source_file", sort=False):
+        xfile = Path(source_file)
+        if df["stall_name"].isna().all():
             misses.append({"file": xfile.name, "stall": None, "reason": "no_business_name_col"})
             continue
 
-        hawker_name = get_hawker_name_from_df_or_filename(df, xfile)
+        hawker_name = df["hawker_centre"].iloc[0]
         hawker_dir  = OUTPUT_DIR / safe_name(hawker_name)
         ensure_dir(hawker_dir)
 
         count = 0
-        for stall in df[bn_col].astype(str).tolist():
+        for stall in df["stall_name"].dropna().tolist():
             stall = stall.strip()
             if not stall or stall.lower() in {"nan", "none", "-"}:
                 continue
@@ -1,4 +1,10 @@
-import json, pandas as pd
+import json, os, sys
+from pathlib import Path
+
+# Make the backend package importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from app.utils.sfa_loader import read_workbook
+from app.utils.sfa_snapshot import load_snapshot
 
 with open("index.json", encoding="utf-8") as f:
     INDEX = json.load(f)
@@ -10,13 +16,19 @@ def find_entries(query: str):
         if q == e["postal"].lower() or q in e["hawker_centre"].lower()
     ]
 
-def load_stalls(file_path: str):
-    if file_path.lower().endswith(".xlsx"):
-        return pd.read_excel(file_path, dtype=str).fillna("").to_dict("records")
-    return pd.read_csv(file_path, dtype=str).fillna("").to_dict("records")
+def load_stalls(file_path: str, hawker_centre: str = None):
+    # Column names are normalised by the shared loader, e.g. "Business Name" -> "stall_name"
+    return read_workbook(file_path, hawker_centre).fillna("").to_dict("records")
+
+_STALLS = None
 
 def get_stalls_from_entry(entry):
-    return load_stalls(entry["file"])
+    # Every indexed workbook, read once from the memory-mapped snapshot (rebuilt if the sources changed)
+    global _STALLS
+    if _STALLS is None:
+        _STALLS = load_snapshot(os.path.abspath("index.json")).stalls
+    stalls = _STALLS[_STALLS["source_file"] == entry["file"]]
+    return stalls.fillna("").to_dict("records")
 
 def print_matches(matches):
     print("⚠️ Multiple matches found:")
@@ -58,7 +70,7 @@ def choose_match_interactively(matches):
 def preview_stalls(stalls, limit=10):
     print(f"✅ Found {len(stalls)} stalls")
     for stall in stalls[:limit]:
-        name = stall.get("Business Name") or stall.get("Licensee Name") or "(Unnamed stall)"
+        name = stall.get("stall_name") or stall.get("licensee_name") or "(Unnamed stall)"
         print("-", name)
 
 
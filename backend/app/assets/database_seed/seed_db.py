@@ -1,9 +1,9 @@
 import os
 import sys
-import json
+from typing import Dict, List
 from sqlalchemy.orm import Session
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from app.controllers.business_controller import get_password_hash
 
 # ----------------------------------------------------
@@ -19,11 +19,23 @@ sys.path.append(PROJECT_ROOT)
 
 # Import necessary models
 from app.models.hawker_centre_model import HawkerCentre
-from app.models.business_model import Business, StallStatus
+from app.models.business_model import Business, StallStatus, CuisineType
 from app.models.operating_hour_model import OperatingHour
 from app.models.menu_item_model import MenuItem
+from app.services import hawker_geo_index
+from app.utils import sfa_snapshot
 
 DEFAULT_BUSINESS_PHOTO = "default-placeholder.jpg"
+BUSINESS_PHOTO_BASE_URL = "https://hawkersg-backend.onrender.com/static/business/"
+
+# Rows per executemany batch when bulk inserting
+SEED_CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "1000"))
+
+# hashed_password of seeded stalls nobody has claimed yet (no password can hash to it)
+PLACEHOLDER_PASSWORD = "placeholder"
+
+# Stall columns copied onto Business rows
+BUSINESS_COLUMNS = ["license_number", "stall_name", "licensee_name", "establishment_address", "postal_code", "hawker_centre"]
 
 
 BUSINESS_PHOTO_MAP = {
@@ -119,10 +131,72 @@ def format_address(row):
 
     return address if address else "N/A"
 
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """DataFrame rows as dicts, with NaN replaced by None so they bind as NULL."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def _bulk_insert(db: Session, model, records: List[Dict]) -> None:
+    """ORM bulk INSERT in executemany batches (handles Business' joined users/businesses tables)."""
+    for i in range(0, len(records), SEED_CHUNK_SIZE):
+        db.execute(insert(model), records[i:i + SEED_CHUNK_SIZE])
+
+def build_hawker_centre_records(hawker_df: pd.DataFrame, existing_names: set) -> List[Dict]:
+    """New HawkerCentre rows from hawker_centres.csv, skipping names already in the DB."""
+    hawker_df = hawker_df[hawker_df['Name'].notna()]
+    hawker_df = hawker_df[~hawker_df['Name'].isin(existing_names)].drop_duplicates('Name')
+
+    centres = pd.DataFrame({
+        "name": hawker_df['Name'],
+        "address": hawker_df.apply(format_address, axis=1) if len(hawker_df) else pd.Series(dtype=object),
+        "description": hawker_df.get('Description', ''),
+        "image": hawker_df.get('PhotoURL', ''),
+        "latitude": hawker_df.get('Latitude'),
+        "longitude": hawker_df.get('Longitude'),
+        "rating": 0.0, # Initialize rating
+    })
+    return _records(centres)
+
+def canonical_stalls(stalls: pd.DataFrame) -> pd.DataFrame:
+    """BUSINESS_COLUMNS of one row per licence number (first occurrence wins), NOT NULL columns filled."""
+    stalls = stalls[stalls["license_number"].notna()]
+    stalls = stalls.drop_duplicates("license_number", keep="first")[BUSINESS_COLUMNS].copy()
+
+    # NOT NULL columns; a blank cell should not abort the whole seed
+    for column in ("licensee_name", "establishment_address", "postal_code"):
+        stalls[column] = stalls[column].fillna("")
+    return stalls
+
+def build_business_records(stalls: pd.DataFrame, existing_licenses: set) -> List[Dict]:
+    """New Business rows: one per licence number (first occurrence wins), skipping licences already in the DB."""
+    stalls = canonical_stalls(stalls)
+    stalls = stalls[~stalls["license_number"].isin(existing_licenses)]
+
+    photo = stalls["stall_name"].map(BUSINESS_PHOTO_MAP).fillna("").replace("", DEFAULT_BUSINESS_PHOTO)
+    stalls["photo"] = BUSINESS_PHOTO_BASE_URL + photo
+    stalls["email"] = "sfa_placeholder_" + stalls["license_number"] + "@example.com"
+
+    # Can consider adding a new field such that only the real owner of the business claim the hawker stall when signing up
+    # All stalls in every hawker centre are preloaded but can't be edited till it is claimed
+    # is_claimed = false
+    constants = {
+        "hashed_password": PLACEHOLDER_PASSWORD,
+        "user_type": "business",
+        "username": "",
+        "cuisine_type": CuisineType.others,
+        "description": "",
+        "status": StallStatus.OPEN,
+    }
+    return [{**record, **constants} for record in _records(stalls)]
+
 def seed_sfa_data_if_empty(db: Session, index_file_path: str):
     """
     Checks if the HawkerCentre table is empty. If so, seeds SFA data
     from hawker_centres.csv first, then processes individual stall files.
+
+    Set-based: the SFA sources come from the columnar snapshot (see
+    app.utils.sfa_snapshot) as one DataFrame, licence numbers are
+    deduplicated in pandas against the licences already stored (loaded once),
+    and rows are bulk inserted in SEED_CHUNK_SIZE batches.
     """
     
     # 1. Check if the database has already been seeded (using the session's state)
@@ -132,134 +206,40 @@ def seed_sfa_data_if_empty(db: Session, index_file_path: str):
         return
 
     print("Database is empty. Starting SFA data seeding...")
-    SFA_DIR = os.path.dirname(index_file_path)
-    
-    HAWKER_CENTRES_CSV_PATH = os.path.join(SFA_DIR, 'SFA-Scrape', 'hawker_centres.csv')
+    print(f"Attempting to load SFA data from: {index_file_path}")
+
+    # index.json, hawker_centres.csv and the stall workbooks, memory-mapped from the snapshot
+    try:
+        sfa_data = sfa_snapshot.load_snapshot(index_file_path)
+    except FileNotFoundError as e:
+        print(f"FATAL ERROR: SFA source file not found at {e.filename}. Aborting seeding.")
+        return
+    except Exception as e:
+        print(f"FATAL ERROR: Failed to load SFA data: {e}. Aborting seeding.")
+        return
     
     # Use manual db.commit() and db.rollback()
     try:
         # --- PHASE 1: SEED HAWKER CENTRE DATA ---
         print("\n--- Phase 1: Seeding Hawker Centre Master Data ---")
-        try:
-            hawker_df = pd.read_csv(HAWKER_CENTRES_CSV_PATH)
-        except FileNotFoundError:
-            print(f"FATAL ERROR: Hawker Centres CSV file not found at {HAWKER_CENTRES_CSV_PATH}. Aborting seeding.")
-            return
-
-        for _, row in hawker_df.iterrows():
-            hawker_centre_name = row.get('Name')
-            if not hawker_centre_name: continue
-            
-            # Find or Create HawkerCentre record
-            hawker_centre = db.scalar(
-                select(HawkerCentre).where(HawkerCentre.name == hawker_centre_name)
-            )
-            
-            if not hawker_centre:
-                full_address = format_address(row)
-                
-                hawker_centre = HawkerCentre(
-                    name=hawker_centre_name,
-                    address=full_address,
-                    description=row.get('Description', ''),
-                    image=row.get('PhotoURL', ''),
-                    latitude=row.get('Latitude'),
-                    longitude=row.get('Longitude'),
-                    rating=0.0 # Initialize rating
-                )
-                db.add(hawker_centre)
-                print(f"  Added Hawker Centre: {hawker_centre_name}")
+        existing_names = set(db.scalars(select(HawkerCentre.name)))
+        centre_records = build_hawker_centre_records(sfa_data.hawker_centres, existing_names)
+        _bulk_insert(db, HawkerCentre, centre_records)
+        print(f"  Added {len(centre_records)} Hawker Centres")
 
         # Commit Phase 1 data before starting Phase 2, in case of interruption
-        db.flush() 
         db.commit()
+        hawker_geo_index.invalidate()
 
 
         # --- PHASE 2: SEED BUSINESS (STALL) DATA ---
         print("\n--- Phase 2: Seeding Individual Business Stall Data ---")
-        print(f"Attempting to load index file from: {index_file_path}")
-
-        try:
-            with open(index_file_path, 'r') as f:
-                index_data = json.load(f)
-        except FileNotFoundError:
-            print(f"FATAL ERROR: Index file not found at {index_file_path}. Aborting seeding.")
-            return
-        except Exception as e:
-            print(f"FATAL ERROR: Failed to read or parse index.json: {e}. Aborting seeding.")
-            return
-
-        for entry in index_data:
-            hawker_centre_name = entry.get('hawker_centre')
-            file_path_relative_to_SFA = entry.get('file')
-            
-            if not hawker_centre_name or not file_path_relative_to_SFA:
-                print(f"Skipping malformed entry in index: {entry}")
-                continue
-                
-            print(f"  Processing Business Stalls for: {hawker_centre_name}")
-
-            excel_file_path = os.path.join(SFA_DIR, file_path_relative_to_SFA)
-            
-            try:
-                df = pd.read_excel(excel_file_path)
-            except FileNotFoundError:
-                print(f"  Skipping: Excel file not found at {excel_file_path}")
-                continue
-            except Exception as e:
-                print(f"  Skipping: Error reading Excel file {excel_file_path}: {e}")
-                continue
-                
-            # Retrieve the HawkerCentre object created in Phase 1
-            hawker_centre_obj = db.scalar(
-                select(HawkerCentre).where(HawkerCentre.name == hawker_centre_name)
-            )
-            
-            # if not hawker_centre_obj:
-            #     print(f"  FATAL: Hawker Centre '{hawker_centre_name}' not found from CSV data. Skipping stalls.")
-            #     continue
-
-            # Seed Business (Stall) records
-            for _, row in df.iterrows():
-                license_no = str(row.get('Licence Number', row.get('license_number', row.get('License_No', '')))).strip() 
-                if not license_no: continue
-
-                existing_business = db.scalar(
-                    select(Business).where(Business.license_number == license_no)
-                )
-                if existing_business:
-                    continue
-                
-                new_business_stall = Business(
-                    email=f"sfa_placeholder_{license_no}@example.com",
-                    hashed_password="placeholder",
-                    user_type="business",
-                    username="",
-                    
-                    license_number=license_no,
-                    stall_name=row.get('Business Name', row.get('Stall_Name', row.get('stall_name'))),
-                    licensee_name=row.get('Licensee Name', row.get('Licensee_Name', row.get('licensee_name'))),
-                    establishment_address=row.get('Establishment Address', row.get('Establishment_Address', row.get('establishment_address'))),
-                    postal_code=row.get('Postal Code', row.get('Postal_Code', row.get('postal_code'))),
-                    hawker_centre=hawker_centre_name,
-
-                    cuisine_type="Others",
-                    description="",
-                    photo="",
-                    status=StallStatus.OPEN
-
-                    # Can consider adding a new field such that only the real owner of the business claim the hawker stall when signing up
-                    # All stalls in every hawker centre are preloaded but can't be edited till it is claimed
-                    # is_claimed = false
-                )
-
-                filename = BUSINESS_PHOTO_MAP.get(new_business_stall.stall_name)
-                if filename:
-                    new_business_stall.photo = f"https://hawkersg-backend.onrender.com/static/business/{filename}"
-                else:
-                    new_business_stall.photo = f"https://hawkersg-backend.onrender.com/static/business/{DEFAULT_BUSINESS_PHOTO}"
+        stalls = sfa_data.stalls
+        existing_licenses = set(db.scalars(select(Business.license_number)))
+        business_records = build_business_records(stalls, existing_licenses)
+        _bulk_insert(db, Business, business_records)
+        print(f"  Added {len(business_records)} Business Stalls from {len(stalls)} rows")
 
-                db.add(new_business_stall)
         # # seed test business account
         # new_business_stall = Business(
         #     email="business@test.com",
@@ -0,0 +1,175 @@
+"""
+Incremental SFA sync: applies a refreshed SFA scrape to an already seeded database.
+
+seed_sfa_data_if_empty() only runs against an empty database. This diffs the
+current SFA snapshot against the businesses table by licence number and, in
+one transaction:
+
+  - inserts stalls (and hawker centres) that are new,
+  - bulk updates the names and address fields of stalls that changed,
+  - flags licences that disappeared from the SFA data (sfa_delisted_at), and
+    clears the flag again if a licence comes back.
+
+Claimed stalls (a real password instead of PLACEHOLDER_PASSWORD) and stalls
+whose owner has edited the profile (profile_updated_at set) are never written.
+The nearest-hawker index of the running process is invalidated after new
+centres are committed; other servers pick them up when their indexes expire.
+
+Run with:  python -m app.assets.database_seed.sfa_sync [--dry-run] [path/to/index.json]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+import pandas as pd
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.assets.database_seed.seed_db import (
+    PLACEHOLDER_PASSWORD, SEED_CHUNK_SIZE, _bulk_insert, _records,
+    build_business_records, build_hawker_centre_records, canonical_stalls,
+)
+from app.models.business_model import Business
+from app.models.hawker_centre_model import HawkerCentre
+from app.services import hawker_geo_index
+from app.utils import sfa_snapshot
+
+# Columns refreshed from the SFA data on existing stalls
+SYNC_COLUMNS = ["stall_name", "licensee_name", "establishment_address", "postal_code", "hawker_centre"]
+
+class StallDiff(NamedTuple):
+    new: List[Dict]        # Business rows to insert
+    changed: List[Dict]    # {"id", *SYNC_COLUMNS} for stalls whose SFA fields differ
+    delisted: List[int]    # ids whose licence is no longer in the SFA data
+    relisted: List[int]    # previously delisted ids whose licence is back
+    protected: int         # claimed/edited stalls that differ from the SFA data but were left alone
+
+class SyncReport(NamedTuple):
+    hawker_centres_added: int
+    stalls_added: int
+    stalls_updated: int
+    stalls_delisted: int
+    stalls_relisted: int
+    stalls_protected: int
+    timings: Dict[str, float]  # phase -> seconds
+
+def load_existing(db: Session) -> pd.DataFrame:
+    """The columns the diff needs for every business, one row each."""
+    rows = db.execute(select(
+        Business.id, Business.license_number, *(getattr(Business, c) for c in SYNC_COLUMNS),
+        Business.hashed_password, Business.profile_updated_at, Business.sfa_delisted_at,
+    )).all()
+    columns = ["id", "license_number", *SYNC_COLUMNS, "hashed_password", "profile_updated_at", "sfa_delisted_at"]
+    return pd.DataFrame(rows, columns=columns)
+
+def _text(series: pd.Series) -> pd.Series:
+    # NULL and "" compare equal: the seeder writes blanks as either
+    return series.astype("string").fillna("")
+
+def diff_stalls(stalls: pd.DataFrame, existing: pd.DataFrame) -> StallDiff:
+    """Compares the SFA stalls (sfa_loader columns) against load_existing() by licence number."""
+    incoming = canonical_stalls(stalls)
+    new = build_business_records(incoming, set(existing["license_number"]))
+
+    protected = (existing["hashed_password"] != PLACEHOLDER_PASSWORD) | existing["profile_updated_at"].notna()
+    merged = existing.assign(protected=protected).merge(
+        incoming, on="license_number", how="left", suffixes=("", "_sfa"), indicator=True
+    )
+    listed = merged["_merge"] == "both"
+
+    differs = pd.Series(False, index=merged.index)
+    for column in SYNC_COLUMNS:
+        differs |= _text(merged[column]) != _text(merged[f"{column}_sfa"])
+    differs &= listed
+
+    changed = merged[differs & ~merged["protected"]]
+    changed = changed[["id", *(f"{c}_sfa" for c in SYNC_COLUMNS)]].rename(columns=lambda c: c.removesuffix("_sfa"))
+
+    delisted = merged[~listed & merged["sfa_delisted_at"].isna() & ~merged["protected"]]
+    relisted = merged[listed & merged["sfa_delisted_at"].notna() & ~merged["protected"]]
+    return StallDiff(
+        new=new,
+        changed=_records(changed),
+        delisted=delisted["id"].tolist(),
+        relisted=relisted["id"].tolist(),
+        protected=int((merged["protected"] & (differs | ~listed)).sum()),
+    )
+
+def _bulk_update(db: Session, records: List[Dict]) -> None:
+    """ORM bulk UPDATE by primary key in executemany batches."""
+    for i in range(0, len(records), SEED_CHUNK_SIZE):
+        db.execute(update(Business), records[i:i + SEED_CHUNK_SIZE])
+
+def sync_sfa_data(db: Session, index_file_path: str, dry_run: bool = False) -> SyncReport:
+    """Diffs the SFA snapshot against the database and applies it in one transaction (rolled back if dry_run)."""
+    timings = {}
+    started = time.perf_counter()
+    sfa_data = sfa_snapshot.load_snapshot(index_file_path)
+    timings["load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    centre_records = build_hawker_centre_records(sfa_data.hawker_centres, set(db.scalars(select(HawkerCentre.name))))
+    diff = diff_stalls(sfa_data.stalls, load_existing(db))
+    timings["diff"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    now = datetime.now()
+    try:
+        _bulk_insert(db, HawkerCentre, centre_records)
+        _bulk_insert(db, Business, diff.new)
+        _bulk_update(db, diff.changed)
+        _bulk_update(db, [{"id": i, "sfa_delisted_at": now} for i in diff.delisted])
+        _bulk_update(db, [{"id": i, "sfa_delisted_at": None} for i in diff.relisted])
+        if dry_run:
+            db.rollback()
+        else:
+            db.commit()
+            if centre_records:
+                hawker_geo_index.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+    timings["write"] = time.perf_counter() - started
+
+    return SyncReport(
+        hawker_centres_added=len(centre_records),
+        stalls_added=len(diff.new),
+        stalls_updated=len(diff.changed),
+        stalls_delisted=len(diff.delisted),
+        stalls_relisted=len(diff.relisted),
+        stalls_protected=diff.protected,
+        timings=timings,
+    )
+
+def print_report(report: SyncReport, dry_run: bool = False) -> None:
+    print(f"SFA sync{' (dry run, nothing written)' if dry_run else ''}:")
+    print(f"  Hawker centres added:  {report.hawker_centres_added}")
+    print(f"  Stalls added:          {report.stalls_added}")
+    print(f"  Stalls updated:        {report.stalls_updated}")
+    print(f"  Stalls delisted:       {report.stalls_delisted}")
+    print(f"  Stalls relisted:       {report.stalls_relisted}")
+    print(f"  Claimed/edited stalls left unchanged: {report.stalls_protected}")
+    print("  Timings: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in report.timings.items()))
+
+def main():
+    # Import every model so relationship() targets resolve, as app.main does
+    from app.models import consumer_model, favourite_model, review_model, menu_item_model, operating_hour_model  # noqa: F401
+    from app.database import SessionLocal, engine
+    from app.migrations import ensure_columns
+
+    default_index = os.path.join(os.path.dirname(__file__), "..", "..", "..", "SFA", "index.json")
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    dry_run = "--dry-run" in sys.argv
+    index_file_path = os.path.abspath(args[0] if args else default_index)
+
+    ensure_columns(engine)  # sfa_delisted_at / profile_updated_at on databases that predate them
+    db = SessionLocal()
+    try:
+        print_report(sync_sfa_data(db, index_file_path, dry_run=dry_run), dry_run=dry_run)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
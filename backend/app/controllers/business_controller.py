@@ -1,14 +1,15 @@
 import os
 import base64
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional, List
 from fastapi import UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from app.schemas.business_schema import BusinessCreate, BusinessUpdate, OperatingHourIn, MenuItemIn, MenuItemPatch
 from app.models.business_model import Business, StallStatus
 from app.models.operating_hour_model import OperatingHour
 from app.models.menu_item_model import MenuItem
+from app.services import open_hours_index
 
 # Static directory for business photos
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "businessPhotos")
@@ -18,17 +19,20 @@ MENU_IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "asset
 MAX_FILE_SIZE_BYTES = 20 * 1024 * 1024  # 20MB per spec
 ALLOWED_MIME_TYPES = ["image/jpeg", "image/png", "image/webp"]
 
-# Define the password hashing context (same as consumer)
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Define the password hashing context (same as consumer, also created lazily)
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["argon2"], deprecated="auto")
 
 # --- Hashing Functions (reuse from consumer pattern) ---
 def get_password_hash(password: str) -> str:
     """Hashes a plaintext password using Argon2."""
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plaintext password against a stored hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 # --- DB Interaction Functions ---
 def get_user_by_email(db: Session, email: str) -> Optional[Business]:
@@ -77,7 +81,7 @@ def create_business(db: Session, business: BusinessCreate) -> Business:
     db.refresh(db_business)
     return db_business
 
-async def update_business_profile(
+def update_business_profile(
     db: Session, 
     license_number_from_path: str,
     #license_number_from_token: str,
@@ -127,7 +131,7 @@ async def update_business_profile(
             old_filename = db_business.photo
             
             # 2. Save the new file and get the new filename
-            new_filename = await save_business_photo(db_business.license_number, photo)
+            new_filename = save_business_photo(db_business.license_number, photo)
             
             # 3. Delete the old file if it exists and is different from the new one
             if old_filename and old_filename != new_filename:
@@ -142,7 +146,9 @@ async def update_business_profile(
             
             # 4. Update the DB model
             db_business.photo = new_filename
-    
+
+    # Owner-edited profiles are left alone by the SFA sync
+    db_business.profile_updated_at = datetime.now()
     db.commit()
     db.refresh(db_business)
     return db_business
@@ -197,7 +203,7 @@ async def save_business_photo_base64(license_number: str, base64_data: str) -> s
             detail=f"Failed to save photo: {e}"
         )
 
-async def save_business_photo(license_number: str, photo: UploadFile) -> str:
+def save_business_photo(license_number: str, photo: UploadFile) -> str:
     """Validate and save business photo, return filename."""
     
     # Check file type
@@ -208,7 +214,7 @@ async def save_business_photo(license_number: str, photo: UploadFile) -> str:
         )
     
     # Check file size
-    file_content = await photo.read()
+    file_content = photo.file.read()
     if len(file_content) > MAX_FILE_SIZE_BYTES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -283,11 +289,14 @@ def set_operating_hours(
     
     db.commit()
 
+    # Keep the in-memory schedule used by /stalls "is_open" in step with the DB
+    open_hours_index.rebuild_business(db, db_business.license_number)
+
     return db_hours
 
 
 # New Helper Function: Save Menu Item Photo
-async def save_menu_item_photo(license_number: str, item_id: str, photo: UploadFile) -> str:
+def save_menu_item_photo(license_number: str, item_id: str, photo: UploadFile) -> str:
     """Validate and save menu item photo, return filename."""
     
     # Check file type
@@ -298,7 +307,7 @@ async def save_menu_item_photo(license_number: str, item_id: str, photo: UploadF
         )
     
     # Check file size (Read content once)
-    file_content = await photo.read()
+    file_content = photo.file.read()
     if len(file_content) > MAX_FILE_SIZE_BYTES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -341,7 +350,7 @@ def delete_menu_item_photo(filename: str):
             pass
 
 
-async def add_menu_item(
+def add_menu_item(
     db: Session, 
     license_number_from_path: str,
     #license_number_from_token: str,
@@ -377,7 +386,7 @@ async def add_menu_item(
     
     image_filename = ""
     if image is not None and image.filename:
-        image_filename = await save_menu_item_photo(
+        image_filename = save_menu_item_photo(
             db_business.license_number, 
             str(db_menu_item.id), # Use the new ID for the filename
             image
@@ -389,7 +398,7 @@ async def add_menu_item(
 
     return db_menu_item
 
-async def update_menu_item(
+def update_menu_item(
     db: Session,
     license_number_from_path: str,
     #license_number_from_token: str,
@@ -428,7 +437,7 @@ async def update_menu_item(
     
     if new_image is not None and new_image.filename:
         # Save new photo
-        new_filename = await save_menu_item_photo(
+        new_filename = save_menu_item_photo(
             db_business.license_number, 
             str(db_item.id), 
             new_image
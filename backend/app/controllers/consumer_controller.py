@@ -1,9 +1,9 @@
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 from fastapi import UploadFile, HTTPException, status
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from app.utils.email_utils import generate_reset_token, get_token_expiration, send_password_reset_email
 from app.schemas.consumer_schema import ConsumerCreate
 from app.schemas.user_schema import PasswordResetRequest, PasswordResetData
@@ -16,17 +16,20 @@ STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets",
 MAX_FILE_SIZE_BYTES = 2 * 1024 * 1024  
 ALLOWED_MIME_TYPES = ["image/jpeg", "image/png", "image/webp"]
 
-# Define the password hashing context
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Define the password hashing context (built on first use, so passlib/argon2 stay out of startup)
+@lru_cache(maxsize=None)
+def pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["argon2"], deprecated="auto")
 
 # --- Hashing Functions ---
 def get_password_hash(password: str) -> str:
     """Hashes a plaintext password using Argon2."""
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plaintext password against a stored hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 # --- DB Interaction Functions ---
 def get_user_by_email(db: Session, email: str) -> Optional[DBUser]:
@@ -124,7 +127,7 @@ def handle_password_reset(db: Session, data: PasswordResetData) -> None:
 
     # 3. Hash and Update Password
     try:
-        hashed_password = pwd_context.hash(data.new_password)
+        hashed_password = pwd_context().hash(data.new_password)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to hash password: {e}")
 
@@ -136,7 +139,7 @@ def handle_password_reset(db: Session, data: PasswordResetData) -> None:
 
     db.commit()
 
-async def update_consumer_profile(
+def update_consumer_profile(
     db: Session,
     user_id: int, 
     username: Optional[str],
@@ -179,7 +182,7 @@ async def update_consumer_profile(
             
         # 3b. Check File Size (Reading the first 1MB is needed to confirm size before full upload)        
         # Read the entire file content into a byte buffer for size check
-        file_content = await profile_pic.read()
+        file_content = profile_pic.file.read()
         
         if len(file_content) > MAX_FILE_SIZE_BYTES:
             raise HTTPException(
@@ -188,7 +191,7 @@ async def update_consumer_profile(
             )
 
         # 3c. Rewind the file pointer for saving
-        await profile_pic.seek(0)
+        profile_pic.file.seek(0)
 
         # --- Capture old filename before update ---
         old_filename = user.profile_pic
@@ -1,14 +1,15 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import exists, and_
+from sqlalchemy import exists, and_, tuple_
 from fastapi import HTTPException, status
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 from app.models.consumer_model import Consumer
 from app.models.favourite_model import Favourite
-from app.schemas.favourite_schema import FavouriteIn, FavouriteOut, TargetType
+from app.schemas.favourite_schema import FavouriteBatchIn, FavouriteIn, FavouriteOut, TargetType
 
 def _ensure_consumer(db: Session, consumer_id: int):
     """Checks if the consumer exists, raising 404 if not."""
-    if not db.query(Consumer).filter(Consumer.id == consumer_id).first():
+    # exists() rather than loading the Consumer, whose selectin relationships would fetch all their favourites and reviews
+    if not db.query(exists().where(Consumer.id == consumer_id)).scalar():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consumer not found")
 
 def _get_favourite_query_filters(consumer_id: int, target_type: TargetType, target_id: int):
@@ -22,6 +23,21 @@ def _is_favourite(db: Session, consumer_id: int, target_type: TargetType, target
     q = _get_favourite_query_filters(consumer_id, target_type, target_id)
     return db.query(exists().where(and_(*q))).scalar()
 
+def _favourited_targets(db: Session, consumer_id: int, targets: List[FavouriteIn]) -> Set[Tuple[str, int]]:
+    """Which of `targets` the consumer has favourited, in one query."""
+    pairs = {(t.target_type, t.target_id) for t in targets}
+    rows = db.query(Favourite.target_type, Favourite.target_id).filter(
+        Favourite.consumer_id == consumer_id,
+        tuple_(Favourite.target_type, Favourite.target_id).in_(list(pairs)),
+    ).all()
+    return {(target_type, target_id) for target_type, target_id in rows}
+
+def _batch_results(targets: List[FavouriteIn], actions: Dict[Tuple[str, int], str]) -> List[Dict]:
+    return [
+        {"target_type": t.target_type, "target_id": t.target_id, "action": actions[(t.target_type, t.target_id)]}
+        for t in targets
+    ]
+
 def add_favourite(db: Session, consumer_id: int, payload: FavouriteIn) -> Dict:
     _ensure_consumer(db, consumer_id)
     
@@ -94,3 +110,46 @@ def toggle_favourite(db: Session, consumer_id: int, payload: FavouriteIn) -> Dic
         db.add(new_fav)
         db.commit()
         return {"status": "ok", "action": "added"}
+
+def are_favourites(db: Session, consumer_id: int, payload: FavouriteBatchIn) -> Dict:
+    """Membership of every target, in request order: one query for a whole list page."""
+    _ensure_consumer(db, consumer_id)
+
+    favourited = _favourited_targets(db, consumer_id, payload.targets)
+
+    return {"is_favourite": [(t.target_type, t.target_id) in favourited for t in payload.targets]}
+
+def add_favourites(db: Session, consumer_id: int, payload: FavouriteBatchIn) -> Dict:
+    """Adds every target not yet favourited, in one transaction."""
+    _ensure_consumer(db, consumer_id)
+
+    existing = _favourited_targets(db, consumer_id, payload.targets)
+    actions = {}
+    for t in payload.targets:
+        key = (t.target_type, t.target_id)
+        if key in actions:
+            continue
+        if key in existing:
+            actions[key] = "exists"
+        else:
+            db.add(Favourite(consumer_id=consumer_id, target_type=t.target_type, target_id=t.target_id))
+            actions[key] = "added"
+    db.commit()
+
+    return {"status": "ok", "consumer_id": consumer_id, "results": _batch_results(payload.targets, actions)}
+
+def remove_favourites(db: Session, consumer_id: int, payload: FavouriteBatchIn) -> Dict:
+    """Removes every favourited target, in one transaction. Targets not favourited are reported, not an error."""
+    _ensure_consumer(db, consumer_id)
+
+    pairs = {(t.target_type, t.target_id) for t in payload.targets}
+    removed = _favourited_targets(db, consumer_id, payload.targets)
+    if removed:
+        db.query(Favourite).filter(
+            Favourite.consumer_id == consumer_id,
+            tuple_(Favourite.target_type, Favourite.target_id).in_(list(removed)),
+        ).delete(synchronize_session='fetch')
+    db.commit()
+
+    actions = {key: "removed" if key in removed else "not_found" for key in pairs}
+    return {"status": "ok", "consumer_id": consumer_id, "results": _batch_results(payload.targets, actions)}
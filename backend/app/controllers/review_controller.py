@@ -1,14 +1,19 @@
 import os
 import shutil
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from fastapi import HTTPException, status, UploadFile
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.schemas.review_schema import ReviewIn, ReviewOut
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, func, case, literal_column, select, update
+from datetime import datetime
+from app.schemas.review_schema import ReviewIn, ReviewOut, ReviewStatusOut
 from app.models.consumer_model import Consumer
-from app.models.review_model import Review
+from app.models.review_model import Review, PENDING, PUBLISHED, REJECTED
+from app.models.rating_aggregate_model import RatingAggregate
+from app.models.hawker_centre_model import HawkerCentre
 
-from app.services.review_guard import guard_review_text
+from app.services.review_guard import guard_review_text, BOUNCE_MSG
+from app.services import moderation_queue
 
 REVIEW_IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "reviewPhotos")
 
@@ -27,6 +32,10 @@ def _get_review_by_id_and_owner(db: Session, review_id: int, consumer_id: int) -
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found or not owned by consumer")
     return review
 
+def _counted_rating(review: Review) -> Optional[int]:
+    """The rating this review contributes to its target's aggregate (only published reviews count)."""
+    return review.star_rating if review.status == PUBLISHED else None
+
 def _serialize_images_out(images_str: Optional[str]) -> List[str]:
     """Converts the stored string back to a list of strings."""
     return [p for p in (images_str or "").split("|") if p]
@@ -35,6 +44,121 @@ def _serialize_images_in(images_list: Optional[List[str]]) -> str:
     """Converts the list of strings to a pipe-delimited string for storage."""
     return "|".join(images_list or [])
 
+def _rating_upsert(dialect: str, target_type: str, target_id: int, deltas: Dict[str, int]):
+    """
+    INSERT ... ON CONFLICT (target_type, target_id) DO UPDATE SET col = col + delta,
+    so the first reviews of a target cannot race to insert its row (None if
+    the dialect has no such upsert).
+    """
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    table = RatingAggregate.__table__
+    return insert(table).values(
+        target_type=target_type, target_id=target_id,
+        **{col: max(d, 0) for col, d in deltas.items()}
+    ).on_conflict_do_update(
+        index_elements=[table.c.target_type, table.c.target_id],
+        set_={col: table.c[col] + d for col, d in deltas.items()},
+    )
+
+def _apply_rating_change(db: Session, target_type: str, target_id: int,
+                         old_rating: Optional[int], new_rating: Optional[int]) -> None:
+    """
+    Updates the materialised aggregate for a target inside the caller's transaction.
+    old_rating is None for a new review, new_rating is None for a deleted one.
+    """
+    if old_rating == new_rating:
+        return
+
+    deltas = {"rating_sum": (new_rating or 0) - (old_rating or 0)}
+    deltas["rating_count"] = (new_rating is not None) - (old_rating is not None)
+    for star, sign in ((old_rating, -1), (new_rating, 1)):
+        if star is not None:
+            col = f"stars_{star}"
+            deltas[col] = deltas.get(col, 0) + sign
+
+    upsert = _rating_upsert(db.get_bind().dialect.name, target_type, target_id, deltas)
+    if upsert is not None:
+        db.execute(upsert)
+    else:
+        # Increment in SQL so concurrent writers cannot lose each other's updates
+        updated = db.query(RatingAggregate).filter(
+            RatingAggregate.target_type == target_type,
+            RatingAggregate.target_id == target_id
+        ).update(
+            {getattr(RatingAggregate, col): getattr(RatingAggregate, col) + d for col, d in deltas.items()},
+            synchronize_session=False
+        )
+        if not updated:
+            db.add(RatingAggregate(
+                target_type=target_type, target_id=target_id,
+                **{col: max(d, 0) for col, d in deltas.items()}
+            ))
+            db.flush()
+
+    if target_type == "hawker":
+        # Keep the denormalised HawkerCentre.rating served by GET /hawkers/ current
+        _refresh_hawker_ratings(db, HawkerCentre.id == target_id)
+
+def _refresh_hawker_ratings(db: Session, *where) -> None:
+    """
+    Sets HawkerCentre.rating from the aggregates in one correlated UPDATE
+    (RatingAggregate.average_rating, or 0.0 for centres with no published reviews).
+    """
+    agg = RatingAggregate.__table__.c
+    # 1.0 inline keeps the division fractional on SQLite and numeric (so round(x, 2) exists) on PostgreSQL
+    average = select(func.round(agg.rating_sum * literal_column("1.0") / agg.rating_count, 2)).where(
+        agg.target_type == "hawker", agg.target_id == HawkerCentre.id, agg.rating_count > 0
+    ).scalar_subquery()
+    db.execute(
+        update(HawkerCentre).where(*where).values(rating=func.coalesce(average, 0.0)),
+        execution_options={"synchronize_session": False},
+    )
+
+def _get_rating_aggregate(db: Session, target_type: str, target_id: int) -> Optional[RatingAggregate]:
+    return db.query(RatingAggregate).filter(
+        RatingAggregate.target_type == target_type,
+        RatingAggregate.target_id == target_id
+    ).populate_existing().first()
+
+def rebuild_rating_aggregates(db: Session) -> int:
+    """
+    Recomputes every aggregate from the reviews table (backfill / repair:
+    python -m app.seed --rebuild-ratings). Not safe alongside live review
+    writes, whose deltas can be lost or counted twice. Returns the row count.
+    """
+    db.query(RatingAggregate).delete(synchronize_session=False)
+
+    star_counts = [
+        func.sum(case((Review.star_rating == star, 1), else_=0)).label(f"stars_{star}")
+        for star in range(1, 6)
+    ]
+    rows = db.query(
+        Review.target_type,
+        Review.target_id,
+        func.sum(Review.star_rating).label("rating_sum"),
+        func.count(Review.id).label("rating_count"),
+        *star_counts
+    ).filter(Review.status == PUBLISHED).group_by(Review.target_type, Review.target_id).all()
+
+    db.add_all(RatingAggregate(**row._asdict()) for row in rows)
+    db.flush()
+
+    # Every centre, so one whose last published review went away drops back to 0.0
+    _refresh_hawker_ratings(db)
+    db.commit()
+    return len(rows)
+
+def ensure_rating_aggregates(db: Session) -> None:
+    """Backfills the aggregate table once, for databases that had reviews before it existed."""
+    if db.query(RatingAggregate).first() is None and db.query(Review.id).first() is not None:
+        count = rebuild_rating_aggregates(db)
+        print(f"Backfilled rating aggregates for {count} targets.")
+
 def save_review_image_file(file: UploadFile, user_id: int) -> str:
     """Saves the uploaded file locally and returns its public path."""
     
@@ -140,9 +264,13 @@ def upsert_review(db: Session, consumer_id: int, payload: ReviewIn) -> ReviewOut
     if existing_review:
         # **UPDATE** existing review
         review = existing_review
+        _apply_rating_change(db, review.target_type, review.target_id, _counted_rating(review), payload.star_rating)
         review.star_rating = payload.star_rating
         review.description = payload.description or ""
         review.images = _serialize_images_in(payload.images)
+        review.status = PUBLISHED
+        review.moderation_code = verdict["code"]
+        review.moderated_at = datetime.utcnow()
         action_status = "updated"
         # Note: target_type and target_id are not changed on update.
         
@@ -158,16 +286,21 @@ def upsert_review(db: Session, consumer_id: int, payload: ReviewIn) -> ReviewOut
             star_rating=payload.star_rating,
             description=payload.description or "",
             images=_serialize_images_in(payload.images),
+            status=PUBLISHED,
+            moderation_code=verdict["code"],
+            moderated_at=datetime.utcnow(),
         )
         
         db.add(new_review)
+        _apply_rating_change(db, payload.target_type, payload.target_id, None, payload.star_rating)
         db.commit()
         db.refresh(new_review)
         review = new_review
         action_status = "created"
 
     # Step 4: Serialize and return
-    review.images = _serialize_images_out(review.images)
+    # (ReviewOut splits the stored images string itself; assigning the list back
+    # onto the ORM object would leave it dirty for the session's next flush)
     
     # Use ORM mode for serialization and return both the review and the status
     return {
@@ -192,47 +325,212 @@ def update_review(db: Session, consumer_id: int, review_id: int, payload: Review
     return ReviewOut.model_validate(review)
 """
 
+def submit_review(db: Session, consumer_id: int, payload: ReviewIn) -> Dict[str, Any]:
+    """
+    Asynchronous-moderation variant of upsert_review: stores the review as
+    pending and queues it for the review guard (see moderation_queue).
+    A pending review is not listed and not counted until it is published.
+    Reviews without a description need no moderation and publish immediately.
+    """
+    if not payload.description:
+        return upsert_review(db, consumer_id, payload)
+
+    _ensure_consumer(db, consumer_id)
+
+    review = db.query(Review).filter(
+        Review.consumer_id == consumer_id,
+        Review.target_type == payload.target_type,
+        Review.target_id == payload.target_id
+    ).first()
+
+    if review:
+        # An edit is re-moderated; the old version stops counting until then
+        _apply_rating_change(db, review.target_type, review.target_id, _counted_rating(review), None)
+        review.star_rating = payload.star_rating
+        review.description = payload.description
+        review.images = _serialize_images_in(payload.images)
+        review.status = PENDING
+        review.moderation_code = None
+        review.moderated_at = None
+        review.moderation_claimed_at = None  # a claim on the old text must not hold up the new one
+        action_status = "updated"
+    else:
+        review = Review(
+            consumer_id=consumer_id,
+            target_type=payload.target_type,
+            target_id=payload.target_id,
+            star_rating=payload.star_rating,
+            description=payload.description,
+            images=_serialize_images_in(payload.images),
+            status=PENDING,
+        )
+        db.add(review)
+        action_status = "created"
+
+    # Commit before queueing, so the worker can see the row
+    db.commit()
+    db.refresh(review)
+    moderation_queue.submit(review.id, review.description)
+
+    return {
+        "review": ReviewOut.model_validate(review),
+        "status": action_status,
+    }
+
+def apply_moderation_verdict(db: Session, review_id: int, description: str, verdict: Dict[str, Any]) -> Optional[str]:
+    """
+    Publishes or rejects a pending review. Does nothing (returns None) if the
+    review was deleted, already moderated, or edited since `description` was
+    classified - the newer submission has its own job.
+    """
+    new_status = PUBLISHED if verdict["ok"] else REJECTED
+    # Conditional UPDATE, so two workers can never both apply a verdict
+    claimed = db.execute(
+        update(Review)
+        .where(Review.id == review_id, Review.status == PENDING, Review.description == description)
+        .values(status=new_status, moderation_code=verdict["code"], moderated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        return None
+
+    if new_status == PUBLISHED:
+        target_type, target_id, star_rating = db.execute(
+            select(Review.target_type, Review.target_id, Review.star_rating).where(Review.id == review_id)
+        ).one()
+        _apply_rating_change(db, target_type, target_id, None, star_rating)
+    db.commit()
+    return new_status
+
+def apply_moderation_verdicts(db: Session, results: Sequence[Tuple[int, str, Dict[str, Any]]]) -> Dict[str, int]:
+    """
+    Bulk variant of apply_moderation_verdict for backlog jobs (see
+    batch_moderation): `results` are (review_id, classified description,
+    verdict). Verdicts apply to any status, so published reviews can be
+    re-moderated; reviews edited, deleted or re-moderated since they were read
+    are skipped. Aggregates get a delta for each review whose status changed.
+    """
+    current = {}
+    ids = [review_id for review_id, _, _ in results]
+    for i in range(0, len(ids), 500):
+        current.update((row.id, row) for row in db.execute(
+            select(Review.id, Review.description, Review.status, Review.moderation_code,
+                   Review.target_type, Review.target_id, Review.star_rating).where(Review.id.in_(ids[i:i + 500]))
+        ))
+
+    counts = {"published": 0, "rejected": 0, "unchanged": 0, "stale": 0}
+    now = datetime.utcnow()
+    params = []
+    for review_id, description, verdict in results:
+        row = current.get(review_id)
+        if row is None or row.description != description:
+            counts["stale"] += 1
+            continue
+        new_status = PUBLISHED if verdict["ok"] else REJECTED
+        if (row.status, row.moderation_code) == (new_status, verdict["code"]):
+            counts["unchanged"] += 1
+            continue
+        counts[new_status] += 1
+        params.append({"b_id": review_id, "b_description": description, "b_old_status": row.status,
+                       "b_status": new_status, "b_code": verdict["code"], "b_at": now})
+
+    if params:
+        # One executemany; the description and status checks skip rows edited or moderated since they were read above
+        table = Review.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.description == bindparam("b_description"),
+                   table.c.status == bindparam("b_old_status"))
+            .values(status=bindparam("b_status"), moderation_code=bindparam("b_code"), moderated_at=bindparam("b_at")),
+            params,
+        )
+
+        # executemany has no per-row rowcount: the rows now stamped with this run's
+        # moderated_at are the ones it wrote (and holds locked until the commit)
+        changed = [p for p in params if p["b_old_status"] != p["b_status"]]
+        written = set()
+        for i in range(0, len(changed), 500):
+            written.update(db.scalars(select(Review.id).where(
+                Review.id.in_([p["b_id"] for p in changed[i:i + 500]]), Review.moderated_at == now
+            )))
+        for p in changed:
+            if p["b_id"] in written:
+                row = current[p["b_id"]]
+                old_counted = row.star_rating if p["b_old_status"] == PUBLISHED else None
+                new_counted = row.star_rating if p["b_status"] == PUBLISHED else None
+                _apply_rating_change(db, row.target_type, row.target_id, old_counted, new_counted)
+    db.commit()
+    return counts
+
+def get_review_status(db: Session, consumer_id: int, review_id: int) -> ReviewStatusOut:
+    review = _get_review_by_id_and_owner(db, review_id, consumer_id)
+    return ReviewStatusOut(
+        id=review.id,
+        status=review.status,
+        moderation_code=review.moderation_code,
+        reason=BOUNCE_MSG if review.status == REJECTED else None,
+        moderated_at=review.moderated_at,
+    )
+
 def delete_review(db: Session, consumer_id: int, review_id: int) -> Dict:
     # This call includes the ownership check
     review = _get_review_by_id_and_owner(db, review_id, consumer_id) 
     
+    _apply_rating_change(db, review.target_type, review.target_id, _counted_rating(review), None)
     db.delete(review)
     db.commit()
     return {"message": "Review deleted"}
 
-def list_reviews_for_target(db: Session, target_type: str, target_id: int) -> List[ReviewOut]:
-    reviews = db.query(Review).filter(
+def _target_reviews_stmt(target_type: str, target_id: int):
+    return select(Review).where(
         Review.target_type == target_type,
-        Review.target_id == target_id
-    ).order_by(Review.created_at.desc()).all() # Newest first
-    
+        Review.target_id == target_id,
+        Review.status == PUBLISHED
+    ).order_by(Review.created_at.desc()) # Newest first
+
+def _consumer_reviews_stmt(consumer_id: int):
+    return select(Review).where(
+        Review.consumer_id == consumer_id,
+        Review.status == PUBLISHED
+    ).order_by(Review.created_at.desc()) # Newest first
+
+def _rating_summary(target_type: str, target_id: int, agg: Optional[RatingAggregate]) -> Dict[str, Any]:
+    return {
+        "target_type": target_type, 
+        "target_id": target_id, 
+        "average_rating": agg.average_rating if agg else 0.0, 
+        "count": agg.rating_count if agg else 0,
+        "histogram": {star: getattr(agg, f"stars_{star}") if agg else 0 for star in range(1, 6)}
+    }
+
+def list_reviews_for_target(db: Session, target_type: str, target_id: int) -> List[ReviewOut]:
+    reviews = db.scalars(_target_reviews_stmt(target_type, target_id)).all()
     return [ReviewOut.model_validate(r) for r in reviews]
 
 def list_reviews_for_consumer(db: Session, consumer_id: int) -> List[ReviewOut]:
     _ensure_consumer(db, consumer_id)
     
-    reviews = db.query(Review).filter(
-        Review.consumer_id == consumer_id
-    ).order_by(Review.created_at.desc()).all() # Newest first
-    
+    reviews = db.scalars(_consumer_reviews_stmt(consumer_id)).all()
     return [ReviewOut.model_validate(r) for r in reviews]
 
 def get_avg_rating(db: Session, target_type: str, target_id: int) -> Dict[str, Any]:
-    # Use SQLAlchemy's func.avg() to calculate the average rating in the database
-    result = db.query(
-        func.avg(Review.star_rating).label('average_rating'),
-        func.count(Review.id).label('count')
-    ).filter(
-        Review.target_type == target_type,
-        Review.target_id == target_id
-    ).first()
-    
-    avg_rating = result.average_rating
-    count = result.count
-    
-    return {
-        "target_type": target_type, 
-        "target_id": target_id, 
-        "average_rating": round(avg_rating, 2) if avg_rating is not None else 0.0, 
-        "count": count
-    }
\ No newline at end of file
+    # Read the materialised aggregate instead of scanning reviews with func.avg()
+    return _rating_summary(target_type, target_id, _get_rating_aggregate(db, target_type, target_id))
+
+# --- AsyncSession variants for the public read routes ---
+
+async def list_reviews_for_target_async(db: AsyncSession, target_type: str, target_id: int) -> List[ReviewOut]:
+    reviews = (await db.scalars(_target_reviews_stmt(target_type, target_id))).all()
+    return [ReviewOut.model_validate(r) for r in reviews]
+
+async def list_reviews_for_consumer_async(db: AsyncSession, consumer_id: int) -> List[ReviewOut]:
+    if await db.get(Consumer, consumer_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consumer not found")
+
+    reviews = (await db.scalars(_consumer_reviews_stmt(consumer_id))).all()
+    return [ReviewOut.model_validate(r) for r in reviews]
+
+async def get_avg_rating_async(db: AsyncSession, target_type: str, target_id: int) -> Dict[str, Any]:
+    agg = await db.get(RatingAggregate, (target_type, target_id))
+    return _rating_summary(target_type, target_id, agg)
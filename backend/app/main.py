@@ -3,7 +3,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware 
 from fastapi.staticfiles import StaticFiles
 
-from app.database import Base, engine, SessionLocal
+from app.database import Base, engine, async_engine, SessionLocal
 from app.utils.profiler_middleware import PyInstrumentProfilerMiddleware
 from app.routes.consumer_route import router as consumer_router
 from app.routes.business_route import router as business_router
@@ -21,18 +21,19 @@ from app.models import (
     hawker_centre_model,
     business_model,
     operating_hour_model,
-    menu_item_model
+    menu_item_model,
+    rating_aggregate_model,
+    seed_state_model
 )
 
-# SEEDING IMPORT
-from app.assets.database_seed.seed_db import seed_sfa_data_if_empty
+from app import seed
+from app.services import moderation_queue, planning_area_index
+from app.utils.onemap_client import close_onemap_client
+from app.utils import query_plan_audit
 
 # Define paths relative to the current file (main.py is in 'app')
 MAIN_DIR = os.path.dirname(__file__)
 
-# Path to the index.json file (from app/main.py -> ../SFA/index.json)
-INDEX_JSON_PATH = os.path.join(MAIN_DIR, "..", "SFA", "index.json")
-
 # Define the directories where profile pictures are stored
 # Use relative path to main.py file's location. E.g. /backend/app/assets/profilePhotos
 STATIC_DIR = os.path.join(os.path.dirname(__file__), "assets", "profilePhotos")
@@ -40,33 +41,35 @@ BUSINESS_STATIC_DIR = os.path.join(os.path.dirname(__file__), "assets", "busines
 MENU_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "assets", "menuPhotos")
 REVIEW_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "assets", "reviewPhotos")
 
-# Function to create tables
-def create_db_and_tables():
-    # Base.metadata.create_all requires all models to be imported before calling
-    Base.metadata.create_all(bind=engine)
-
 # Initialize App and DB
 app = FastAPI(title="HawkerSG")
 
+def report_query_plans():
+    if query_plan_audit.QUERY_PLAN_AUDIT:
+        query_plan_audit.print_report(query_plan_audit.run_audit(engine))
+
 @app.on_event("startup")
 def startup_db_and_seed():
-    print("Running database table creation...")
-    create_db_and_tables()
-    print("Database tables ensured.")
-    
-    # 1. Get a fresh database session
-    db = SessionLocal()
-    
-    try:
-        # 2. Call the seeding function
-        seed_sfa_data_if_empty(db, INDEX_JSON_PATH)
-    except Exception as e:
-        # Catch and print error, which would typically be a database issue
-        print(f"Error during application startup seeding: {e}")
-        # NOTE: The exception is primarily for logging, the app should still start.
-    finally:
-        # 3. Always close the session
-        db.close()
+    # Checks the seed version marker. If it is behind, the schema is migrated before
+    # serving and SFA seeding runs in one background worker (see SEED_ON_STARTUP)
+    seed.startup(on_ready=report_query_plans)
+
+    # Load planning-area boundaries now rather than on the first request's event loop
+    # turn; a missing file is picked up once the seed job or an operator fetches it
+    planning_area_index.startup()
+
+    if moderation_queue.ASYNC_MODERATION and seed.is_current(engine):
+        # Reviews left pending by a previous run (jobs are only held in memory). Every
+        # worker resumes; a per-review claim makes sure each is classified once
+        resumed = moderation_queue.resume_pending()
+        if resumed:
+            print(f"Resumed moderation of {resumed} pending reviews.")
+
+@app.on_event("shutdown")
+async def close_connections():
+    await close_onemap_client()
+    moderation_queue.shutdown()
+    await async_engine.dispose()
 
 # STATIC FILES CONFIGURATION
 # 1. Mount the STATIC_DIR to a public URL path (e.g., /static/profiles)
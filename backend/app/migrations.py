@@ -0,0 +1,77 @@
+"""
+Lightweight, idempotent schema migrations for existing databases.
+
+Base.metadata.create_all only creates tables that are missing; it never
+adds columns or indexes to a table that already exists. ensure_columns()
+and ensure_indexes() fill that gap so existing HawkerSG.db files pick up
+nullable columns and indexes declared on the models.
+
+Run manually with:  python -m app.migrations
+"""
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.database import Base, engine as default_engine
+
+def ensure_columns(bind: Engine = default_engine) -> List[str]:
+    """
+    Adds every model-declared column that is missing from an existing table.
+    Columns must be nullable or have a server_default to backfill existing rows.
+    Returns "table.column" names.
+    """
+    added = []
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    ddl = bind.dialect.ddl_compiler(bind.dialect, None)
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if column.primary_key or (not column.nullable and column.server_default is None):
+                    # Would need a backfill; write a real migration for these
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server_default")
+                conn.execute(text(
+                    f"ALTER TABLE {ddl.preparer.format_table(table)} ADD COLUMN {ddl.get_column_specification(column)}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def ensure_indexes(bind: Engine = default_engine) -> List[str]:
+    """Creates every model-declared index that is missing from an existing table. Returns their names."""
+    created = []
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue  # create_all builds new tables with their indexes
+            present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in present:
+                    index.create(bind=conn, checkfirst=True)
+                    created.append(index.name)
+    return created
+
+def main():
+    # Import models here so Base knows about every table
+    from app.models import (  # noqa: F401
+        user_model, consumer_model, favourite_model, review_model, hawker_centre_model,
+        business_model, operating_hour_model, menu_item_model, rating_aggregate_model,
+        seed_state_model
+    )
+    Base.metadata.create_all(bind=default_engine)
+    added = ensure_columns(default_engine)
+    print(f"Added {len(added)} missing column(s): {', '.join(added) or '-'}")
+    created = ensure_indexes(default_engine)
+    print(f"Created {len(created)} missing index(es): {', '.join(created) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -33,9 +33,11 @@ class Business(User):
     licensee_name = Column(String, nullable=False)  # From SFA data - notNull
     
     # Profile details
-    cuisine_type = Column(Enum(CuisineType), nullable=True)
+    # native_enum=False stores the member name in a VARCHAR on every backend, so
+    # PostgreSQL needs no CREATE TYPE and adding a member needs no ALTER TYPE
+    cuisine_type = Column(Enum(CuisineType, native_enum=False), nullable=True)
     description = Column(String(500), nullable=True)  # 500 characters
-    status = Column(Enum(StallStatus), default=StallStatus.OPEN)
+    status = Column(Enum(StallStatus, native_enum=False), default=StallStatus.OPEN)
     status_updated_at = Column(DateTime, nullable=True)
     
     # Location info
@@ -45,6 +47,10 @@ class Business(User):
     
     # Media
     photo = Column(String, nullable=True)  # Store filename/path to photo
+
+    # SFA sync bookkeeping (see app/assets/database_seed/sfa_sync.py)
+    profile_updated_at = Column(DateTime, nullable=True)  # Set when the owner edits the profile; sync never overwrites it after that
+    sfa_delisted_at = Column(DateTime, nullable=True)  # Set when the licence no longer appears in the SFA data
     
     # Relationships
     operating_hours = relationship("OperatingHour", back_populates="business", cascade="all, delete-orphan")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -15,3 +15,8 @@ class Favourite(Base):
     # This allows you to access the Consumer object from a Favourite object.
     # 'Consumer' is the class name of the target model.
     consumer = relationship("Consumer", back_populates="favourites")
+
+    __table_args__ = (
+        # is-favourite / remove / toggle lookups, and per-consumer listing (leftmost prefix)
+        Index("ix_favourites_consumer_target", "consumer_id", "target_type", "target_id"),
+    )
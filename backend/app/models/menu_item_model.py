@@ -6,7 +6,7 @@ class MenuItem(Base):
     __tablename__ = "menu_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    license_number = Column(String, ForeignKey('businesses.license_number'), nullable=False)
+    license_number = Column(String, ForeignKey('businesses.license_number'), nullable=False, index=True)
     description = Column(String(200), nullable=True) #200 characters limit
     name = Column(String(100), nullable=False)  # 100 characters limit
     price = Column(Numeric(10, 2), nullable=False)  # Decimal with 2 decimal places
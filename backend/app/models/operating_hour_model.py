@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey, Time
+from sqlalchemy import Column, Integer, String, ForeignKey, Time, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -24,4 +24,9 @@ class OperatingHour(Base):
     # Relationship back to Business
     business = relationship("Business", back_populates="operating_hours")
     
-    # Note: Start < End validation should be done at controller/schema level
\ No newline at end of file
+    # Note: Start < End validation should be done at controller/schema level
+
+    __table_args__ = (
+        # set_operating_hours looks up (license_number, day); the schedule index reloads by license_number
+        Index("ix_operating_hours_license_day", "license_number", "day"),
+    )
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class RatingAggregate(Base):
+    """
+    Materialised per-target review statistics, maintained in the same
+    transaction as every review write (see review_controller), so readers
+    never have to aggregate the reviews table.
+    """
+    __tablename__ = "rating_aggregates"
+
+    target_type = Column(String(50), primary_key=True)
+    target_id = Column(Integer, primary_key=True)
+
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+
+    # Histogram of star ratings
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+
+    @property
+    def average_rating(self) -> float:
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else 0.0
@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Float
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
+# Review.status values. Only published reviews are listed and counted in rating aggregates.
+PENDING = "pending"      # waiting for asynchronous moderation
+PUBLISHED = "published"
+REJECTED = "rejected"
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -17,6 +22,13 @@ class Review(Base):
     description = Column(String(250), nullable=False, default="") 
     images = Column(Text, nullable=False, default="") 
     
+    # Moderation state; server_default lets existing rows be migrated as published
+    status = Column(String(20), nullable=False, default=PUBLISHED, server_default=PUBLISHED)
+    moderation_code = Column(String(50), nullable=True)  # guard verdict code once moderated
+    moderated_at = Column(DateTime, nullable=True)
+    # Set by the process classifying a pending review, so each is classified once (see moderation_queue)
+    moderation_claimed_at = Column(DateTime, nullable=True)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -26,4 +38,11 @@ class Review(Base):
     # Optional, but often a good idea for reviews:
     # __table_args__ = (
     #     UniqueConstraint('consumer_id', 'target_type', 'target_id', name='_consumer_target_uc'),
-    # )
\ No newline at end of file
+    # )
+
+    __table_args__ = (
+        # Public listing for a stall/hawker: WHERE target_type, target_id ORDER BY created_at DESC
+        Index("ix_reviews_target_created", "target_type", "target_id", "created_at"),
+        # Upsert lookup and per-consumer listing (leftmost prefix)
+        Index("ix_reviews_consumer_target", "consumer_id", "target_type", "target_id"),
+    )
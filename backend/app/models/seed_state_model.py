@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+class SeedState(Base):
+    """
+    Schema/seed version marker and cross-process claim lock (see app/seed.py).
+
+    One row per job. Startup only compares `version` with the code's
+    SEED_VERSION; the process that flips `status` to "running" with a
+    conditional UPDATE is the only one that runs the job.
+    """
+    __tablename__ = "seed_state"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=True)       # last version completed
+    status = Column(String(20), nullable=False, default="idle")  # idle | running | done | failed
+    claimed_by = Column(String(255), nullable=True)  # host:pid of the running/last process
+    claimed_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
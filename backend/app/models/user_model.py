@@ -10,7 +10,7 @@ class User(Base):
     hashed_password = Column(String)
     username = Column(String)
     user_type = Column(String) # Discriminator column
-    reset_token = Column(String, nullable=True)
+    reset_token = Column(String, nullable=True, index=True)
     token_expires = Column(DateTime, nullable=True)
     created_at = Column(
         DateTime,
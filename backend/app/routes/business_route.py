@@ -150,7 +150,7 @@ def get_menu_items(license_number: str, db: Session = Depends(get_db)):
 # ===== Protected Write Endpoints (JWT Required) =====
 
 @router.patch("/{license_number}/profile", response_model=BusinessOut)
-async def update_business_profile(
+def update_business_profile(
     license_number: str,
     db: Session = Depends(get_db),
     #license_number_from_token: str = Depends(get_current_license_number),
@@ -170,7 +170,7 @@ async def update_business_profile(
     )
     
     try:
-        updated_business = await business_controller.update_business_profile(
+        updated_business = business_controller.update_business_profile(
             db, 
             license_number_from_path=license_number,
             # license_number_from_token=license_number_from_token,
@@ -218,7 +218,7 @@ def set_operating_hours(
         )
 
 @router.post("/{license_number}/menu-items", response_model=MenuItemOut, status_code=status.HTTP_201_CREATED)
-async def add_menu_item(
+def add_menu_item(
     license_number: str,
     db: Session = Depends(get_db),
     name: str = Form(...),
@@ -238,7 +238,7 @@ async def add_menu_item(
     
     try:
         # Pass the text data schema AND the image file to the controller
-        new_item = await business_controller.add_menu_item( # ⭐️ Await the async controller
+        new_item = business_controller.add_menu_item(
             db,
             license_number_from_path=license_number,
             # license_number_from_token=license_number_from_token,
@@ -256,7 +256,7 @@ async def add_menu_item(
         )
 
 @router.patch("/{license_number}/menu-items/{item_id}", response_model=MenuItemOut)
-async def update_menu_item(
+def update_menu_item(
     license_number: str,
     item_id: int,
     db: Session = Depends(get_db),
@@ -278,7 +278,7 @@ async def update_menu_item(
     
     try:
         # Pass the schema object, the file, and the flag to the controller
-        updated_item = await business_controller.update_menu_item( # ⭐️ Await the async controller
+        updated_item = business_controller.update_menu_item(
             db,
             license_number_from_path=license_number,
             # license_number_from_token=license_number_from_token,
@@ -119,7 +119,7 @@ def reset_user_password(
         )
 
 @router.put("/update-profile", response_model=UpdateProfileResponse, status_code=status.HTTP_200_OK)
-async def update_profile(
+def update_profile(
     db: Session = Depends(get_db),
     # Inject user_id securely from the JWT token
     user_id: int = Depends(get_current_user_id), 
@@ -133,7 +133,7 @@ async def update_profile(
 ):
     """Updates consumer profile details using JWT authentication."""
     try:
-        updated_data = await consumer_controller.update_consumer_profile(
+        updated_data = consumer_controller.update_consumer_profile(
             db,
             user_id, 
             username,
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, status, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Dict
 from app.database import get_db
-from app.schemas.favourite_schema import FavouriteIn, FavouriteOut
+from app.schemas.favourite_schema import FavouriteBatchIn, FavouriteIn, FavouriteOut
 from app.controllers import favourite_controller as ctrl
 from app.dependencies import get_current_user_id
 
@@ -38,3 +38,18 @@ def toggle_favourite(consumer_id: int, fav: FavouriteIn, db: Session = Depends(g
 def check_favourite(consumer_id: int, fav: FavouriteIn, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
     _check_owner_match(consumer_id, user_id)
     return ctrl.is_favourite(db, consumer_id, fav)
+
+@router.post("/check/bulk", response_model=Dict)
+def check_favourites(consumer_id: int, batch: FavouriteBatchIn, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    _check_owner_match(consumer_id, user_id)
+    return ctrl.are_favourites(db, consumer_id, batch)
+
+@router.post("/bulk", response_model=Dict)
+def add_favourites(consumer_id: int, batch: FavouriteBatchIn, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    _check_owner_match(consumer_id, user_id)
+    return ctrl.add_favourites(db, consumer_id, batch)
+
+@router.delete("/bulk", response_model=Dict)
+def remove_favourites(consumer_id: int, batch: FavouriteBatchIn, db: Session = Depends(get_db), user_id: int = Depends(get_current_user_id)):
+    _check_owner_match(consumer_id, user_id)
+    return ctrl.remove_favourites(db, consumer_id, batch)
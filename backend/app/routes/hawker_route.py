@@ -1,9 +1,15 @@
-import requests
+import os
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models.hawker_centre_model import HawkerCentre
-from app.utils.onemap_token_manager import get_onemap_token
+from app.utils.onemap_client import OneMapError, get_onemap_client
+from app.services import hawker_geo_index, planning_area_index
+
+# Use OneMap only when no planning-area boundary file is available locally
+PLANNING_AREA_ONEMAP_FALLBACK = os.getenv("PLANNING_AREA_ONEMAP_FALLBACK", "true").lower() == "true"
 
 router = APIRouter(
     prefix="/hawkers",
@@ -11,69 +17,67 @@ router = APIRouter(
 )
 
 @router.get("/")
-def get_all_hawkers(db: Session = Depends(get_db)):
+async def get_all_hawkers(db: AsyncSession = Depends(get_async_db)):
     """Return all hawker centres from the database."""
-    hawkers = db.query(HawkerCentre).all()
+    hawkers = (await db.scalars(select(HawkerCentre))).all()
     if not hawkers:
         raise HTTPException(status_code=404, detail="No hawker centres found in the database")
     return hawkers
 
+@router.get("/nearby")
+async def get_nearby_hawkers(
+    lat: float = Query(..., ge=-90, le=90, description="WGS84 Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="WGS84 Longitude"),
+    k: int = Query(5, ge=1, le=50, description="Maximum number of centres to return"),
+    radius_m: Optional[float] = Query(None, gt=0, description="Only return centres within this distance (metres)"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Return the k hawker centres nearest to a point, nearest first, each with `distance_m`."""
+    # Only touches the DB when the in-memory index needs (re)building; the build itself runs off the event loop
+    await hawker_geo_index.ensure_loaded_async(db)
+    return hawker_geo_index.nearest(lat, lng, k=k, radius_m=radius_m)
+
 @router.get("/planning-area", response_model=str)
 async def get_planning_area_proxy(
     latitude: float = Query(..., description="WGS84 Latitude"),
     longitude: float = Query(..., description="WGS84 Longitude")
 ):
     """
-    Proxies the OneMap GetPlanningArea API call securely using a backend-managed token.
+    Resolves the URA planning area for a point.
+
+    Answered from the offline planning-area index when a boundary file is
+    available (loaded or fetched at startup); otherwise, and only if
+    PLANNING_AREA_ONEMAP_FALLBACK is on, asks OneMap through the shared async
+    client, which pools connections, refreshes the token single-flight and
+    coalesces identical in-flight lookups. OneMap answers are memoised per
+    rounded coordinate.
     """
-    # 1. Get the current, valid token from the secure backend cache/manager
-    token = get_onemap_token()
-    if not token:
-        # 503 Service Unavailable is appropriate if an external dependency fails
-        raise HTTPException(status_code=503, 
-                            detail="Service Unavailable: Failed to retrieve secure OneMap token.")
-        
-    # 2. Construct the external OneMap API request URL
-    PLANNING_AREA_URL = (
-        f"https://www.onemap.gov.sg/api/public/popapi/getPlanningarea"
-        f"?latitude={latitude}&longitude={longitude}"
-    )
-    
-    headers = {
-        "Authorization": token  # The secure, refreshed token is added here
-    }
+    # 1. Offline lookup: no network I/O at all
+    if planning_area_index.is_available():
+        return planning_area_index.lookup(latitude, longitude) or "Singapore"
+    if not PLANNING_AREA_ONEMAP_FALLBACK:
+        return "Singapore"
 
-    # 3. Make the request to OneMap
-    try:
-        response = requests.get(PLANNING_AREA_URL, headers=headers)
-        
-        # Check for 401 Unauthorized (which shouldn't happen if get_onemap_token works, but as a safeguard)
-        if response.status_code == 401:
-            raise HTTPException(status_code=500, detail="Internal Token Error: OneMap token may have expired unexpectedly.")
-            
-        response.raise_for_status() # Raise for other HTTP errors (4xx/5xx)
-        data = response.json()
-        
-        # 4. Process the response data just like the frontend did (best to do this on the backend)
-        if data and isinstance(data, list) and data[0].get('pln_area_n'):
-            areaName = data[0]['pln_area_n']
+    # 2. OneMap fallback, memoised per rounded coordinate, without blocking the event loop
+    known, area_name = planning_area_index.recalled_fallback(latitude, longitude)
+    if not known:
+        try:
+            area_name = await get_onemap_client().get_planning_area(latitude, longitude)
+        except OneMapError as e:
+            print(f"Error calling OneMap GetPlanningArea: {e}")
+            # Return a generic error to the frontend
+            raise HTTPException(status_code=503, detail="External map service failed.")
+        if area_name:
             # Format the area name from ALL CAPS (e.g., "YISHUN") to Title Case ("Yishun")
-            formatted_area = ' '.join(
-                [word.capitalize() for word in areaName.lower().split()]
-            )
-            return formatted_area
-        
-        return "Singapore" # Fallback if no specific planning area found
+            area_name = planning_area_index.format_area_name(area_name)
+        planning_area_index.remember_fallback(latitude, longitude, area_name)
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error calling OneMap GetPlanningArea: {e}")
-        # Return a generic error to the frontend
-        raise HTTPException(status_code=500, detail="External map service failed.")
+    return area_name or "Singapore" # Fallback if no specific planning area found
 
 @router.get("/{hawker_id}")
-def get_hawker_by_id(hawker_id: int, db: Session = Depends(get_db)):
+async def get_hawker_by_id(hawker_id: int, db: AsyncSession = Depends(get_async_db)):
     """Return a single hawker centre by its ID."""
-    hawker = db.query(HawkerCentre).filter(HawkerCentre.id == hawker_id).first()
+    hawker = await db.get(HawkerCentre, hawker_id)
     if not hawker:
         raise HTTPException(status_code=404, detail="Hawker centre not found")
     return hawker
@@ -1,11 +1,13 @@
 from typing import Any, Dict, List
-from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File, Response
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.schemas.review_schema import ReviewIn
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
+from app.schemas.review_schema import ReviewIn, ReviewStatusOut
 from app.controllers import review_controller as ctrl
 from app.dependencies import get_current_user_id
 from app.controllers.review_controller import save_review_image_file
+from app.services import moderation_queue
 
 router = APIRouter(prefix="", tags=["Reviews"])
 
@@ -16,8 +18,9 @@ def _check_owner_match(path_id: int, token_id: int):
             detail="You are only authorized to manage your own resources."
         )
 
+# Plain `def`: the file copy blocks, so FastAPI runs this on its threadpool
 @router.post("/reviews/upload-image", status_code=status.HTTP_201_CREATED)
-async def upload_review_image(
+def upload_review_image(
     file: UploadFile = File(...), 
     user_id: int = Depends(get_current_user_id) # Requires authentication
 ) -> Dict[str, str]:
@@ -37,11 +40,32 @@ async def upload_review_image(
 def create_review(
     consumer_id: int, 
     payload: ReviewIn, 
+    response: Response,
     db: Session = Depends(get_db),
     user_id: int = Depends(get_current_user_id)
 ):
     _check_owner_match(consumer_id, user_id)
-    return ctrl.upsert_review(db, consumer_id, payload)
+    if not moderation_queue.ASYNC_MODERATION:
+        return ctrl.upsert_review(db, consumer_id, payload)
+
+    # Async moderation: 202 while the review is pending; poll the status URL for the verdict
+    result = ctrl.submit_review(db, consumer_id, payload)
+    review = result["review"]
+    if review.status == "pending":
+        response.status_code = status.HTTP_202_ACCEPTED
+        result["status_url"] = f"/consumers/{consumer_id}/reviews/{review.id}/status"
+    return result
+
+# Moderation state of one of the caller's reviews (only owner)
+@router.get("/consumers/{consumer_id}/reviews/{review_id}/status", response_model=ReviewStatusOut)
+def get_review_status(
+    consumer_id: int,
+    review_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    _check_owner_match(consumer_id, user_id)
+    return ctrl.get_review_status(db, consumer_id, review_id)
 
 # Delete a review (only owner)
 @router.delete("/consumers/{consumer_id}/reviews/{review_id}", status_code=status.HTTP_200_OK)
@@ -56,15 +80,15 @@ def delete_review(
 
 # List reviews for a target (business/hawker) - PUBLIC ROUTE
 @router.get("/targets/{target_type}/{target_id}/reviews", response_model=List[Any])
-def list_reviews_for_target(target_type: str, target_id: int, db: Session = Depends(get_db)):
-    return ctrl.list_reviews_for_target(db, target_type, target_id)
+async def list_reviews_for_target(target_type: str, target_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await ctrl.list_reviews_for_target_async(db, target_type, target_id)
 
 # List reviews created by a consumer - PUBLIC ROUTE (Consumer's profile view)
 @router.get("/consumers/{consumer_id}/reviews", response_model=List[Any])
-def list_reviews_for_consumer(consumer_id: int, db: Session = Depends(get_db)):
-    return ctrl.list_reviews_for_consumer(db, consumer_id)
+async def list_reviews_for_consumer(consumer_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await ctrl.list_reviews_for_consumer_async(db, consumer_id)
 
 # Average rating for a target - PUBLIC ROUTE
 @router.get("/targets/{target_type}/{target_id}/reviews/average", response_model=Dict)
-def get_avg_rating(target_type: str, target_id: int, db: Session = Depends(get_db)):
-    return ctrl.get_avg_rating(db, target_type, target_id)
+async def get_avg_rating(target_type: str, target_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await ctrl.get_avg_rating_async(db, target_type, target_id)
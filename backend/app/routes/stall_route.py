@@ -1,20 +1,20 @@
 # app/routes/stall_route.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from datetime import datetime, time
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
 import pytz
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.business_model import Business, StallStatus
-from app.models.operating_hour_model import OperatingHour
+from app.models.rating_aggregate_model import RatingAggregate
+from app.services import open_hours_index
 
 router = APIRouter(prefix="/stalls", tags=["Stalls"])
 
 SG_TZ = pytz.timezone("Asia/Singapore")
-DAY_MAP = {
-    0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday",
-    4: "Friday", 5: "Saturday", 6: "Sunday"
-}
 
 def now_sg():
     return datetime.now(SG_TZ)
@@ -32,7 +32,7 @@ def now_sg():
 #     ).all()
 
 #     if not windows:
-#         # fall back to status enum if no hours recorded
+#         # fall back to status enum if no hours recorded for that day
 #         return biz.status == StallStatus.OPEN
 
 #     tnow = today.time()
@@ -43,58 +43,99 @@ def now_sg():
 #             return True
 #     return False
 
-def is_business_open(biz: Business, db: Session) -> bool:
-    """Return True if current SG time is within today's operating window(s).
+def is_business_open(biz: Business, db: Session, minute: Optional[int] = None) -> bool:
+    """Return True if SG time `minute` (default: now) is within the business's operating window(s).
     
-    NOTE: This is optimized to use the already-loaded operating_hours relationship
-    if available, eliminating the N+1 query problem.
+    NOTE: This looks the business up in the in-memory weekly schedule index
+    (a binary search over minute-of-week intervals) instead of walking
+    biz.operating_hours, so listing endpoints neither load the hours
+    relationship nor do per-row time arithmetic.
     """
-
-    today = now_sg()
-    day_name = DAY_MAP[today.weekday()]
-    
-    # -----------------------------------------------------------------
-    # OPTIMIZATION: Access the pre-loaded relationship instead of querying
-    # -----------------------------------------------------------------
-    all_operating_hours = biz.operating_hours
-    
-    # Filter the pre-loaded hours list for today's hours
-    windows = [
-        oh for oh in all_operating_hours
-        if oh.day == day_name
-    ]
-    
-    if not windows:
-        # fall back to status enum if no hours recorded
+    open_hours_index.ensure_loaded(db)
+    if minute is None:
+        minute = open_hours_index.minute_of_week(now_sg())
+    return _is_open_at(biz, minute)
+
+def _is_open_at(biz, minute: int) -> bool:
+    """Index lookup only; the caller has already made sure the schedule index is loaded."""
+    is_open = open_hours_index.is_open_at(biz.license_number, minute)
+    if is_open is None:
+        # fall back to status enum if no hours recorded for that day
         return biz.status == StallStatus.OPEN
+    return is_open
+
+# Every field of the stall DTO, with the columns it is computed from and how
+# to compute it, applied to rows of a column-only query (see stall_select).
+# Plain table columns are used so projected queries do not join `users`.
+_cols = Business.__table__.c
+_agg = RatingAggregate.__table__
+
+STALL_FIELDS = {
+    "id": ((_cols.id,), lambda biz, minute: biz.id),
+    "license_number": ((_cols.license_number,), lambda biz, minute: biz.license_number),
+    "stall_name": ((_cols.stall_name, _cols.licensee_name),
+                   lambda biz, minute: biz.stall_name or biz.licensee_name or ""),
+    "licensee_name": ((_cols.licensee_name,), lambda biz, minute: biz.licensee_name),
+    "description": ((_cols.description,), lambda biz, minute: biz.description or ""),
+    "status": ((_cols.status,), lambda biz, minute: biz.status.name),
+    "is_open": ((_cols.license_number, _cols.status),
+                lambda biz, minute: _is_open_at(biz, minute)),
+    "establishment_address": ((_cols.establishment_address,),
+                              lambda biz, minute: biz.establishment_address or ""),
+    "hawker_centre": ((_cols.hawker_centre,), lambda biz, minute: biz.hawker_centre or ""),
+    "postal_code": ((_cols.postal_code,), lambda biz, minute: biz.postal_code or ""),
+    "photo": ((_cols.photo,), lambda biz, minute: biz.photo or ""),
+    # From the materialised review aggregates (outer joined, so stalls without reviews get 0)
+    "rating": ((_agg.c.rating_sum, _agg.c.rating_count),
+               lambda biz, minute: round(biz.rating_sum / biz.rating_count, 2) if biz.rating_count else 0),
+    "review_count": ((_agg.c.rating_count,), lambda biz, minute: biz.rating_count or 0),
+    # include raw hours if FE ever wants to draw them:
+    # "hours": [{"day": oh.day, "start": oh.start_time.isoformat(), "end": oh.end_time.isoformat()} for oh in biz.operating_hours],
+}
 
-    tnow = today.time()
-    for w in windows:
-        start: time = w.start_time
-        end: time = w.end_time
-        if start <= tnow <= end:
-            return True
-    return False
-
-def business_to_dto(biz: Business, db: Session):
-    return {
-        "id": biz.id,
-        "license_number": biz.license_number,
-        "stall_name": biz.stall_name or biz.licensee_name or "",
-        "licensee_name": biz.licensee_name,
-        "description": biz.description or "",
-        "status": biz.status.name,
-        "is_open": is_business_open(biz, db),
-        "establishment_address": biz.establishment_address or "",
-        "hawker_centre": biz.hawker_centre or "",
-        "postal_code": biz.postal_code or "",
-        "photo": biz.photo or "",
-        # optional placeholders your FE maps:
-        "rating": 0,
-        "review_count": 0,
-        # include raw hours if FE ever wants to draw them:
-        # "hours": [{"day": oh.day, "start": oh.start_time.isoformat(), "end": oh.end_time.isoformat()} for oh in biz.operating_hours],
-    }
+MAX_PAGE_SIZE = 500
+
+def business_to_dto(biz, minute: int, fields: Optional[List[str]] = None):
+    names = fields if fields is not None else STALL_FIELDS.keys()
+    return {name: STALL_FIELDS[name][1](biz, minute) for name in names}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parses a comma-separated `fields=` value. `id` is always included (it is the page cursor)."""
+    if not fields:
+        return None
+    names = ["id"]
+    for name in (f.strip() for f in fields.split(",")):
+        if not name or name in names:
+            continue
+        if name not in STALL_FIELDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown field '{name}'. Valid fields: {', '.join(STALL_FIELDS)}",
+            )
+        names.append(name)
+    return names
+
+def _columns_for(fields: List[str]):
+    columns = []
+    for name in fields:
+        for col in STALL_FIELDS[name][0]:
+            if not any(col is c for c in columns):
+                columns.append(col)
+    return columns
+
+def stall_select(fields: List[str]):
+    """Column-only SELECT for the given DTO fields, joining the rating aggregates only when needed."""
+    columns = _columns_for(fields)
+    stmt = select(*columns).select_from(Business.__table__)
+    if any(col.table is _agg for col in columns):
+        stmt = stmt.outerjoin(_agg, and_(_agg.c.target_type == "business", _agg.c.target_id == _cols.id))
+    return stmt
+
+async def schedule_minute(db: AsyncSession, at: Optional[datetime] = None) -> int:
+    """Makes sure the schedule index is loaded and returns `at` (default: now) as an SG minute of the week."""
+    # The index (re)load is sync ORM code; run_sync runs it on the event loop thread, once per TTL
+    await db.run_sync(open_hours_index.ensure_loaded)
+    return open_hours_index.minute_of_week(at or now_sg())
 
 # @router.get("/", response_model=list[dict])
 # def get_all_stalls(db: Session = Depends(get_db)):
@@ -102,22 +143,69 @@ def business_to_dto(biz: Business, db: Session):
 #     return [business_to_dto(b, db) for b in stalls]
 
 @router.get("/", response_model=list[dict])
-def get_all_stalls(db: Session = Depends(get_db)):
-    """Return all stalls, optimized using eager loading."""
+async def get_all_stalls(
+    response: Response,
+    after_id: Optional[int] = Query(None, description="Keyset cursor: only return stalls with id greater than this"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size. Omit to return every stall."),
+    fields: Optional[str] = Query(None, description="Comma-separated DTO fields to return, e.g. id,stall_name,is_open"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Return stalls ordered by id, optionally one keyset page at a time.
     
-    # OPTIMIZATION: Use joinedload to fetch OperatingHour data for all stalls
-    # in a single, efficient query.
-    stalls = db.query(Business).options(
-        joinedload(Business.operating_hours)
-    ).all()
+    Only the columns needed for the requested `fields` are selected, and
+    open/closed comes from the schedule index, so the cost of a request is
+    bounded by the page size rather than by the size of the catalogue.
+    When a full page is returned, `X-Next-After-Id` holds the next cursor.
+    """
+    names = parse_fields(fields) or list(STALL_FIELDS)
+
+    stmt = stall_select(names).order_by(_cols.id)
+    if after_id is not None:
+        stmt = stmt.where(_cols.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = (await db.execute(stmt)).all()
+
+    # OPTIMIZATION: "now" is converted to a minute of the week once for the whole page.
+    minute = await schedule_minute(db)
     
-    return [business_to_dto(b, db) for b in stalls]
+    if limit is not None and len(rows) == limit:
+        response.headers["X-Next-After-Id"] = str(rows[-1].id)
+    return [business_to_dto(r, minute, names) for r in rows]
+
+@router.get("/open", response_model=list[dict])
+async def get_open_stalls(
+    at: Optional[datetime] = Query(None, description="Time to check (ISO 8601). Naive values are SG time. Defaults to now."),
+    hawker_centre: Optional[str] = Query(None, description="Only return stalls in this hawker centre"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Return only the stalls that are open at the given time.
+    
+    The set of open stalls is resolved entirely from the in-memory schedule
+    index; the database is only asked for the rows that are actually open.
+    """
+    if at is None:
+        at = now_sg()
+    elif at.tzinfo is None:
+        at = SG_TZ.localize(at)
+    else:
+        at = at.astimezone(SG_TZ)
+
+    minute = await schedule_minute(db, at)
+    ids = open_hours_index.open_business_ids(minute, hawker_centre)
+    if not ids:
+        return []
+
+    names = list(STALL_FIELDS)
+    stalls = (await db.execute(stall_select(names).where(_cols.id.in_(ids)).order_by(_cols.id))).all()
+    return [business_to_dto(b, minute, names) for b in stalls]
 
 @router.get("/{stall_id}", response_model=dict)
-def get_stall_by_id(stall_id: int, db: Session = Depends(get_db)):
-    biz = db.query(Business).filter(Business.id == stall_id).first()
+async def get_stall_by_id(stall_id: int, db: AsyncSession = Depends(get_async_db)):
+    names = list(STALL_FIELDS)
+    biz = (await db.execute(stall_select(names).where(_cols.id == stall_id))).first()
     if not biz:
         raise HTTPException(status_code=404, detail="Stall not found")
-    return business_to_dto(biz, db)
+    return business_to_dto(biz, await schedule_minute(db), names)
 
 # http://127.0.0.1:8001/stalls/?profile=true
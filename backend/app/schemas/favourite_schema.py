@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator, ConfigDict
-from typing import Literal, Optional
+from pydantic import BaseModel, Field, field_validator, ConfigDict
+from typing import List, Literal, Optional
 from datetime import datetime
 
 TargetType = Literal["business", "hawkercentre", "stall"]
@@ -8,6 +8,10 @@ class FavouriteIn(BaseModel):
     target_type: TargetType
     target_id: int
 
+class FavouriteBatchIn(BaseModel):
+    # One list page's worth of cards per request
+    targets: List[FavouriteIn] = Field(..., min_length=1, max_length=200)
+
 class FavouriteOut(BaseModel):
     model_config = ConfigDict(from_attributes=True) 
 
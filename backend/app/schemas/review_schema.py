@@ -32,6 +32,7 @@ class ReviewOut(BaseModel):
     star_rating: int
     description: str
     images: List[str]
+    status: str = "published"
     created_at: datetime
     updated_at: datetime
 
@@ -45,3 +46,13 @@ class ReviewOut(BaseModel):
         
         # If it's already a list (e.g., if passed directly), or None, return as is
         return v if isinstance(v, list) else []
+
+class ReviewStatusOut(BaseModel):
+    """Moderation state of a submitted review, for clients polling after a 202."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: Literal["pending", "published", "rejected"]
+    moderation_code: Optional[str] = None
+    reason: Optional[str] = None  # shown to the author when rejected
+    moderated_at: Optional[datetime] = None
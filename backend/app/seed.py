@@ -0,0 +1,240 @@
+"""
+Database setup and SFA seeding, run once per schema/seed version.
+
+Creating tables, migrating, seeding the SFA data and backfilling rating
+aggregates used to run synchronously in every worker's startup hook. It now
+runs as a one-shot job:
+
+    python -m app.seed [--force]
+    python -m app.seed --rebuild-ratings   # repair: recompute rating aggregates from reviews
+
+or from startup according to SEED_ON_STARTUP:
+
+    check (default)  check the version marker; if it is behind, bring the schema up to date
+                     (create_all + migrations) before serving, then seed the data in a
+                     background thread
+    background       check the version marker; if it is behind, do all of the setup in a
+                     background thread. Requests may hit columns that are not there yet
+                     until it finishes, so only use it when the schema has not changed.
+    off              skip the check entirely
+
+The seed_state row records the last SEED_VERSION completed, so an up-to-date
+database costs startup one small query. Bump SEED_VERSION whenever the schema
+or seed data changes. The job is claimed with a conditional UPDATE, so with
+several workers (or a worker and the CLI) exactly one process runs it; a
+claim older than SEED_LOCK_TIMEOUT_SECONDS is treated as abandoned.
+"""
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import inspect, insert, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.database import Base, engine as default_engine
+
+# Import models here so Base knows about them when calling create_all
+from app.models import (  # noqa: F401
+    user_model,
+    consumer_model,
+    favourite_model,
+    review_model,
+    hawker_centre_model,
+    business_model,
+    operating_hour_model,
+    menu_item_model,
+    rating_aggregate_model,
+    seed_state_model,
+)
+from app.models.seed_state_model import SeedState
+
+# Bump when the schema or the seed data changes, so existing databases are set up again
+SEED_VERSION = 3  # 2: reviews.status / moderation columns; 3: reviews.moderation_claimed_at
+
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "check").lower()
+SEED_LOCK_TIMEOUT_SECONDS = int(os.getenv("SEED_LOCK_TIMEOUT_SECONDS", "1800"))
+
+JOB_NAME = "sfa"
+
+# Path to the index.json file (from app/seed.py -> ../SFA/index.json)
+INDEX_JSON_PATH = os.path.join(os.path.dirname(__file__), "..", "SFA", "index.json")
+
+def _owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def seed_version(bind: Engine = default_engine) -> Optional[int]:
+    """The last SEED_VERSION completed against this database, or None if it was never set up."""
+    if not inspect(bind).has_table(SeedState.__tablename__):
+        return None
+    with bind.connect() as conn:
+        return conn.scalar(select(SeedState.version).where(SeedState.name == JOB_NAME))
+
+def is_current(bind: Engine = default_engine) -> bool:
+    return seed_version(bind) == SEED_VERSION
+
+def claim(bind: Engine, owner: str) -> bool:
+    """Marks the job as running for `owner`. False if another live process holds it."""
+    try:
+        SeedState.__table__.create(bind, checkfirst=True)
+    except DBAPIError:
+        # Another process created it between the check and the CREATE
+        if not inspect(bind).has_table(SeedState.__tablename__):
+            raise
+    try:
+        with bind.begin() as conn:
+            conn.execute(insert(SeedState).values(name=JOB_NAME, status="idle"))
+    except IntegrityError:
+        pass  # row already exists
+
+    now = datetime.now()
+    with bind.begin() as conn:
+        result = conn.execute(
+            update(SeedState)
+            .where(
+                SeedState.name == JOB_NAME,
+                or_(
+                    SeedState.status != "running",
+                    SeedState.claimed_at < now - timedelta(seconds=SEED_LOCK_TIMEOUT_SECONDS),
+                ),
+            )
+            .values(status="running", claimed_by=owner, claimed_at=now)
+        )
+        return result.rowcount == 1
+
+def release(bind: Engine, owner: str, status: str, version: Optional[int] = None) -> None:
+    """Ends `owner`'s claim with the given status, recording `version` when one is given."""
+    values = {"status": status, "completed_at": datetime.now()}
+    if version is not None:
+        values["version"] = version
+    with bind.begin() as conn:
+        conn.execute(
+            update(SeedState)
+            .where(SeedState.name == JOB_NAME, SeedState.claimed_by == owner)
+            .values(**values)
+        )
+
+def ensure_schema(bind: Engine, attempts: int = 3) -> None:
+    """
+    Creates missing tables, columns and indexes. Idempotent, so several
+    workers may run it at once: one that loses a race to another's DDL
+    (e.g. "duplicate column") simply checks again.
+    """
+    from app.migrations import ensure_columns, ensure_indexes
+
+    for attempt in range(1, attempts + 1):
+        try:
+            print("Running database table creation...")
+            Base.metadata.create_all(bind=bind)
+            # create_all skips existing tables, so add columns and indexes declared since the DB was created
+            added = ensure_columns(bind)
+            if added:
+                print(f"Added missing columns: {', '.join(added)}")
+            created = ensure_indexes(bind)
+            if created:
+                print(f"Created missing indexes: {', '.join(created)}")
+            print("Database tables ensured.")
+            return
+        except DBAPIError:
+            if attempt == attempts:
+                raise
+            time.sleep(0.1 * attempt)
+
+def set_up_database(bind: Engine, index_file_path: str = INDEX_JSON_PATH) -> None:
+    """
+    Creates/migrates the schema, seeds the SFA data if empty, backfills rating
+    aggregates and fetches a missing planning-area boundary file (when
+    PLANNING_AREA_FETCH_ON_STARTUP is on). Idempotent.
+    """
+    from app.assets.database_seed.seed_db import seed_sfa_data_if_empty
+    from app.controllers.review_controller import ensure_rating_aggregates
+    from app.services import hawker_geo_index, planning_area_index
+
+    ensure_schema(bind)
+
+    with Session(bind) as db:
+        seed_sfa_data_if_empty(db, index_file_path)
+        # Backfill review aggregates for databases created before the table existed
+        ensure_rating_aggregates(db)
+        # Build the nearest-hawker index from the (possibly just seeded) table
+        hawker_geo_index.rebuild(db)
+
+    # Here rather than in every worker's startup: only the claim holder downloads it
+    planning_area_index.fetch_if_missing()
+
+def run_seed(bind: Engine = default_engine, index_file_path: str = INDEX_JSON_PATH, force: bool = False) -> bool:
+    """Sets up the database unless it is already at SEED_VERSION or another process is doing it. True if this call did the work."""
+    if not force and is_current(bind):
+        print(f"Database is up to date (seed version {SEED_VERSION}).")
+        return False
+
+    owner = _owner()
+    if not claim(bind, owner):
+        print("Database setup is already running in another process. Skipping.")
+        return False
+    try:
+        # Another process may have finished between our check and the claim
+        if not force and is_current(bind):
+            release(bind, owner, "done")
+            return False
+        set_up_database(bind, index_file_path)
+    except BaseException:
+        release(bind, owner, "failed")
+        raise
+    release(bind, owner, "done", SEED_VERSION)
+    return True
+
+def startup(mode: str = SEED_ON_STARTUP, on_ready: Optional[Callable[[], None]] = None) -> Optional[threading.Thread]:
+    """
+    Startup hook: checks the version marker and, depending on `mode`, brings
+    the schema up to date before returning and sets up the rest of the
+    database in a background thread (returned). `on_ready` runs once the
+    database is current.
+    """
+    if mode == "off":
+        return None
+    if is_current(default_engine):
+        if on_ready:
+            on_ready()
+        return None
+    if mode not in ("check", "background"):
+        raise ValueError(f"Unknown SEED_ON_STARTUP mode: {mode!r} (expected check, background or off)")
+    if mode == "check":
+        # Before serving: requests must not reach columns the code expects but the database lacks
+        ensure_schema(default_engine)
+
+    def run():
+        try:
+            if run_seed(default_engine) and on_ready:
+                on_ready()
+        except Exception as e:
+            # Logged only; the app keeps serving
+            print(f"Error during background database setup: {e}")
+
+    thread = threading.Thread(target=run, name="app-seed", daemon=True)
+    thread.start()
+    return thread
+
+def main():
+    started = time.perf_counter()
+    if "--rebuild-ratings" in sys.argv[1:]:
+        from app.controllers.review_controller import rebuild_rating_aggregates
+        with Session(default_engine) as db:
+            count = rebuild_rating_aggregates(db)
+        print(f"Rebuilt rating aggregates for {count} targets in {time.perf_counter() - started:.1f}s.")
+        return
+    ran = run_seed(force="--force" in sys.argv[1:])
+    if ran:
+        print(f"Database set up to seed version {SEED_VERSION} in {time.perf_counter() - started:.1f}s.")
+    else:
+        # set_up_database did not run, so fetch the boundary file here if it is missing
+        from app.services import planning_area_index
+        planning_area_index.fetch_if_missing()
+
+if __name__ == "__main__":
+    main()
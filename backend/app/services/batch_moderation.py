@@ -0,0 +1,260 @@
+"""
+Batch moderation for review backlogs (imports, re-moderation after a policy change).
+
+guard_review_text classifies one review per LLM call. For a backlog this module:
+
+  - screens every review first (empty/too long, local tier, verdict cache),
+    and classifies each distinct normalised text only once
+  - packs up to REVIEW_BATCH_SIZE reviews into one request, each tagged with
+    its index ("[3] ..."), and reads one "[3] LABEL" line back per review
+  - runs up to REVIEW_BATCH_CONCURRENCY requests at once, started at no more
+    than REVIEW_BATCH_REQUESTS_PER_SECOND; 429s/5xx are retried by the SDK
+  - retries reviews whose label is missing or garbled in a smaller batch,
+    then gives them an llm_error verdict
+  - writes the verdicts back with one executemany UPDATE
+    (review_controller.apply_moderation_verdicts)
+
+Run against the database (from backend/):
+
+    python -m app.services.batch_moderation [--scope pending|all] [--no-cache] [--no-local] [--dry-run]
+
+After a policy change use --no-cache: it skips both the verdict cache and
+the local tier, which were trained/filled under the old policy.
+
+The OpenAI SDK reads OPENAI_BASE_URL, so pointing it at a local stand-in
+(benchmarks/openai_stub.py) runs the whole pipeline offline.
+"""
+import argparse
+import asyncio
+import os
+import re
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services import review_guard
+from app.services.verdict_cache import cache_key, normalise
+
+REVIEW_BATCH_SIZE = int(os.getenv("REVIEW_BATCH_SIZE", "20"))
+REVIEW_BATCH_CONCURRENCY = int(os.getenv("REVIEW_BATCH_CONCURRENCY", "4"))
+REVIEW_BATCH_REQUESTS_PER_SECOND = float(os.getenv("REVIEW_BATCH_REQUESTS_PER_SECOND", "5"))
+REVIEW_BATCH_MAX_RETRIES = int(os.getenv("REVIEW_BATCH_MAX_RETRIES", "3"))
+
+LABELS = ("CONSTRUCTIVE", "NON_CONSTRUCTIVE_RUDE", "POLICY_VIOLATION", "OTHER")
+BATCH_LINE_RE = re.compile(r"^\s*\[?(\d+)\]?\s*[:.)-]?\s*(" + "|".join(LABELS) + r")\b", re.I | re.M)
+
+BATCH_INSTRUCTIONS = (
+    "You will receive several reviews, one per line, each starting with its index in square brackets.\n"
+    "Classify every review independently. Respond with one line per review, in the form "
+    "[index] LABEL, using exactly one of these labels: " + ", ".join(LABELS) + ".\n"
+    + review_guard.LABEL_DEFINITIONS +
+    "Output MUST be only those lines, one per review, with no extra words."
+)
+
+class BatchStats(NamedTuple):
+    texts: int          # reviews passed in
+    screened: int       # decided without a request (local tier, cache, empty/too long)
+    duplicates: int     # same normalised text as another review in the backlog
+    classified: int     # distinct texts sent to the LLM
+    requests: int
+    errors: int         # texts still without a label after every attempt
+    seconds: float
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, in bursts of up to `burst`. rate <= 0 disables it."""
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def get_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=REVIEW_BATCH_MAX_RETRIES)
+
+def pack(texts: Sequence[str]) -> str:
+    # One review per line, so a newline inside a review cannot pose as another index
+    return "\n".join(f"[{i}] {' '.join(text.split())}" for i, text in enumerate(texts, start=1))
+
+def parse_labels(output: str, count: int) -> List[Optional[str]]:
+    """Label per packed review; None where it is missing, out of range or answered twice differently."""
+    labels: List[Optional[str]] = [None] * count
+    conflicting = set()
+    for index, label in BATCH_LINE_RE.findall(output or ""):
+        i = int(index) - 1
+        if not 0 <= i < count:
+            continue
+        if labels[i] is not None and labels[i] != label.upper():
+            conflicting.add(i)
+        labels[i] = label.upper()
+    for i in conflicting:
+        labels[i] = None
+    return labels
+
+async def classify_batch(client, texts: Sequence[str]) -> List[Optional[review_guard.GuardVerdict]]:
+    """Classifies `texts` in one request. None for each review the answer did not label."""
+    try:
+        resp = await client.responses.create(
+            model=review_guard.CLASSIFIER_MODEL,
+            temperature=0,
+            input=[
+                {"role": "system", "content": BATCH_INSTRUCTIONS},
+                {"role": "user", "content": pack(texts)},
+            ],
+        )
+    except Exception as e:
+        print(f"[batch_moderation] Batch of {len(texts)} failed: {e}")
+        return [None] * len(texts)
+    labels = parse_labels(review_guard._extract_text_from_responses(resp), len(texts))
+    return [review_guard.verdict_for_label(label) if label else None for label in labels]
+
+async def classify_texts(
+    texts: Sequence[str],
+    batch_size: int = REVIEW_BATCH_SIZE,
+    concurrency: int = REVIEW_BATCH_CONCURRENCY,
+    requests_per_second: float = REVIEW_BATCH_REQUESTS_PER_SECOND,
+    use_cache: bool = True,
+    use_local_tier: bool = True,
+    client=None,
+) -> Tuple[List[review_guard.GuardVerdict], BatchStats]:
+    """Verdicts for `texts`, in order, classifying as few distinct texts in as few requests as possible."""
+    started = time.perf_counter()
+    verdicts: List[Optional[review_guard.GuardVerdict]] = [None] * len(texts)
+    positions: Dict[str, List[int]] = {}  # normalised text -> indexes still needing a verdict
+    originals: Dict[str, str] = {}
+    screened = 0
+    for i, description in enumerate(texts):
+        text = review_guard._trim(description)
+        verdict = review_guard.screen(text, use_cache=use_cache, use_local_tier=use_local_tier)
+        if verdict is not None:
+            verdicts[i] = verdict
+            screened += 1
+            continue
+        key = normalise(text)
+        positions.setdefault(key, []).append(i)
+        originals.setdefault(key, text)
+
+    own_client = client is None
+    if own_client and positions:
+        client = get_async_client()
+    limiter = RateLimiter(requests_per_second)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    requests = 0
+
+    async def run(keys: List[str]) -> None:
+        nonlocal requests
+        async with semaphore:
+            await limiter.acquire()
+            requests += 1
+            results = await classify_batch(client, [originals[k] for k in keys])
+        for key, verdict in zip(keys, results):
+            if verdict is None:
+                continue
+            review_guard.verdict_cache.put(cache_key(originals[key], review_guard.CLASSIFIER_MODEL), verdict)
+            for i in positions.pop(key):
+                verdicts[i] = dict(verdict)
+
+    try:
+        # First pass in full batches; whatever came back unlabelled is retried in smaller ones
+        size = max(batch_size, 1)
+        for _ in range(2):
+            pending = list(positions)
+            if not pending:
+                break
+            await asyncio.gather(*(run(pending[i:i + size]) for i in range(0, len(pending), size)))
+            size = max(size // 4, 1)
+    finally:
+        if own_client and client is not None:
+            await client.close()
+
+    errors = len(positions)
+    for indexes in positions.values():
+        for i in indexes:
+            # Always an error verdict here (not FAIL_CLOSED's pass), so callers can skip these
+            verdicts[i] = {"ok": False, "code": "llm_error", "reason": review_guard.BOUNCE_MSG}
+
+    classified = len(originals)
+    stats = BatchStats(
+        texts=len(texts), screened=screened, duplicates=len(texts) - screened - classified,
+        classified=classified, requests=requests, errors=errors, seconds=time.perf_counter() - started,
+    )
+    return verdicts, stats
+
+class BacklogReport(NamedTuple):
+    stats: BatchStats
+    counts: Dict[str, int]  # from apply_moderation_verdicts; empty on a dry run
+
+def moderate_backlog(db, scope: str = "pending", dry_run: bool = False, **options) -> BacklogReport:
+    """
+    Classifies the reviews in `scope` ("pending", or "all" reviews with a
+    description) and writes the verdicts back. Reviews whose text changed
+    while they were being classified keep their newer state.
+    """
+    from app.controllers.review_controller import apply_moderation_verdicts
+    from app.models.review_model import Review, PENDING
+
+    query = db.query(Review.id, Review.description).filter(Review.description.isnot(None), Review.description != "")
+    if scope == "pending":
+        query = query.filter(Review.status == PENDING)
+    elif scope != "all":
+        raise ValueError(f"Unknown scope: {scope!r} (expected pending or all)")
+    rows = query.order_by(Review.id).all()
+    db.rollback()  # don't hold a read transaction open while the LLM works
+
+    verdicts, stats = asyncio.run(classify_texts([description for _, description in rows], **options))
+    if dry_run:
+        return BacklogReport(stats, {})
+    results = [(review_id, description, verdict) for (review_id, description), verdict in zip(rows, verdicts)
+               if verdict["code"] != "llm_error"]
+    return BacklogReport(stats, apply_moderation_verdicts(db, results))
+
+def print_report(report: BacklogReport, dry_run: bool = False) -> None:
+    s = report.stats
+    print(f"{s.texts} reviews: {s.screened} decided without the LLM, {s.duplicates} duplicate texts, "
+          f"{s.classified} classified in {s.requests} requests ({s.errors} failed) in {s.seconds:.1f}s.")
+    if dry_run:
+        print("Dry run: nothing written.")
+    elif report.counts:
+        print(", ".join(f"{count} {name}" for name, count in report.counts.items()) + ".")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Moderate a backlog of reviews in batched LLM requests.")
+    parser.add_argument("--scope", choices=["pending", "all"], default="pending",
+                        help="pending reviews only (default), or re-moderate every review with a description")
+    parser.add_argument("--batch-size", type=int, default=REVIEW_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=REVIEW_BATCH_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=REVIEW_BATCH_REQUESTS_PER_SECOND, help="requests per second")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore cached verdicts and the local tier (e.g. after a policy change)")
+    parser.add_argument("--no-local", action="store_true", help="send reviews the local tier would decide to the LLM too")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        report = moderate_backlog(
+            db, scope=args.scope, dry_run=args.dry_run, batch_size=args.batch_size, concurrency=args.concurrency,
+            requests_per_second=args.rate, use_cache=not args.no_cache,
+            use_local_tier=not (args.no_cache or args.no_local),
+        )
+    finally:
+        db.close()
+    print_report(report, args.dry_run)
+
+if __name__ == "__main__":
+    main()
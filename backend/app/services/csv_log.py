@@ -0,0 +1,352 @@
+"""
+CSV snapshot plus an append-only CSV log of changes, for the file-backed stores.
+
+  <name>.csv   snapshot: a header and one row per live record
+  <name>.log   write-ahead log of changes since the snapshot, one per line:
+               an op column ("+" upsert, "-" tombstone) then the snapshot columns
+  <name>.lock  flock()ed by every reader (shared) and writer (exclusive)
+
+Writers append a change instead of rewriting the file; a change is on disk
+(fsynced, unless FILE_STORE_FSYNC=false) before the write returns. Readers
+keep their own in-memory index and call read_changes() before using it,
+which only parses what was appended since their last call; the files stay
+the source of truth, so every uvicorn worker sees the others' writes.
+
+LogStructuredStore holds what the stores share: the index lock, catching
+up under the file lock, group commit (concurrent writers in a process
+queue up and the first one appends the whole group with one write and one
+fsync) and compaction, which folds the log back into the snapshot.
+Subclasses' _apply() must be idempotent, since a reader can see a change
+again across a compaction.
+
+Without fcntl (Windows) there is no cross-process locking: run one worker.
+"""
+import csv
+import io
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+FILE_STORE_FSYNC = os.getenv("FILE_STORE_FSYNC", "true").lower() in ("1", "true", "yes")
+
+UPSERT, TOMBSTONE = "+", "-"
+
+Change = Tuple[str, Dict[str, str]]
+
+class LogMark(NamedTuple):
+    log: BinaryIO   # the log as of the mark, held open (see CsvLog._log)
+    offset: int
+
+class CsvLog:
+    def __init__(self, snapshot_path: str, fields: Sequence[str]):
+        self.snapshot_path = snapshot_path
+        base = os.path.splitext(snapshot_path)[0]
+        self.log_path = base + ".log"
+        self.lock_path = base + ".lock"
+        self.fields = list(fields)
+        self.log_records = 0            # changes in the log file, as of the last read
+        self.appends = 0                # append() calls by this instance (one per group commit)
+        # The log last read, kept open so its inode cannot be reused by a
+        # later log while we still compare against it
+        self._log: Optional[BinaryIO] = None
+        self._offset = 0                # bytes of the log already read
+        self._lock_fd: Optional[int] = None
+
+    @contextmanager
+    def locked(self, exclusive: bool) -> Iterator[None]:
+        """
+        Cross-process lock on the files. flock() does not exclude threads
+        sharing this instance, so callers serialise their own threads.
+        """
+        if fcntl is None:
+            yield
+            return
+        if self._lock_fd is None:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _temp_path(self, path: str) -> str:
+        # Unique per writer, so two processes compacting at once cannot clobber each other's file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+        os.close(fd)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600
+        return tmp
+
+    def _write_rows(self, path: str, header: Sequence[str], rows: Iterable[Sequence[str]] = ()) -> str:
+        tmp = self._temp_path(path)
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header)
+            writer.writerows(rows)
+        return tmp
+
+    def _ensure_files(self) -> None:
+        # Safe under the shared lock: a concurrent creator writes the same empty file
+        if not os.path.exists(self.snapshot_path):
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            os.replace(self._write_rows(self.snapshot_path, self.fields), self.snapshot_path)
+        if not os.path.exists(self.log_path):
+            os.replace(self._write_rows(self.log_path, ["op", *self.fields]), self.log_path)
+
+    def _parse(self, data: bytes) -> List[Change]:
+        changes = []
+        for values in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+            changes.append((values[0], dict(zip(self.fields, values[1:]))))
+        return changes
+
+    def read_changes(self) -> Tuple[bool, List[Change]]:
+        """
+        Changes appended since the last call (hold the lock, shared or
+        exclusive). When the first item is True the files were replaced
+        (first call, or a compaction by another instance): the caller must
+        clear its index, and the changes start with every snapshot row as an upsert.
+        """
+        self._ensure_files()
+        reset = not self._is_current(self._log)
+        changes: List[Change] = []
+        if reset:
+            self.forget()
+            # Snapshot and log are replaced together under the exclusive lock, so this pair matches
+            self._log = open(self.log_path, "rb")
+            with open(self.snapshot_path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, self.fields)
+                changes = [(UPSERT, dict(zip(header, values))) for values in reader]
+            self._offset, self.log_records = 0, 0
+
+        size = os.fstat(self._log.fileno()).st_size
+        if size > self._offset:
+            self._log.seek(self._offset)
+            data = self._log.read(size - self._offset)
+            if self._offset == 0:
+                data = data[data.index(b"\n") + 1:]  # header
+            self._offset = size
+            appended = self._parse(data)
+            self.log_records += len(appended)
+            changes += appended
+        return reset, changes
+
+    def append(self, changes: Sequence[Change]) -> None:
+        """
+        Appends `changes` with one write and one fsync. Hold the exclusive
+        lock and be caught up (read_changes()): the changes count as read,
+        so the caller applies them to its index itself.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        for op, row in changes:
+            writer.writerow([op, *(row.get(field, "") for field in self.fields)])
+        data = buffer.getvalue().encode("utf-8")
+        with open(self.log_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            if FILE_STORE_FSYNC:
+                os.fsync(f.fileno())
+        self._offset += len(data)
+        self.log_records += len(changes)
+        self.appends += 1
+
+    def _is_current(self, log: Optional[BinaryIO]) -> bool:
+        if log is None:
+            return False
+        held, current = os.fstat(log.fileno()), os.stat(self.log_path)
+        return (held.st_dev, held.st_ino) == (current.st_dev, current.st_ino)
+
+    def forget(self) -> None:
+        """Makes the next read_changes() start over from the snapshot."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def mark(self) -> LogMark:
+        """Position read up to, for compacting an index copied at this point (see install_snapshot)."""
+        return LogMark(os.fdopen(os.dup(self._log.fileno()), "rb"), self._offset)
+
+    def prepare_snapshot(self, rows: Iterable[Dict[str, str]]) -> str:
+        """Writes `rows` to a temporary snapshot file and returns its path. Needs no lock."""
+        tmp = self._write_rows(self.snapshot_path, self.fields, ([row.get(f, "") for f in self.fields] for row in rows))
+        if FILE_STORE_FSYNC:
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+        return tmp
+
+    def install_snapshot(self, prepared: str, mark: LogMark) -> bool:
+        """
+        Replaces the snapshot with `prepared`, which holds the index as of
+        `mark` (hold the exclusive lock). Changes logged after the mark are
+        carried over into the new log, so writes made while the snapshot was
+        being written survive. False (nothing changed) if the log was
+        replaced since the mark.
+        """
+        marked, offset = mark
+        with marked:
+            if not self._is_current(marked):
+                os.remove(prepared)
+                return False
+            marked.seek(offset)
+            tail = marked.read()
+            ours = self._log is not None and os.path.sameopenfile(self._log.fileno(), marked.fileno())
+        header = self._header_bytes()
+        tmp = self._temp_path(self.log_path)
+        with open(tmp, "wb") as f:
+            f.write(header + tail)
+            if FILE_STORE_FSYNC:
+                os.fsync(f.fileno())
+        os.replace(prepared, self.snapshot_path)
+        os.replace(tmp, self.log_path)
+
+        read_of_tail = max(self._offset - offset, 0) if ours else 0
+        self.forget()
+        self._log, self._offset = open(self.log_path, "rb"), len(header) + read_of_tail
+        self.log_records = len(self._parse(tail[:read_of_tail]))
+        return True
+
+    def _header_bytes(self) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(["op", *self.fields])
+        return buffer.getvalue().encode("utf-8")
+
+    def compact(self, rows: Iterable[Dict[str, str]]) -> bool:
+        """
+        Replaces the snapshot with `rows` (the caller's index, caught up with
+        read_changes()) and starts an empty log. Hold the exclusive lock.
+        """
+        return self.install_snapshot(self.prepare_snapshot(rows), self.mark())
+
+class _PendingWrite:
+    __slots__ = ("mutate", "result", "error", "done")
+
+    def __init__(self, mutate):
+        self.mutate = mutate
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+
+class LogStructuredStore:
+    """
+    In-memory index over a CsvLog. Subclasses implement _reset() (empty
+    index), _apply(op, row) (idempotent) and _snapshot_rows().
+    """
+    background_compaction = False
+
+    def __init__(self, path: str, fields: Sequence[str], compact_after: int):
+        self.log = CsvLog(path, fields)
+        self.compact_after = compact_after
+        self._lock = threading.Lock()            # the index, and this instance's use of the file lock
+        self._group = threading.Condition()      # queue of writes waiting for a group commit
+        self._queue: List[_PendingWrite] = []
+        self._committing = False
+        self._compaction: Optional[threading.Thread] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+    def _apply(self, op: str, row: Dict[str, str]) -> None:
+        raise NotImplementedError
+
+    def _snapshot_rows(self) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def _sync(self) -> None:
+        reset, changes = self.log.read_changes()
+        if reset:
+            self._reset()
+        for op, row in changes:
+            self._apply(op, row)
+
+    @contextmanager
+    def _reading(self) -> Iterator[None]:
+        """Holds the index, caught up with every process's writes."""
+        with self._lock, self.log.locked(exclusive=False):
+            self._sync()
+            yield
+
+    def _commit(self, mutate: Callable[[], Tuple[List[Change], Any]]) -> Any:
+        """
+        Runs `mutate` against the caught-up index, appends the changes it
+        returns and returns its result. Writers that arrive while a commit
+        is in progress are grouped: the next leader runs all their mutations
+        under one exclusive lock and appends them with one write and fsync.
+        """
+        pending = _PendingWrite(mutate)
+        with self._group:
+            self._queue.append(pending)
+            while self._committing and not pending.done:
+                self._group.wait()
+            if pending.done:
+                if pending.error is not None:
+                    raise pending.error
+                return pending.result
+            self._committing = True
+            batch, self._queue = self._queue, []
+
+        try:
+            with self._lock, self.log.locked(exclusive=True):
+                self._sync()
+                changes: List[Change] = []
+                for write in batch:
+                    try:
+                        write_changes, write.result = write.mutate()
+                    except Exception as e:
+                        write.error = e
+                        continue
+                    # Applied now, so later writes in the group see them
+                    for op, row in write_changes:
+                        self._apply(op, row)
+                    changes += write_changes
+                if changes:
+                    self.log.append(changes)
+                if self.log.log_records >= self.compact_after and not self.background_compaction:
+                    self.log.compact(self._snapshot_rows())
+        except BaseException as e:
+            # The index may hold changes that never reached the file: rebuild it on the next read
+            self.log.forget()
+            for write in batch:
+                if write.error is None:
+                    write.error = e
+        finally:
+            with self._group:
+                for write in batch:
+                    write.done = True
+                self._committing = False
+                self._group.notify_all()
+
+        if self.background_compaction and self.log.log_records >= self.compact_after:
+            with self._group:
+                compaction = None
+                if self._compaction is None:
+                    compaction = self._compaction = threading.Thread(target=self.compact, name="store-compaction", daemon=True)
+            if compaction is not None:
+                compaction.start()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def compact(self) -> None:
+        """Folds the log into the snapshot. The snapshot is written without holding the locks."""
+        try:
+            with self._reading():
+                rows, mark = self._snapshot_rows(), self.log.mark()
+            prepared = self.log.prepare_snapshot(rows)
+            with self._lock, self.log.locked(exclusive=True):
+                self.log.install_snapshot(prepared, mark)
+        finally:
+            self._compaction = None
+
+    def wait_for_compaction(self) -> None:
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
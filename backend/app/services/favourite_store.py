@@ -1,59 +1,86 @@
-import csv, os
+"""
+File-backed favourites: favourites.csv plus an append-only change log (see csv_log).
+
+Lookups are answered from an in-memory hash index keyed by consumer and
+then (target_type, target_id); adds append one record and removes append a
+tombstone, so neither reads nor writes depend on the file size. Once the
+log holds FAVOURITE_COMPACT_AFTER changes it is folded back into
+favourites.csv. Safe to share between processes (see csv_log).
+"""
+import os
 from datetime import datetime
-from typing import List, Dict
+from typing import Dict, List, Tuple
+
+from app.services.csv_log import LogStructuredStore, TOMBSTONE, UPSERT
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "data")
 FAV_CSV = os.path.join(DATA_DIR, "favourites.csv")
 CSV_HEADERS = ["consumer_id", "target_type", "target_id", "created_at"]
 
-os.makedirs(DATA_DIR, exist_ok=True)
-if not os.path.exists(FAV_CSV):
-    with open(FAV_CSV, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-        writer.writeheader()
-
-def _read_all() -> List[Dict[str, str]]:
-    with open(FAV_CSV, "r", newline="", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
-
-def _write_all(rows: List[Dict[str, str]]) -> None:
-    tmp = FAV_CSV + ".tmp"
-    with open(tmp, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-        writer.writeheader()
-        for r in rows:
-            writer.writerow(r)
-    os.replace(tmp, FAV_CSV)
+FAVOURITE_COMPACT_AFTER = int(os.getenv("FAVOURITE_COMPACT_AFTER", "1000"))
+
+class FavouriteStore(LogStructuredStore):
+    def __init__(self, path: str = FAV_CSV, compact_after: int = FAVOURITE_COMPACT_AFTER):
+        super().__init__(path, CSV_HEADERS, compact_after)
+
+    def _reset(self) -> None:
+        # consumer_id -> (target_type, target_id) -> row, in the order favourites were added
+        self._index: Dict[str, Dict[Tuple[str, str], Dict[str, str]]] = {}
+
+    def _apply(self, op: str, row: Dict[str, str]) -> None:
+        cid, key = row["consumer_id"], (row["target_type"], row["target_id"])
+        if op == UPSERT:
+            self._index.setdefault(cid, {}).setdefault(key, row)
+        else:
+            favourites = self._index.get(cid)
+            if favourites is not None:
+                favourites.pop(key, None)
+                if not favourites:
+                    del self._index[cid]
+
+    def _snapshot_rows(self) -> List[Dict[str, str]]:
+        return [row for favourites in self._index.values() for row in favourites.values()]
+
+    def _contains(self, consumer_id: int, target_type: str, target_id: int) -> bool:
+        return (target_type, str(target_id)) in self._index.get(str(consumer_id), {})
+
+    def list_by_consumer(self, consumer_id: int) -> List[Dict[str, str]]:
+        with self._reading():
+            return [dict(r) for r in self._index.get(str(consumer_id), {}).values()]
+
+    def is_favourite(self, consumer_id: int, target_type: str, target_id: int) -> bool:
+        with self._reading():
+            return self._contains(consumer_id, target_type, target_id)
+
+    def add(self, consumer_id: int, target_type: str, target_id: int) -> bool:
+        def mutate():
+            if self._contains(consumer_id, target_type, target_id):
+                return [], False
+            return [(UPSERT, {
+                "consumer_id": str(consumer_id),
+                "target_type": target_type,
+                "target_id": str(target_id),
+                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            })], True
+        return self._commit(mutate)
+
+    def remove(self, consumer_id: int, target_type: str, target_id: int) -> bool:
+        def mutate():
+            if not self._contains(consumer_id, target_type, target_id):
+                return [], False
+            return [(TOMBSTONE, {"consumer_id": str(consumer_id), "target_type": target_type, "target_id": str(target_id)})], True
+        return self._commit(mutate)
+
+_store = FavouriteStore()
 
 def list_by_consumer(consumer_id: int) -> List[Dict[str, str]]:
-    cid = str(consumer_id)
-    return [r for r in _read_all() if r["consumer_id"] == cid]
+    return _store.list_by_consumer(consumer_id)
 
 def is_favourite(consumer_id: int, target_type: str, target_id: int) -> bool:
-    cid, tid = str(consumer_id), str(target_id)
-    for r in _read_all():
-        if r["consumer_id"] == cid and r["target_type"] == target_type and r["target_id"] == tid:
-            return True
-    return False
+    return _store.is_favourite(consumer_id, target_type, target_id)
 
 def add(consumer_id: int, target_type: str, target_id: int) -> bool:
-    if is_favourite(consumer_id, target_type, target_id):
-        return False
-    rows = _read_all()
-    rows.append({
-        "consumer_id": str(consumer_id),
-        "target_type": target_type,
-        "target_id": str(target_id),
-        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
-    })
-    _write_all(rows)
-    return True
+    return _store.add(consumer_id, target_type, target_id)
 
 def remove(consumer_id: int, target_type: str, target_id: int) -> bool:
-    cid, ttype, tid = str(consumer_id), target_type, str(target_id)
-    rows = _read_all()
-    new_rows = [r for r in rows if not (r["consumer_id"] == cid and r["target_type"] == ttype and r["target_id"] == tid)]
-    changed = len(new_rows) != len(rows)
-    if changed:
-        _write_all(new_rows)
-    return changed
+    return _store.remove(consumer_id, target_type, target_id)
@@ -0,0 +1,141 @@
+"""
+In-memory spatial index over the hawker_centres table for nearest-centre queries.
+
+Coordinates are held in NumPy arrays (radians, with cos(latitude)
+precomputed) and sorted by latitude. A radius query first narrows the
+candidates to the latitude band that can possibly be within range (two
+binary searches), then computes haversine distances for the whole band in
+one vectorised expression and picks the k closest with argpartition.
+
+There are only a few hundred hawker centres, so this beats a KD-tree
+(and needs nothing beyond NumPy) while still avoiding a table scan and
+serialising every centre on each request.
+
+NumPy is imported on the first build/query rather than with the module,
+to keep it out of API start-up. Async routes use ensure_loaded_async(),
+which runs the build in a worker thread instead of on the event loop.
+"""
+import asyncio
+import os
+import threading
+import time as _time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.hawker_centre_model import HawkerCentre
+
+if TYPE_CHECKING:
+    import numpy as np
+
+EARTH_RADIUS_M = 6_371_008.8
+
+INDEX_TTL_SECONDS = int(os.getenv("HAWKER_GEO_INDEX_TTL_SECONDS", "3600"))
+
+# Columns copied into each result, matching what GET /hawkers/ returns
+_ROW_FIELDS = ("id", "name", "address", "description", "image", "rating", "latitude", "longitude")
+
+_rows: List[Dict[str, Any]] = []      # sorted by latitude
+_lat_rad: "Optional[np.ndarray]" = None  # ascending
+_lng_rad: "Optional[np.ndarray]" = None
+_cos_lat: "Optional[np.ndarray]" = None
+_loaded_at: float = 0.0
+_lock = threading.Lock()
+
+def haversine_m(lat: float, lng: float, lat_rad: "np.ndarray", lng_rad: "np.ndarray", cos_lat: "np.ndarray") -> "np.ndarray":
+    """Great-circle distances in metres from one point (degrees) to many points (radians)."""
+    import numpy as np
+
+    phi = np.radians(lat)
+    lam = np.radians(lng)
+    a = np.sin((lat_rad - phi) / 2.0) ** 2 + np.cos(phi) * cos_lat * np.sin((lng_rad - lam) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def build(centres: List[Dict[str, Any]]) -> None:
+    """Replaces the index with the given centre dicts (must contain latitude/longitude)."""
+    global _rows, _lat_rad, _lng_rad, _cos_lat, _loaded_at
+    import numpy as np
+
+    valid = [c for c in centres if c.get("latitude") is not None and c.get("longitude") is not None]
+    valid.sort(key=lambda c: c["latitude"])
+
+    lat_rad = np.radians(np.array([c["latitude"] for c in valid], dtype=float))
+    lng_rad = np.radians(np.array([c["longitude"] for c in valid], dtype=float))
+
+    # Publish the arrays together so a concurrent query never mixes two builds
+    with _lock:
+        _rows = valid
+        _lat_rad = lat_rad
+        _lng_rad = lng_rad
+        _cos_lat = np.cos(lat_rad)
+        _loaded_at = _time.monotonic()
+
+def _centres_select():
+    return select(*[getattr(HawkerCentre, f) for f in _ROW_FIELDS])
+
+def rebuild(db: Session) -> None:
+    """Rebuilds the index from the hawker_centres table."""
+    build([dict(zip(_ROW_FIELDS, row)) for row in db.execute(_centres_select())])
+
+def is_stale() -> bool:
+    """True on first use, once the index is older than the TTL, or while it is still empty."""
+    # An empty index usually means the database was still being seeded, so keep retrying
+    return not (_loaded_at and _rows and _time.monotonic() - _loaded_at < INDEX_TTL_SECONDS)
+
+def ensure_loaded(db: Session) -> None:
+    """Builds the index on first use and rebuilds it when it is stale."""
+    if is_stale():
+        rebuild(db)
+
+async def ensure_loaded_async(db: AsyncSession) -> None:
+    """ensure_loaded for async sessions: the rows are awaited and the NumPy build runs in a worker thread."""
+    if not is_stale():
+        return
+    rows = (await db.execute(_centres_select())).all()
+    await asyncio.to_thread(build, [dict(zip(_ROW_FIELDS, row)) for row in rows])
+
+def invalidate() -> None:
+    """Forces a rebuild on the next ensure_loaded call, e.g. after hawker centres change."""
+    global _loaded_at
+    _loaded_at = 0.0
+
+def nearest(lat: float, lng: float, k: int = 5, radius_m: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Returns up to k hawker centres closest to (lat, lng), nearest first,
+    optionally limited to those within radius_m. Each result carries the
+    centre's columns plus `distance_m`.
+    """
+    with _lock:
+        rows, lat_rad, lng_rad, cos_lat = _rows, _lat_rad, _lng_rad, _cos_lat
+    if not rows:
+        return []
+    import numpy as np
+
+    lo, hi = 0, len(rows)
+    if radius_m is not None:
+        # Anything further than radius_m in latitude alone cannot be in range
+        band = radius_m / EARTH_RADIUS_M
+        phi = np.radians(lat)
+        lo = int(np.searchsorted(lat_rad, phi - band, side="left"))
+        hi = int(np.searchsorted(lat_rad, phi + band, side="right"))
+    if hi <= lo or k <= 0:
+        return []
+
+    dist = haversine_m(lat, lng, lat_rad[lo:hi], lng_rad[lo:hi], cos_lat[lo:hi])
+    candidates = np.arange(lo, hi)
+    if radius_m is not None:
+        in_range = dist <= radius_m
+        dist, candidates = dist[in_range], candidates[in_range]
+
+    k = min(k, len(dist))
+    if k == 0:
+        return []
+    top = np.argpartition(dist, k - 1)[:k]
+    top = top[np.argsort(dist[top])]
+
+    return [
+        {**rows[candidates[i]], "distance_m": round(float(dist[i]), 1)}
+        for i in top
+    ]
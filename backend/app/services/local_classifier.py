@@ -0,0 +1,274 @@
+"""
+Offline first tier of the review guard.
+
+Two parts, both loaded from app/assets/review_guard on first use:
+
+  matchers  token tries over profanity.txt and sensitive.txt. Phrases only
+            match whole words, so every match starts at a token boundary and
+            walking the trie from each token finds them all in one pass.
+  model     hashed bag-of-words logistic regression (model.json): unigrams,
+            bigrams and a few matcher/length features hashed into DIM
+            buckets, scored as P(rude).
+
+A review is decided locally when the model is confident either way
+(P(rude) < REVIEW_GUARD_LOCAL_CLEAN_BELOW or > REVIEW_GUARD_LOCAL_RUDE_ABOVE)
+and it contains nothing from sensitive.txt and no link, email address or
+phone number; everything else is escalated to the LLM. As with the old
+regex net, a review is only rejected locally when it hits profanity.txt and
+has none of the DETAIL_WORDS: a complaint that explains itself ("rude",
+"waited 30 minutes") is CONSTRUCTIVE however harsh, so the LLM decides. Accepting reviews
+locally is opt-in (REVIEW_GUARD_LOCAL_CLEAN_BELOW defaults to 0): the model
+only knows food reviews, and a policy violation it has not seen scores as
+clean. Setting the thresholds to 0 and 1 escalates every review.
+
+Retrain after editing the corpus or the word lists (from backend/):
+
+    python -m app.services.local_classifier train [--corpus PATH] [--out PATH] [--all]
+
+By default one review in five (is_held_out) is left out of training, so
+benchmarks/review_guard_bench.py can measure accuracy on unseen text.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import re
+import threading
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.services.verdict_cache import normalise
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "review_guard")
+PROFANITY_PATH = os.path.join(ASSETS_DIR, "profanity.txt")
+SENSITIVE_PATH = os.path.join(ASSETS_DIR, "sensitive.txt")
+CORPUS_PATH = os.path.join(ASSETS_DIR, "corpus.csv")
+MODEL_PATH = os.getenv("REVIEW_GUARD_LOCAL_MODEL", os.path.join(ASSETS_DIR, "model.json"))
+
+REVIEW_GUARD_LOCAL_CLEAN_BELOW = float(os.getenv("REVIEW_GUARD_LOCAL_CLEAN_BELOW", "0"))
+REVIEW_GUARD_LOCAL_RUDE_ABOVE = float(os.getenv("REVIEW_GUARD_LOCAL_RUDE_ABOVE", "0.9"))
+
+DIM = 1 << 16
+
+CLEAN, RUDE, ESCALATE = "clean", "rude", "escalate"
+POLICY = "policy"  # corpus label: trained as not clean
+
+# Words that show the review explains itself (carried over from the old regex net)
+DETAIL_WORDS = frozenset((
+    "too very because since cold late price service clean salty sweet spicy portion wait slow raw "
+    "undercooked burnt oily greasy staff hygiene taste fresh waited queue minutes smell smells dirty"
+).split())
+
+_TOKEN_RE = re.compile(r"[\w*@$!']+")
+# Digits/symbols commonly swapped for letters, folded only inside words that also have letters
+_LEET = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "@": "a", "$": "s", "!": "i"})
+
+# Links, email addresses and phone numbers (spam, solicitation): matched on the normalised text
+CONTACT_RE = re.compile(
+    r"(?P<email>[\w.+-]+@[\w-]+\.[\w.]+)"
+    r"|(?P<link>(?:https?://|www\.)\S+|\b[\w-]+\.(?:com|net|org|sg|ly|io|co|xyz|info|biz|me)\b)"
+    r"|(?P<phone>\+?\d(?:[\s-]?\d){6,})"
+)
+
+class LocalVerdict(NamedTuple):
+    decision: str                 # CLEAN, RUDE or ESCALATE
+    score: Optional[float]        # P(rude); None when no model is loaded
+    matches: Tuple[str, ...]      # profanity/sensitive phrases found
+
+def tokenise(text: str) -> List[str]:
+    tokens = []
+    for raw in _TOKEN_RE.findall(normalise(text)):
+        token = raw.strip("!'_")
+        if not token:
+            continue
+        if any(c.isalpha() for c in token) and not token.isdigit():
+            token = token.translate(_LEET)
+        tokens.append(token)
+    return tokens
+
+class PhraseMatcher:
+    """Whole-word phrase matcher: a trie keyed by token."""
+    _END = ""
+
+    def __init__(self, phrases: Iterable[str]):
+        self.root: Dict[str, dict] = {}
+        for phrase in phrases:
+            tokens = phrase.split()
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[self._END] = phrase
+
+    @classmethod
+    def from_file(cls, path: str) -> "PhraseMatcher":
+        with open(path, encoding="utf-8") as f:
+            return cls(line.strip().casefold() for line in f if line.strip() and not line.startswith("#"))
+
+    def find(self, tokens: Sequence[str]) -> List[str]:
+        """Every phrase occurring in `tokens`, in order of position."""
+        found = []
+        root = self.root
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            i = start + 1
+            while node is not None:
+                if self._END in node:
+                    found.append(node[self._END])
+                if i == len(tokens):
+                    break
+                node = node.get(tokens[i])
+                i += 1
+        return found
+
+def _bucket(feature: str) -> int:
+    # crc32 rather than hash(): stable across processes and PYTHONHASHSEED
+    return zlib.crc32(feature.encode("utf-8")) % DIM
+
+def features(tokens: Sequence[str], profanity: Sequence[str]) -> List[int]:
+    names = [f"w:{t}" for t in tokens]
+    names += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    names += [f"p:{p}" for p in profanity]
+    if profanity:
+        names.append("__profanity__")
+    if any(t in DETAIL_WORDS for t in tokens):
+        names.append("__detail__")
+    names.append(f"__len{min(len(tokens) // 4, 6)}__")
+    return sorted({_bucket(n) for n in names})
+
+class HashedLogisticModel:
+    def __init__(self, bias: float = 0.0, weights: Optional[Dict[int, float]] = None):
+        self.bias = bias
+        self.weights = weights or {}
+
+    def score(self, buckets: Sequence[int]) -> float:
+        weights = self.weights
+        z = self.bias + sum(weights.get(i, 0.0) for i in buckets)
+        return 1.0 / (1.0 + math.exp(-max(min(z, 35.0), -35.0)))
+
+    @classmethod
+    def train(cls, examples: Sequence[Tuple[List[int], int]], epochs: int = 40, lr: float = 0.3,
+              l2: float = 1e-4, seed: int = 0) -> "HashedLogisticModel":
+        """Plain SGD on log loss; `examples` are (buckets, 1 if rude else 0)."""
+        model = cls()
+        order = list(range(len(examples)))
+        rng = random.Random(seed)
+        weights = model.weights
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for idx in order:
+                buckets, label = examples[idx]
+                gradient = model.score(buckets) - label
+                model.bias -= lr * gradient
+                for i in buckets:
+                    w = weights.get(i, 0.0)
+                    weights[i] = w - lr * (gradient + l2 * w)
+        return model
+
+    def save(self, path: str, **meta) -> None:
+        data = {"dim": DIM, **meta, "bias": round(self.bias, 6),
+                "weights": {str(i): round(w, 6) for i, w in sorted(self.weights.items()) if abs(w) >= 1e-6}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.write("\n")
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLogisticModel":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("dim") != DIM:
+            raise ValueError(f"{path} was trained with dim={data.get('dim')}, expected {DIM}; retrain it")
+        return cls(data["bias"], {int(i): w for i, w in data["weights"].items()})
+
+class LocalTier:
+    def __init__(self, profanity: PhraseMatcher, sensitive: PhraseMatcher, model: Optional[HashedLogisticModel]):
+        self.profanity = profanity
+        self.sensitive = sensitive
+        self.model = model
+
+    @classmethod
+    def load(cls, model_path: str = MODEL_PATH) -> "LocalTier":
+        model = None
+        if os.path.exists(model_path):
+            model = HashedLogisticModel.load(model_path)
+        else:
+            print(f"[review_guard] No local model at {model_path}; every review goes to the LLM.")
+        return cls(PhraseMatcher.from_file(PROFANITY_PATH), PhraseMatcher.from_file(SENSITIVE_PATH), model)
+
+    def _analyse(self, text: str) -> Tuple[List[str], Optional[float], List[str], List[str]]:
+        tokens = tokenise(text)
+        profanity = self.profanity.find(tokens)
+        sensitive = self.sensitive.find(tokens)
+        sensitive += [f"<{m.lastgroup}>" for m in CONTACT_RE.finditer(normalise(text))]
+        score = None if self.model is None else self.model.score(features(tokens, profanity))
+        return tokens, score, profanity, sensitive
+
+    def score(self, text: str) -> Tuple[Optional[float], List[str], List[str]]:
+        return self._analyse(text)[1:]
+
+    def classify(self, text: str, clean_below: Optional[float] = None, rude_above: Optional[float] = None) -> LocalVerdict:
+        clean_below = REVIEW_GUARD_LOCAL_CLEAN_BELOW if clean_below is None else clean_below
+        rude_above = REVIEW_GUARD_LOCAL_RUDE_ABOVE if rude_above is None else rude_above
+        tokens, score, profanity, sensitive = self._analyse(text)
+        matches = tuple(profanity + sensitive)
+        if score is None or sensitive:
+            return LocalVerdict(ESCALATE, score, matches)
+        if score > rude_above:
+            # Reject only profanity with nothing specific to say; a detailed complaint is the LLM's call
+            if profanity and not any(t in DETAIL_WORDS for t in tokens):
+                return LocalVerdict(RUDE, score, matches)
+            return LocalVerdict(ESCALATE, score, matches)
+        if score < clean_below:
+            return LocalVerdict(CLEAN, score, matches)
+        return LocalVerdict(ESCALATE, score, matches)
+
+_tier: Optional[LocalTier] = None
+_tier_lock = threading.Lock()
+
+def get_tier() -> LocalTier:
+    global _tier
+    if _tier is None:
+        with _tier_lock:
+            if _tier is None:
+                _tier = LocalTier.load()
+    return _tier
+
+def classify(text: str) -> LocalVerdict:
+    return get_tier().classify(text)
+
+def is_held_out(text: str) -> bool:
+    """Deterministic 1-in-5 evaluation split, so training and the benchmark agree."""
+    return zlib.crc32(text.encode("utf-8")) % 5 == 0
+
+def read_corpus(path: str = CORPUS_PATH) -> List[Tuple[str, int]]:
+    """(text, 1 if rude else 0) rows of a text,label CSV with labels clean/rude/policy (policy counts as rude)."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [(row["text"], int(row["label"] != CLEAN)) for row in csv.DictReader(f)]
+
+def train(rows: Sequence[Tuple[str, int]]) -> HashedLogisticModel:
+    profanity = PhraseMatcher.from_file(PROFANITY_PATH)
+    examples = []
+    for text, label in rows:
+        tokens = tokenise(text)
+        examples.append((features(tokens, profanity.find(tokens)), label))
+    return HashedLogisticModel.train(examples)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train the local review-guard model.")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--out", default=MODEL_PATH)
+    parser.add_argument("--all", action="store_true", help="also train on the held-out split")
+    args = parser.parse_args(argv)
+
+    rows = [r for r in read_corpus(args.corpus) if args.all or not is_held_out(r[0])]
+    model = train(rows)
+    model.save(args.out, trained_on=len(rows), held_out=not args.all)
+    print(f"Trained on {len(rows)} reviews ({sum(l for _, l in rows)} rude); "
+          f"{len(model.weights)} weights written to {args.out}.")
+
+if __name__ == "__main__":
+    main()
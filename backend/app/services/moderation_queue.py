@@ -0,0 +1,174 @@
+"""
+Background moderation of submitted reviews.
+
+With REVIEW_MODERATION_MODE=async, POST /consumers/{id}/reviews stores the
+review as pending and returns 202 straight away; the review guard then runs
+here, on a pool of REVIEW_MODERATION_WORKERS threads (which also caps how
+many classifier calls are in flight per process). Classifier errors are
+retried with exponential backoff up to REVIEW_MODERATION_MAX_ATTEMPTS times.
+The verdict publishes or rejects the review (see
+review_controller.apply_moderation_verdict); clients poll
+GET /consumers/{id}/reviews/{review_id}/status.
+
+Jobs live only in memory: reviews still pending after a restart are picked
+up again by resume_pending() at startup. Every uvicorn worker resumes, so
+a job first claims its review with a conditional UPDATE
+(moderation_claimed_at); a review claimed by another process is skipped,
+and a claim older than REVIEW_MODERATION_CLAIM_TIMEOUT_SECONDS counts as
+abandoned.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy import or_, update
+
+from app.services import review_guard
+
+REVIEW_MODERATION_MODE = os.getenv("REVIEW_MODERATION_MODE", "sync").lower()
+ASYNC_MODERATION = REVIEW_MODERATION_MODE == "async"
+
+REVIEW_MODERATION_WORKERS = int(os.getenv("REVIEW_MODERATION_WORKERS", "4"))
+REVIEW_MODERATION_MAX_ATTEMPTS = int(os.getenv("REVIEW_MODERATION_MAX_ATTEMPTS", "3"))
+REVIEW_MODERATION_RETRY_DELAY_SECONDS = float(os.getenv("REVIEW_MODERATION_RETRY_DELAY_SECONDS", "1.0"))
+REVIEW_MODERATION_CLAIM_TIMEOUT_SECONDS = int(os.getenv("REVIEW_MODERATION_CLAIM_TIMEOUT_SECONDS", "600"))
+
+# Verdict codes worth retrying: the classifier could not be reached, not a decision
+RETRYABLE_CODES = {"llm_error"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_futures: List[Future] = []
+_lock = threading.Lock()
+
+def _session_factory() -> Callable:
+    from app.database import SessionLocal
+    return SessionLocal
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REVIEW_MODERATION_WORKERS, thread_name_prefix="moderation")
+        return _executor
+
+def classify_with_retries(text: str) -> dict:
+    """Runs the review guard, retrying classifier errors with exponential backoff."""
+    for attempt in range(1, REVIEW_MODERATION_MAX_ATTEMPTS + 1):
+        verdict = review_guard.guard_review_text(text)
+        if verdict["code"] not in RETRYABLE_CODES or attempt == REVIEW_MODERATION_MAX_ATTEMPTS:
+            return verdict
+        time.sleep(REVIEW_MODERATION_RETRY_DELAY_SECONDS * 2 ** (attempt - 1))
+    return verdict
+
+def _unclaimed():
+    from app.models.review_model import Review
+
+    cutoff = datetime.utcnow() - timedelta(seconds=REVIEW_MODERATION_CLAIM_TIMEOUT_SECONDS)
+    return or_(Review.moderation_claimed_at.is_(None), Review.moderation_claimed_at < cutoff)
+
+def claim(review_id: int, description: str) -> Optional[datetime]:
+    """
+    Claims a pending review for classification. Returns the claim time, or
+    None if it is no longer pending with this text or another process holds it.
+    """
+    from app.models.review_model import Review, PENDING
+
+    claimed_at = datetime.utcnow()
+    db = _session_factory()()
+    try:
+        result = db.execute(
+            update(Review)
+            .where(Review.id == review_id, Review.status == PENDING, Review.description == description, _unclaimed())
+            .values(moderation_claimed_at=claimed_at)
+        )
+        db.commit()
+        return claimed_at if result.rowcount == 1 else None
+    finally:
+        db.close()
+
+def release(review_id: int, claimed_at: datetime) -> None:
+    """Gives up a claim (the job failed), so the next resume_pending() retries the review."""
+    from app.models.review_model import Review
+
+    db = _session_factory()()
+    try:
+        db.execute(
+            update(Review)
+            .where(Review.id == review_id, Review.moderation_claimed_at == claimed_at)
+            .values(moderation_claimed_at=None)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def moderate(review_id: int, description: str) -> Optional[str]:
+    """
+    Classifies one review and applies the verdict. Returns the review's new
+    status (None if it was superseded or is being classified elsewhere).
+    """
+    from app.controllers.review_controller import apply_moderation_verdict
+
+    claimed_at = claim(review_id, description)
+    if claimed_at is None:
+        return None
+    try:
+        verdict = classify_with_retries(description)
+        db = _session_factory()()
+        try:
+            return apply_moderation_verdict(db, review_id, description, verdict)
+        finally:
+            db.close()
+    except BaseException:
+        release(review_id, claimed_at)
+        raise
+
+def _run(review_id: int, description: str) -> Optional[str]:
+    try:
+        return moderate(review_id, description)
+    except Exception as e:
+        # Left pending; resume_pending() retries it on the next start
+        print(f"[moderation] Review {review_id} failed: {e}")
+        return None
+
+def submit(review_id: int, description: str) -> Future:
+    """Queues a committed pending review for moderation."""
+    future = _get_executor().submit(_run, review_id, description)
+    with _lock:
+        _futures[:] = [f for f in _futures if not f.done()]
+        _futures.append(future)
+    return future
+
+def resume_pending() -> int:
+    """
+    Queues every review still pending and not claimed by a live job (e.g.
+    after a restart). Returns how many. Safe to run in every worker: each
+    review is classified only by the job that claims it.
+    """
+    from app.models.review_model import Review, PENDING
+
+    db = _session_factory()()
+    try:
+        pending = db.query(Review.id, Review.description).filter(Review.status == PENDING, _unclaimed()).all()
+    finally:
+        db.close()
+    for review_id, description in pending:
+        submit(review_id, description)
+    return len(pending)
+
+def wait_idle(timeout: Optional[float] = None) -> None:
+    """Blocks until every queued job has finished (tests, graceful shutdown)."""
+    with _lock:
+        futures = list(_futures)
+    for future in futures:
+        future.result(timeout=timeout)
+
+def shutdown() -> None:
+    """Stops the pool, finishing in-flight jobs; queued ones stay pending in the database."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,259 @@
+"""
+In-memory weekly schedule index for stall operating hours.
+
+Every business's OperatingHour rows are packed into sorted, merged
+minute-of-week intervals (Monday 00:00 = 0, Sunday 23:59 = 10079), so
+"is this stall open at minute M" is a single binary search instead of a
+walk over ORM objects comparing datetime.time values.
+
+For "which stalls are open at minute M" the week is also cut into
+BUCKET_MINUTES-wide buckets, each holding the businesses with a window
+touching it. A query only checks the businesses in one bucket, plus the
+businesses with no hours that day that fall back to an OPEN status.
+
+As before the index, a business with no windows on the queried day falls
+back to its status, so a stall with Monday-Friday hours and an OPEN status
+shows as open on Saturday.
+
+The index is loaded from the database on first use, refreshed for a single
+business whenever its hours are committed, and fully reloaded after
+INDEX_TTL_SECONDS so that other workers' writes are eventually picked up.
+"""
+import os
+import threading
+import time as _time
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import datetime, time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.business_model import Business, StallStatus
+from app.models.operating_hour_model import OperatingHour
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+DAY_OFFSETS = {
+    "Monday": 0 * MINUTES_PER_DAY,
+    "Tuesday": 1 * MINUTES_PER_DAY,
+    "Wednesday": 2 * MINUTES_PER_DAY,
+    "Thursday": 3 * MINUTES_PER_DAY,
+    "Friday": 4 * MINUTES_PER_DAY,
+    "Saturday": 5 * MINUTES_PER_DAY,
+    "Sunday": 6 * MINUTES_PER_DAY,
+}
+
+INDEX_TTL_SECONDS = int(os.getenv("OPEN_HOURS_INDEX_TTL_SECONDS", "300"))
+
+BUCKET_MINUTES = 15
+BUCKET_COUNT = MINUTES_PER_WEEK // BUCKET_MINUTES
+
+# license_number -> (starts, ends); both arrays sorted, intervals merged and inclusive
+Schedule = Tuple[array, array]
+
+# license_number -> (business id, hawker centre, status is OPEN)
+BusinessMeta = Tuple[int, str, bool]
+
+_schedules: Dict[str, Schedule] = {}
+# license_number -> bitmask of the weekdays (bit 0 = Monday) with any window recorded
+_days: Dict[str, int] = {}
+_businesses: Dict[str, BusinessMeta] = {}
+# The sets below are never mutated in place, only replaced, so readers can
+# iterate them without holding the lock.
+_buckets: List[FrozenSet[str]] = [frozenset()] * BUCKET_COUNT
+# Per weekday: businesses with no windows that day whose status is OPEN
+_status_open: List[FrozenSet[str]] = [frozenset()] * 7
+_loaded_at: float = 0.0
+_lock = threading.Lock()
+
+def minute_of_week(dt: datetime) -> int:
+    """Converts a (local) datetime into its minute offset from Monday 00:00."""
+    return dt.weekday() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute
+
+def _minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def _weekday(minute: int) -> int:
+    return minute % MINUTES_PER_WEEK // MINUTES_PER_DAY
+
+def day_mask(windows: Iterable[Tuple[str, time, time]]) -> int:
+    """Bitmask of the weekdays that have at least one window row, valid or not."""
+    mask = 0
+    for day, _, _ in windows:
+        offset = DAY_OFFSETS.get(day)
+        if offset is not None:
+            mask |= 1 << (offset // MINUTES_PER_DAY)
+    return mask
+
+def _status_open_days(license_number: str, status_open: bool, mask: int) -> List[FrozenSet[str]]:
+    """_status_open with one business moved in or out of each weekday's set."""
+    return [
+        fallback | {license_number} if status_open and not mask >> day & 1 else fallback - {license_number}
+        for day, fallback in enumerate(_status_open)
+    ]
+
+def pack_windows(windows: Iterable[Tuple[str, time, time]]) -> Schedule:
+    """
+    Packs (day, start_time, end_time) windows into sorted, non-overlapping
+    minute-of-week intervals. Windows whose end is before their start never
+    matched the old time comparison either, so they are dropped.
+    """
+    intervals = []
+    for day, start, end in windows:
+        offset = DAY_OFFSETS.get(day)
+        if offset is None or start is None or end is None or end < start:
+            continue
+        intervals.append((offset + _minute_of_day(start), offset + _minute_of_day(end)))
+    intervals.sort()
+
+    starts, ends = array("i"), array("i")
+    for s, e in intervals:
+        if ends and s <= ends[-1] + 1:
+            # Overlapping or touching the previous window: extend it
+            if e > ends[-1]:
+                ends[-1] = e
+        else:
+            starts.append(s)
+            ends.append(e)
+    return starts, ends
+
+def schedule_contains(schedule: Schedule, minute: int) -> bool:
+    """Binary search for the interval that could contain `minute`."""
+    starts, ends = schedule
+    i = bisect_right(starts, minute) - 1
+    return i >= 0 and minute <= ends[i]
+
+def _bucket_indexes(schedule: Schedule) -> Iterable[int]:
+    for s, e in zip(*schedule):
+        yield from range(s // BUCKET_MINUTES, e // BUCKET_MINUTES + 1)
+
+def is_open_at(license_number: str, minute: int) -> Optional[bool]:
+    """
+    Returns whether the business is open at the given minute of the week,
+    or None if it has no operating hours recorded for that day (callers fall
+    back to status).
+    """
+    schedule = _schedules.get(license_number)
+    if schedule is None or not _days.get(license_number, 0) >> _weekday(minute) & 1:
+        return None
+    return schedule_contains(schedule, minute)
+
+def _query_windows(db: Session, license_number: Optional[str] = None):
+    q = db.query(
+        OperatingHour.license_number,
+        OperatingHour.day,
+        OperatingHour.start_time,
+        OperatingHour.end_time,
+    )
+    if license_number is not None:
+        q = q.filter(OperatingHour.license_number == license_number)
+    return q.all()
+
+def rebuild_all(db: Session) -> None:
+    """Reloads every business's schedule with two column-only queries."""
+    global _schedules, _days, _businesses, _buckets, _status_open, _loaded_at
+
+    grouped = defaultdict(list)
+    for license_number, day, start, end in _query_windows(db):
+        grouped[license_number].append((day, start, end))
+    schedules = {lic: pack_windows(windows) for lic, windows in grouped.items()}
+    days = {lic: day_mask(windows) for lic, windows in grouped.items()}
+
+    businesses = {
+        lic: (biz_id, hawker_centre or "", status == StallStatus.OPEN)
+        for biz_id, lic, hawker_centre, status in db.query(
+            Business.id, Business.license_number, Business.hawker_centre, Business.status
+        )
+    }
+
+    buckets = [set() for _ in range(BUCKET_COUNT)]
+    for lic, schedule in schedules.items():
+        for b in _bucket_indexes(schedule):
+            buckets[b].add(lic)
+
+    # Swap whole objects in single assignments so readers never see a half-built index
+    _schedules = schedules
+    _days = days
+    _businesses = businesses
+    _buckets = [frozenset(b) for b in buckets]
+    _status_open = [
+        frozenset(
+            lic for lic, (_, _, status_open) in businesses.items()
+            if status_open and not days.get(lic, 0) >> day & 1
+        )
+        for day in range(7)
+    ]
+    _loaded_at = _time.monotonic()
+
+def rebuild_business(db: Session, license_number: str) -> None:
+    """Refreshes a single business's schedule, e.g. after set_operating_hours commits."""
+    global _status_open
+
+    windows = [(day, start, end) for _, day, start, end in _query_windows(db, license_number)]
+    new = pack_windows(windows) if windows else None
+    mask = day_mask(windows)
+
+    with _lock:
+        old = _schedules.get(license_number)
+        old_buckets = set(_bucket_indexes(old)) if old else set()
+        new_buckets = set(_bucket_indexes(new)) if new else set()
+
+        # open_business_ids reads a bucket and then the schedule without the lock:
+        # widen the buckets before publishing the schedule and narrow them after
+        for b in new_buckets - old_buckets:
+            _buckets[b] = _buckets[b] | {license_number}
+        if new is not None:
+            _schedules[license_number] = new
+            _days[license_number] = mask
+        else:
+            _schedules.pop(license_number, None)
+            _days.pop(license_number, None)
+        for b in old_buckets - new_buckets:
+            _buckets[b] = _buckets[b] - {license_number}
+
+        meta = _businesses.get(license_number)
+        _status_open = _status_open_days(license_number, bool(meta and meta[2]), mask)
+
+def open_business_ids(minute: int, hawker_centre: Optional[str] = None) -> List[int]:
+    """
+    Returns the ids of businesses open at the given minute of the week:
+    those with a matching window, plus those without hours that day whose
+    status is OPEN.
+    Optionally restricted to one hawker centre (case-insensitive).
+    """
+    bucket = _buckets[minute % MINUTES_PER_WEEK // BUCKET_MINUTES]
+    open_licenses = {
+        lic for lic in bucket
+        if (schedule := _schedules.get(lic)) is not None and schedule_contains(schedule, minute)
+    }
+    # A set: mid-rebuild_business a stall can briefly be in both
+    open_licenses.update(_status_open[_weekday(minute)])
+
+    wanted = hawker_centre.strip().lower() if hawker_centre else None
+    ids = []
+    for lic in open_licenses:
+        meta = _businesses.get(lic)
+        if meta is None:
+            continue
+        if wanted is not None and meta[1].lower() != wanted:
+            continue
+        ids.append(meta[0])
+    return sorted(ids)
+
+def ensure_loaded(db: Session) -> None:
+    """Loads the index on first use and reloads it once it is older than the TTL."""
+    if _loaded_at and _time.monotonic() - _loaded_at < INDEX_TTL_SECONDS:
+        return
+    with _lock:
+        # Another thread may have rebuilt it while we were waiting for the lock
+        if _loaded_at and _time.monotonic() - _loaded_at < INDEX_TTL_SECONDS:
+            return
+        rebuild_all(db)
+
+def invalidate() -> None:
+    """Forces a full reload on the next ensure_loaded call."""
+    global _loaded_at
+    _loaded_at = 0.0
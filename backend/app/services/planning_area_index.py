@@ -0,0 +1,291 @@
+"""
+Offline planning-area lookup (point-in-polygon) over a URA boundary file.
+
+The boundary GeoJSON is loaded once, on first use. Each polygon's bounding
+box is registered in a coarse lat/lng grid, so a lookup only ray-casts
+against the few polygons whose box overlaps the point's grid cell. Results
+are memoised per coordinate rounded to COORD_PRECISION decimal places
+(4 dp is roughly 11 m), so repeated lookups from the same spot are a dict hit.
+
+The boundary file is the "Master Plan 2019 Planning Area Boundary (No Sea)"
+GeoJSON from data.gov.sg. It is not checked in; fetch it once with
+(from backend/):
+
+    python -m app.services.planning_area_index fetch
+
+which writes PLANNING_AREA_GEOJSON (default:
+app/assets/data/planning_areas.geojson), e.g. when building an image. With
+PLANNING_AREA_FETCH_ON_STARTUP=true the database setup job (app.seed) also
+fetches a missing file, so only the process holding the seed_state claim
+downloads it. Workers only ever load the file: startup loads it if present,
+and while it is missing they look for it again every
+PLANNING_AREA_RECHECK_SECONDS. Until it is loaded is_available() is False and
+callers fall back to OneMap, whose answers are memoised per rounded
+coordinate (remember_fallback / recalled_fallback) so each spot costs one call.
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "data")
+PLANNING_AREA_GEOJSON = os.getenv("PLANNING_AREA_GEOJSON", os.path.join(DATA_DIR, "planning_areas.geojson"))
+PLANNING_AREA_FETCH_ON_STARTUP = os.getenv("PLANNING_AREA_FETCH_ON_STARTUP", "false").lower() == "true"
+PLANNING_AREA_RECHECK_SECONDS = int(os.getenv("PLANNING_AREA_RECHECK_SECONDS", "60"))
+# data.gov.sg: Master Plan 2019 Planning Area Boundary (No Sea)
+PLANNING_AREA_DATASET_URL = os.getenv(
+    "PLANNING_AREA_DATASET_URL",
+    "https://api-open.data.gov.sg/v1/public/api/datasets/d_4765db0e87b9c86336792efe8a1f7a66",
+)
+
+GRID_CELL_DEGREES = 0.01
+COORD_PRECISION = 4
+CACHE_SIZE = 65536
+
+Ring = List[Tuple[float, float]]  # (lng, lat) pairs, as in GeoJSON
+
+class _Polygon:
+    __slots__ = ("name", "rings", "min_lng", "min_lat", "max_lng", "max_lat")
+
+    def __init__(self, name: str, rings: List[Ring]):
+        self.name = name
+        self.rings = rings
+        outer = rings[0]
+        self.min_lng = min(p[0] for p in outer)
+        self.max_lng = max(p[0] for p in outer)
+        self.min_lat = min(p[1] for p in outer)
+        self.max_lat = max(p[1] for p in outer)
+
+    def contains(self, lng: float, lat: float) -> bool:
+        if not (self.min_lng <= lng <= self.max_lng and self.min_lat <= lat <= self.max_lat):
+            return False
+        # Even-odd rule over all rings, so holes are handled for free
+        inside = False
+        for ring in self.rings:
+            if _ray_crosses_odd(ring, lng, lat):
+                inside = not inside
+        return inside
+
+_polygons: List[_Polygon] = []
+_grid: Dict[Tuple[int, int], List[int]] = {}
+_loaded = False
+_available = False
+_path = PLANNING_AREA_GEOJSON   # the file load_file last tried
+_checked_at = 0.0               # monotonic time of that attempt
+_lock = threading.Lock()
+_load_lock = threading.Lock()
+# OneMap answers by rounded (lat, lng), for when no boundary file is loaded
+_fallback: "OrderedDict[Tuple[float, float], Optional[str]]" = OrderedDict()
+
+# The data.gov.sg export keeps attributes in an HTML table inside "Description"
+_DESCRIPTION_NAME_RE = re.compile(r"<th>\s*PLN_AREA_N\s*</th>\s*<td>\s*([^<]+?)\s*</td>", re.I)
+
+def _ray_crosses_odd(ring: Sequence[Tuple[float, float]], x: float, y: float) -> bool:
+    """Classic ray casting: does a ray from (x, y) cross the ring an odd number of times?"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+def format_area_name(area_name: str) -> str:
+    """Formats an ALL CAPS planning area (e.g. "BUKIT MERAH") as Title Case ("Bukit Merah")."""
+    return " ".join(word.capitalize() for word in area_name.lower().split())
+
+def _feature_name(properties: dict) -> Optional[str]:
+    for key in ("PLN_AREA_N", "pln_area_n", "name", "Name"):
+        if properties.get(key):
+            return str(properties[key])
+    m = _DESCRIPTION_NAME_RE.search(properties.get("Description") or "")
+    return m.group(1) if m else None
+
+def _cell(lng: float, lat: float) -> Tuple[int, int]:
+    return int(lng // GRID_CELL_DEGREES), int(lat // GRID_CELL_DEGREES)
+
+def load_geojson(geojson: dict) -> None:
+    """Builds the polygon list and bounding-box grid from a GeoJSON FeatureCollection."""
+    global _polygons, _grid, _loaded, _available
+
+    polygons: List[_Polygon] = []
+    for feature in geojson.get("features", []):
+        name = _feature_name(feature.get("properties") or {})
+        geometry = feature.get("geometry") or {}
+        if not name or not geometry:
+            continue
+        if geometry.get("type") == "Polygon":
+            parts = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            parts = geometry["coordinates"]
+        else:
+            continue
+        for rings in parts:
+            # Drop any Z values; GeoJSON positions are [lng, lat(, alt)]
+            clean = [[(float(p[0]), float(p[1])) for p in ring] for ring in rings if ring]
+            if clean:
+                polygons.append(_Polygon(format_area_name(name), clean))
+
+    grid = defaultdict(list)
+    for i, poly in enumerate(polygons):
+        x0, y0 = _cell(poly.min_lng, poly.min_lat)
+        x1, y1 = _cell(poly.max_lng, poly.max_lat)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                grid[(x, y)].append(i)
+
+    with _lock:
+        _polygons = polygons
+        _grid = dict(grid)
+        _available = bool(polygons)
+        _loaded = True
+        _lookup_rounded.cache_clear()
+
+def load_file(path: str = PLANNING_AREA_GEOJSON) -> None:
+    """Loads the boundary file; a missing or unreadable file leaves the index unavailable."""
+    global _loaded, _path, _checked_at
+    _path, _checked_at = path, time.monotonic()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            geojson = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[planning_area_index] Boundary file not loaded ({path}): {e}")
+        with _lock:
+            _loaded = True
+        return
+    load_geojson(geojson)
+
+def _needs_load() -> bool:
+    # A missing file is looked for again now and then, as the seed job or an operator may fetch it
+    return not _loaded or (not _available and time.monotonic() - _checked_at >= PLANNING_AREA_RECHECK_SECONDS)
+
+def _ensure_loaded() -> None:
+    global _checked_at
+    if not _needs_load():
+        return
+    with _load_lock:
+        if not _needs_load():
+            return
+        if not _loaded or os.path.exists(_path):
+            load_file(_path)
+        else:
+            _checked_at = time.monotonic()
+
+def is_available() -> bool:
+    """True once a boundary file with at least one polygon has been loaded."""
+    _ensure_loaded()
+    return _available
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _lookup_rounded(lat: float, lng: float) -> Optional[str]:
+    for i in _grid.get(_cell(lng, lat), ()):
+        poly = _polygons[i]
+        if poly.contains(lng, lat):
+            return poly.name
+    return None
+
+def lookup(latitude: float, longitude: float) -> Optional[str]:
+    """Returns the Title Case planning area containing the point, or None if it is in none."""
+    _ensure_loaded()
+    return _lookup_rounded(*_rounded(latitude, longitude))
+
+def _rounded(latitude: float, longitude: float) -> Tuple[float, float]:
+    return round(latitude, COORD_PRECISION), round(longitude, COORD_PRECISION)
+
+def recalled_fallback(latitude: float, longitude: float) -> Tuple[bool, Optional[str]]:
+    """(True, area) if a fallback answer for this rounded coordinate is memoised, else (False, None)."""
+    key = _rounded(latitude, longitude)
+    with _lock:
+        if key not in _fallback:
+            return False, None
+        _fallback.move_to_end(key)
+        return True, _fallback[key]
+
+def remember_fallback(latitude: float, longitude: float, area_name: Optional[str]) -> None:
+    """Memoises a fallback answer (None: in no planning area), keeping the CACHE_SIZE most recent."""
+    with _lock:
+        _fallback[_rounded(latitude, longitude)] = area_name
+        _fallback.move_to_end(_rounded(latitude, longitude))
+        while len(_fallback) > CACHE_SIZE:
+            _fallback.popitem(last=False)
+
+def fetch(path: str = PLANNING_AREA_GEOJSON, dataset_url: str = PLANNING_AREA_DATASET_URL,
+          timeout: float = 60.0, transport=None) -> int:
+    """
+    Downloads the boundary GeoJSON from data.gov.sg to `path` and returns the
+    number of planning areas in it. The file is only replaced once the
+    download parses, so a failed fetch never leaves a broken file behind.
+    """
+    import httpx  # only needed when fetching
+
+    with httpx.Client(timeout=timeout, transport=transport, follow_redirects=True) as client:
+        url = None
+        for attempt in range(10):
+            data = client.get(f"{dataset_url}/poll-download").raise_for_status().json().get("data") or {}
+            url = data.get("url")
+            if url:
+                break
+            if attempt == 0:
+                client.get(f"{dataset_url}/initiate-download").raise_for_status()
+            time.sleep(1)
+        if not url:
+            raise RuntimeError(f"data.gov.sg did not provide a download URL for {dataset_url}")
+        geojson = client.get(url).raise_for_status().json()
+
+    areas = {_feature_name(f.get("properties") or {}) for f in geojson.get("features", [])} - {None}
+    if not areas:
+        raise ValueError("Downloaded file has no planning-area features")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(geojson, f)
+    os.replace(tmp, path)
+    return len(areas)
+
+def fetch_if_missing(path: str = PLANNING_AREA_GEOJSON) -> Optional[int]:
+    """
+    Database-setup hook: fetches the boundary file when it is missing and
+    PLANNING_AREA_FETCH_ON_STARTUP is on. Returns the number of planning
+    areas fetched, or None if nothing was fetched. Never raises; OneMap
+    answers until a later fetch succeeds.
+    """
+    if not PLANNING_AREA_FETCH_ON_STARTUP or os.path.exists(path):
+        return None
+    try:
+        count = fetch(path)
+    except Exception as e:
+        print(f"[planning_area_index] Fetching boundaries failed ({e}); planning areas come from OneMap. "
+              "Run `python -m app.services.planning_area_index fetch` to retry.")
+        return None
+    print(f"[planning_area_index] Fetched {count} planning areas to {path}.")
+    return count
+
+def startup(path: str = PLANNING_AREA_GEOJSON) -> None:
+    """Loads the boundary file. Workers never download it (see fetch_if_missing)."""
+    global _loaded, _path, _checked_at
+    if os.path.exists(path):
+        load_file(path)
+        return
+    with _lock:
+        _loaded = True  # unavailable until the file appears
+        _path, _checked_at = path, time.monotonic()
+    print(f"[planning_area_index] {path} is missing; run `python -m app.services.planning_area_index fetch`. "
+          "Planning areas come from OneMap until then.")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the offline planning-area boundary file.")
+    parser.add_argument("command", choices=["fetch"])
+    parser.add_argument("--out", default=PLANNING_AREA_GEOJSON)
+    args = parser.parse_args(argv)
+    print(f"Wrote {fetch(args.out)} planning areas to {args.out}.")
+
+if __name__ == "__main__":
+    main()
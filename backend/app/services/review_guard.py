@@ -1,18 +1,33 @@
 from typing import TypedDict, Literal, Optional
-import os, re
-from openai import OpenAI
+import os, re, threading
 from dotenv import load_dotenv
 
+from app.services import local_classifier
+from app.services.verdict_cache import VerdictCache, cache_key
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-# client = None
+# The OpenAI SDK takes ~0.5s to import, so the client is created on the first LLM check
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
 
 CLASSIFIER_MODEL = os.getenv("OPENAI_CLASSIFIER_MODEL", "gpt-4o-mini")
 
 # Set True in prod to block if LLM call fails
 FAIL_CLOSED = True
 
+# Classifier verdicts by normalised text, so unchanged descriptions skip the LLM call
+verdict_cache = VerdictCache()
+
 class GuardVerdict(TypedDict, total=False):
     ok: bool
     reason: Optional[str]
@@ -23,26 +38,11 @@ BOUNCE_MSG = (
     "Please keep feedback respectful and constructive (e.g., describe what went wrong and how it could improve)."
 )
 
-# super small local rude net
-_PROFANITY = [r"\bdogshit\b", r"\btrash\b", r"\bshit\b", r"\bfuck\b", r"\bidiot\b", r"\bwtf\b", r"\bgarbage\b"]
-_PROFANITY_RE = re.compile("|".join(_PROFANITY), flags=re.IGNORECASE)
-
 LABEL_RE = re.compile(r"\b(CONSTRUCTIVE|NON_CONSTRUCTIVE_RUDE|POLICY_VIOLATION|OTHER)\b", re.I)
 
 def _trim(s: Optional[str]) -> str:
     return (s or "").strip()
 
-def _local_rude(text: str) -> bool:
-    if _PROFANITY_RE.search(text):
-        short = len(text) < 40
-        lacks_detail = not re.search(
-            r"\b(too|very|because|since|cold|late|price|service|clean|salty|sweet|spicy|portion|wait|slow|raw|undercooked|burnt|oily|greasy|staff|hygiene|taste|fresh)\b",
-            text,
-            re.IGNORECASE,
-        )
-        return short or lacks_detail
-    return False
-
 def _extract_text_from_responses(resp) -> str:
     # Works across client versions
     txt = getattr(resp, "output_text", None)
@@ -56,23 +56,64 @@ def _extract_text_from_responses(resp) -> str:
                 out.append(c.text)
     return "".join(out).strip()
 
-def guard_review_text(description: Optional[str]) -> GuardVerdict:
+LABEL_DEFINITIONS = (
+    "Definitions:\n"
+    "- CONSTRUCTIVE: mentions specific issues/observations/reasons/suggestions (even if negative).\n"
+    "- NON_CONSTRUCTIVE_RUDE: insulting/profanity-only/purely derogatory with no specifics "
+    "(e.g., 'dogshit food', 'trash place').\n"
+    "- POLICY_VIOLATION: hateful/harassing/sexual content involving minors/violent threats/self-harm "
+    "instructions/graphic violence or other clearly unsafe content.\n"
+    "- OTHER: anything else.\n"
+)
+
+def verdict_for_label(label: str) -> GuardVerdict:
+    label = label.upper()
+    if label == "POLICY_VIOLATION":
+        return {"ok": False, "code": "blocked_moderation", "reason": BOUNCE_MSG}
+    if label == "NON_CONSTRUCTIVE_RUDE":
+        return {"ok": False, "code": "blocked_rude", "reason": BOUNCE_MSG}
+    return {"ok": True, "code": "ok"}
+
+def error_verdict() -> GuardVerdict:
+    if FAIL_CLOSED:
+        return {"ok": False, "code": "llm_error", "reason": BOUNCE_MSG}
+    return {"ok": True, "code": "ok"}
+
+def screen(text: str, use_cache: bool = True, use_local_tier: bool = True) -> Optional[GuardVerdict]:
     """
-    Single prompt guard (no Moderations API / no structured outputs).
-    Blocks POLICY_VIOLATION or NON_CONSTRUCTIVE_RUDE.
+    The verdict for `text` without calling the LLM (empty, too long, decided by
+    the local tier or cached), or None if it has to be classified.
     """
-    text = _trim(description)
     if not text:
         return {"ok": True, "code": "ok"}
     if len(text) > 4000:
         return {"ok": False, "code": "blocked_length", "reason": "Review is too long."}
 
-    # 0) local quick net
-    if _local_rude(text):
-        return {"ok": False, "code": "blocked_rude", "reason": BOUNCE_MSG}
+    # 0) local tier: confidently clean or rude reviews never reach the LLM
+    if use_local_tier:
+        local = local_classifier.classify(text)
+        if local.decision == local_classifier.RUDE:
+            return {"ok": False, "code": "blocked_rude", "reason": BOUNCE_MSG}
+        if local.decision == local_classifier.CLEAN:
+            return {"ok": True, "code": "ok"}
+
+    if use_cache:
+        return verdict_cache.get(cache_key(text, CLASSIFIER_MODEL))
+    return None
+
+def guard_review_text(description: Optional[str]) -> GuardVerdict:
+    """
+    Single prompt guard (no Moderations API / no structured outputs).
+    Blocks POLICY_VIOLATION or NON_CONSTRUCTIVE_RUDE.
+    See batch_moderation for classifying many reviews per request.
+    """
+    text = _trim(description)
+    screened = screen(text)
+    if screened is not None:
+        return screened
 
     try:
-        resp = client.responses.create(
+        resp = get_client().responses.create(
             model=CLASSIFIER_MODEL,
             temperature=0,
             # Put both “system” instruction and user text into the input list — works on old clients
@@ -82,13 +123,7 @@ def guard_review_text(description: Optional[str]) -> GuardVerdict:
                     "content": (
                         "Classify the user's review. Respond with EXACTLY ONE of these labels and nothing else:\n"
                         "CONSTRUCTIVE, NON_CONSTRUCTIVE_RUDE, POLICY_VIOLATION, OTHER.\n"
-                        "Definitions:\n"
-                        "- CONSTRUCTIVE: mentions specific issues/observations/reasons/suggestions (even if negative).\n"
-                        "- NON_CONSTRUCTIVE_RUDE: insulting/profanity-only/purely derogatory with no specifics "
-                        "(e.g., 'dogshit food', 'trash place').\n"
-                        "- POLICY_VIOLATION: hateful/harassing/sexual content involving minors/violent threats/self-harm "
-                        "instructions/graphic violence or other clearly unsafe content.\n"
-                        "- OTHER: anything else.\n"
+                        + LABEL_DEFINITIONS +
                         "Output MUST be only the single label token, no extra words."
                     ),
                 },
@@ -98,16 +133,11 @@ def guard_review_text(description: Optional[str]) -> GuardVerdict:
 
         out_text = _extract_text_from_responses(resp)
         m = LABEL_RE.search(out_text or "")
-        label = (m.group(1) if m else "OTHER").upper()
-
-        if label == "POLICY_VIOLATION":
-            return {"ok": False, "code": "blocked_moderation", "reason": BOUNCE_MSG}
-        if label == "NON_CONSTRUCTIVE_RUDE":
-            return {"ok": False, "code": "blocked_rude", "reason": BOUNCE_MSG}
-        return {"ok": True, "code": "ok"}
+        verdict = verdict_for_label(m.group(1) if m else "OTHER")
+        # Errors below are never cached, so a failed call is retried next time
+        verdict_cache.put(cache_key(text, CLASSIFIER_MODEL), verdict)
+        return verdict
 
     except Exception as e:
         print(f"[review_guard] LLM check error: {e}")
-        if FAIL_CLOSED:
-            return {"ok": False, "code": "llm_error", "reason": BOUNCE_MSG}
-        return {"ok": True, "code": "ok"}
+        return error_verdict()
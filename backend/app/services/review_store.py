@@ -1,6 +1,19 @@
-import csv, os
+"""
+File-backed reviews: reviews.csv plus an append-only change log (see csv_log).
+
+Every review is held in memory, with secondary indexes by target and by
+consumer and a running (sum, count) per target, so listings cost the
+number of matching reviews and avg_rating is O(1). Creates, updates and
+deletes append one change. Once the log holds REVIEW_STORE_COMPACT_AFTER
+changes it is folded back into reviews.csv on a background thread; writes
+carry on meanwhile and end up in the new log. Safe to share between
+processes (see csv_log).
+"""
+import os
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Dict, List, Optional, Tuple
+
+from app.services.csv_log import LogStructuredStore, TOMBSTONE, UPSERT
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "data")
 REVIEWS_CSV = os.path.join(DATA_DIR, "reviews.csv")
@@ -9,84 +22,142 @@ CSV_HEADERS = [
     "star_rating", "description", "images", "created_at", "updated_at"
 ]
 
-os.makedirs(DATA_DIR, exist_ok=True)
-if not os.path.exists(REVIEWS_CSV):
-    with open(REVIEWS_CSV, "w", newline="", encoding="utf-8") as f:
-        csv.DictWriter(f, fieldnames=CSV_HEADERS).writeheader()
+REVIEW_STORE_COMPACT_AFTER = int(os.getenv("REVIEW_STORE_COMPACT_AFTER", "5000"))
 
-def _read_all() -> List[Dict[str, str]]:
-    with open(REVIEWS_CSV, "r", newline="", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
 
-def _write_all(rows: List[Dict[str, str]]) -> None:
-    tmp = REVIEWS_CSV + ".tmp"
-    with open(tmp, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-        w.writeheader()
-        w.writerows(rows)
-    os.replace(tmp, REVIEWS_CSV)
+class ReviewStore(LogStructuredStore):
+    background_compaction = True
 
-def _next_id(rows: List[Dict[str, str]]) -> int:
-    return (max([int(r["id"]) for r in rows], default=0) + 1)
+    def __init__(self, path: str = REVIEWS_CSV, compact_after: int = REVIEW_STORE_COMPACT_AFTER):
+        super().__init__(path, CSV_HEADERS, compact_after)
 
-def _now() -> str:
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    def _reset(self) -> None:
+        self._rows: Dict[str, Dict[str, str]] = {}                  # id -> row
+        self._by_target: Dict[Tuple[str, str], Dict[str, None]] = {}  # (target_type, target_id) -> ids
+        self._by_consumer: Dict[str, Dict[str, None]] = {}            # consumer_id -> ids
+        self._totals: Dict[Tuple[str, str], List[int]] = {}           # (target_type, target_id) -> [sum, count]
+        self._max_id = 0
+
+    # --- Index maintenance ---
+
+    def _unindex(self, row: Dict[str, str]) -> None:
+        target = (row["target_type"], row["target_id"])
+        self._by_target[target].pop(row["id"], None)
+        if not self._by_target[target]:
+            del self._by_target[target]
+        self._by_consumer[row["consumer_id"]].pop(row["id"], None)
+        if not self._by_consumer[row["consumer_id"]]:
+            del self._by_consumer[row["consumer_id"]]
+        totals = self._totals[target]
+        totals[0] -= int(row["star_rating"])
+        totals[1] -= 1
+        if not totals[1]:
+            del self._totals[target]
+
+    def _apply(self, op: str, row: Dict[str, str]) -> None:
+        # Idempotent: an upsert replaces the indexed version, a tombstone for a missing id is a no-op
+        old = self._rows.pop(row["id"], None) if op == TOMBSTONE else self._rows.get(row["id"])
+        if old is not None:
+            self._unindex(old)
+        if op != UPSERT:
+            return
+        self._rows[row["id"]] = row
+        target = (row["target_type"], row["target_id"])
+        self._by_target.setdefault(target, {})[row["id"]] = None
+        self._by_consumer.setdefault(row["consumer_id"], {})[row["id"]] = None
+        totals = self._totals.setdefault(target, [0, 0])
+        totals[0] += int(row["star_rating"])
+        totals[1] += 1
+        self._max_id = max(self._max_id, int(row["id"]))
+
+    def _snapshot_rows(self) -> List[Dict[str, str]]:
+        return list(self._rows.values())
+
+    def _owned(self, review_id: int, consumer_id: int) -> Optional[Dict[str, str]]:
+        row = self._rows.get(str(review_id))
+        return row if row is not None and row["consumer_id"] == str(consumer_id) else None
+
+    def _newest_first(self, ids: Dict[str, None]) -> List[Dict[str, str]]:
+        return sorted((dict(self._rows[i]) for i in ids), key=lambda r: (r["created_at"], int(r["id"])), reverse=True)
+
+    # --- Public API ---
+
+    def create(self, consumer_id: int, target_type: str, target_id: int,
+               star_rating: int, description: str, images: Optional[List[str]]) -> Dict[str, str]:
+        def mutate():
+            # Under the exclusive file lock, so no other process can take the same id
+            now = _now()
+            row = {
+                "id": str(self._max_id + 1),
+                "consumer_id": str(consumer_id),
+                "target_type": target_type,
+                "target_id": str(target_id),
+                "star_rating": str(star_rating),
+                "description": description or "",
+                "images": "|".join(images or []),  # pipe-delimited
+                "created_at": now,
+                "updated_at": now,
+            }
+            return [(UPSERT, row)], dict(row)
+        return self._commit(mutate)
+
+    def update(self, review_id: int, consumer_id: int,
+               star_rating: Optional[int], description: Optional[str], images: Optional[List[str]]) -> Optional[Dict[str, str]]:
+        def mutate():
+            old = self._owned(review_id, consumer_id)
+            if old is None:
+                return [], None
+            row = dict(old)
+            if star_rating is not None: row["star_rating"] = str(star_rating)
+            if description is not None: row["description"] = description
+            if images is not None: row["images"] = "|".join(images)
+            row["updated_at"] = _now()
+            return [(UPSERT, row)], dict(row)
+        return self._commit(mutate)
+
+    def delete(self, review_id: int, consumer_id: int) -> bool:
+        def mutate():
+            row = self._owned(review_id, consumer_id)
+            if row is None:
+                return [], False
+            return [(TOMBSTONE, {"id": row["id"]})], True
+        return self._commit(mutate)
+
+    def list_for_target(self, target_type: str, target_id: int) -> List[Dict[str, str]]:
+        with self._reading():
+            return self._newest_first(self._by_target.get((target_type, str(target_id)), {}))
+
+    def list_for_consumer(self, consumer_id: int) -> List[Dict[str, str]]:
+        with self._reading():
+            return self._newest_first(self._by_consumer.get(str(consumer_id), {}))
+
+    def avg_rating(self, target_type: str, target_id: int) -> Optional[float]:
+        with self._reading():
+            totals = self._totals.get((target_type, str(target_id)))
+            if not totals:
+                return None
+            return round(totals[0] / totals[1], 2)
+
+_store = ReviewStore()
 
 def create(consumer_id: int, target_type: str, target_id: int,
            star_rating: int, description: str, images: Optional[List[str]]) -> Dict[str, str]:
-    rows = _read_all()
-    rid = _next_id(rows)
-    row = {
-        "id": str(rid),
-        "consumer_id": str(consumer_id),
-        "target_type": target_type,
-        "target_id": str(target_id),
-        "star_rating": str(star_rating),
-        "description": description or "",
-        "images": "|".join(images or []),  # pipe-delimited
-        "created_at": _now(),
-        "updated_at": _now(),
-    }
-    rows.append(row)
-    _write_all(rows)
-    return row
+    return _store.create(consumer_id, target_type, target_id, star_rating, description, images)
 
 def update(review_id: int, consumer_id: int,
            star_rating: Optional[int], description: Optional[str], images: Optional[List[str]]) -> Optional[Dict[str, str]]:
-    rows = _read_all()
-    found = None
-    for r in rows:
-        if int(r["id"]) == review_id and int(r["consumer_id"]) == consumer_id:
-            if star_rating is not None: r["star_rating"] = str(star_rating)
-            if description is not None: r["description"] = description
-            if images is not None: r["images"] = "|".join(images)
-            r["updated_at"] = _now()
-            found = r
-            break
-    if found:
-        _write_all(rows)
-    return found
+    return _store.update(review_id, consumer_id, star_rating, description, images)
 
 def delete(review_id: int, consumer_id: int) -> bool:
-    rows = _read_all()
-    new_rows = [r for r in rows if not (int(r["id"]) == review_id and int(r["consumer_id"]) == consumer_id)]
-    changed = len(new_rows) != len(rows)
-    if changed: _write_all(new_rows)
-    return changed
+    return _store.delete(review_id, consumer_id)
 
 def list_for_target(target_type: str, target_id: int) -> List[Dict[str, str]]:
-    rows = _read_all()
-    out = [r for r in rows if r["target_type"] == target_type and int(r["target_id"]) == target_id]
-    # newest first
-    return sorted(out, key=lambda r: r["created_at"], reverse=True)
+    return _store.list_for_target(target_type, target_id)
 
 def list_for_consumer(consumer_id: int) -> List[Dict[str, str]]:
-    rows = _read_all()
-    out = [r for r in rows if int(r["consumer_id"]) == consumer_id]
-    return sorted(out, key=lambda r: r["created_at"], reverse=True)
+    return _store.list_for_consumer(consumer_id)
 
 def avg_rating(target_type: str, target_id: int) -> Optional[float]:
-    rs = list_for_target(target_type, target_id)
-    if not rs: return None
-    s = sum(int(r["star_rating"]) for r in rs)
-    return round(s / len(rs), 2)
+    return _store.avg_rating(target_type, target_id)
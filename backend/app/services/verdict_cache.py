@@ -0,0 +1,122 @@
+"""
+Cache of review-guard verdicts, keyed by a hash of the normalised review text.
+
+Two tiers:
+
+  memory  per-process LRU of REVIEW_GUARD_CACHE_SIZE entries, each valid for
+          REVIEW_GUARD_CACHE_TTL_SECONDS
+  sqlite  optional file (REVIEW_GUARD_CACHE_DB) shared by every worker and
+          kept across restarts; hits are promoted into the memory tier
+
+Re-saving a review whose text did not change (e.g. only the star rating was
+edited) therefore skips the classifier call entirely.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+REVIEW_GUARD_CACHE_SIZE = int(os.getenv("REVIEW_GUARD_CACHE_SIZE", "10000"))
+REVIEW_GUARD_CACHE_TTL_SECONDS = int(os.getenv("REVIEW_GUARD_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Path of the persistent tier; unset/empty keeps the cache in memory only
+REVIEW_GUARD_CACHE_DB = os.getenv("REVIEW_GUARD_CACHE_DB", "")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalise(text: str) -> str:
+    """Text as the classifier effectively sees it: NFKC, case-folded, whitespace collapsed."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+def cache_key(text: str, model: str) -> str:
+    # The model is part of the key so switching classifiers does not reuse old verdicts
+    return hashlib.sha256(f"{model}\0{normalise(text)}".encode("utf-8")).hexdigest()
+
+class VerdictCache:
+    def __init__(self, max_size: int = REVIEW_GUARD_CACHE_SIZE, ttl_seconds: int = REVIEW_GUARD_CACHE_TTL_SECONDS,
+                 db_path: Optional[str] = REVIEW_GUARD_CACHE_DB or None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()  # key -> (expires_at, verdict)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS review_verdicts ("
+                " key TEXT PRIMARY KEY, verdict_ok INTEGER NOT NULL, code TEXT NOT NULL,"
+                " reason TEXT, expires_at REAL NOT NULL)"
+            )
+            self._db = db
+        return self._db
+
+    def _remember(self, key: str, expires_at: float, verdict: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, verdict)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """The cached verdict for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return dict(entry[1])
+                del self._entries[key]
+
+        if not self.db_path:
+            return None
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT verdict_ok, code, reason, expires_at FROM review_verdicts WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+        if row is None:
+            return None
+        verdict = {"ok": bool(row[0]), "code": row[1]}
+        if row[2] is not None:
+            verdict["reason"] = row[2]
+        self._remember(key, row[3], verdict)
+        return dict(verdict)
+
+    def put(self, key: str, verdict: Dict[str, Any]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, dict(verdict))
+        if not self.db_path:
+            return
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO review_verdicts (key, verdict_ok, code, reason, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (key, int(verdict["ok"]), verdict["code"], verdict.get("reason"), expires_at),
+            )
+
+    def purge_expired(self) -> int:
+        """Drops expired rows from the persistent tier. Returns how many were removed."""
+        if not self.db_path:
+            return 0
+        with self._db_lock:
+            return self._connection().execute("DELETE FROM review_verdicts WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            with self._db_lock:
+                self._connection().execute("DELETE FROM review_verdicts")
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -2,8 +2,6 @@ import uuid
 import os
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -129,6 +127,10 @@ def send_password_reset_email(email: str, token: str, username: str):
     """
     # --- END UPDATED HTML CONTENT ---
     
+    # Imported here: the SendGrid SDK is only needed when an email is actually sent
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
     message = Mail(
         from_email=SENDGRID_SENDER_EMAIL,
         to_emails=email,
@@ -1,6 +1,5 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
 import logging
@@ -44,6 +43,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
     logging.info(f"Final JWT Payload (to_encode): {to_encode}")
     
+    from jose import jwt  # python-jose (and its crypto backend) loads on first use, not at startup
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     try:
@@ -62,6 +63,8 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     Decodes and validates a JWT access token.
     """
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -0,0 +1,162 @@
+"""
+Async OneMap client for use inside FastAPI's event loop.
+
+Compared to the blocking helpers in onemap_token_manager, this client:
+- reuses one httpx.AsyncClient, i.e. a keep-alive connection pool, per process
+- refreshes the token single-flight: while one refresh is in flight, every
+  other caller awaits it instead of requesting its own token
+- coalesces identical in-flight lookups, so a burst of requests for the same
+  point costs one upstream call
+
+The base URL is configurable (ONEMAP_BASE_URL) so the client can be pointed
+at a local stub server in tests and benchmarks.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import httpx
+
+from app.utils import onemap_token_manager as token_cache
+
+ONEMAP_BASE_URL = os.getenv("ONEMAP_BASE_URL", "https://www.onemap.gov.sg")
+TOKEN_PATH = "/api/auth/post/getToken"
+PLANNING_AREA_PATH = "/api/public/popapi/getPlanningarea"
+
+MAX_CONNECTIONS = int(os.getenv("ONEMAP_MAX_CONNECTIONS", "20"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("ONEMAP_TIMEOUT_SECONDS", "10"))
+
+# Same rounding as the offline planning-area index, so both memoise alike
+COORD_PRECISION = 4
+
+class OneMapError(Exception):
+    """Raised when OneMap cannot be reached or rejects our credentials."""
+
+class OneMapClient:
+    def __init__(
+        self,
+        base_url: str = ONEMAP_BASE_URL,
+        email: Optional[str] = None,
+        password: Optional[str] = None,
+        max_connections: int = MAX_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        use_file_cache: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._email = email if email is not None else token_cache.ONEMAP_EMAIL
+        self._password = password if password is not None else token_cache.ONEMAP_PASSWORD
+        self._use_file_cache = use_file_cache
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self._token: Optional[str] = None
+        self._token_expiry: int = 0
+        self._token_lock = asyncio.Lock()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # --- Token handling ---
+
+    def _token_valid(self) -> bool:
+        return bool(self._token) and self._token_expiry > time.time() + token_cache.SAFETY_BUFFER_SECONDS
+
+    async def get_token(self, rejected: Optional[str] = None) -> str:
+        """
+        Returns a valid token, refreshing it at most once across concurrent callers.
+        Pass the token OneMap just rejected (401) to force it to be replaced.
+        """
+        if self._token_valid() and self._token != rejected:
+            return self._token
+
+        async with self._token_lock:
+            # Whoever held the lock before us may already have refreshed it
+            if self._token_valid() and self._token != rejected:
+                return self._token
+
+            if rejected is None and self._use_file_cache and not self._token:
+                self._token, self._token_expiry = token_cache._read_token_cache()
+                if self._token_valid():
+                    return self._token
+
+            await self._refresh_token()
+            return self._token
+
+    async def _refresh_token(self) -> None:
+        if not self._email or not self._password:
+            raise OneMapError("OneMap credentials (EMAIL/PASSWORD) not set in backend environment variables.")
+        try:
+            response = await self._http.post(TOKEN_PATH, json={"email": self._email, "password": self._password})
+            response.raise_for_status()
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise OneMapError(f"Failed to fetch OneMap token: {e}") from e
+
+        token = data.get("access_token")
+        try:
+            expiry = int(data.get("expiry_timestamp"))
+        except (TypeError, ValueError):
+            expiry = 0
+        if not token:
+            raise OneMapError("New token response did not contain required fields.")
+
+        self._token, self._token_expiry = token, expiry
+        if self._use_file_cache:
+            token_cache._write_token_cache(token, expiry)
+
+    # --- Requests ---
+
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Any:
+        """Authenticated GET; on a 401 the token is refreshed (single-flight) and the call retried once."""
+        token = await self.get_token()
+        try:
+            response = await self._http.get(path, params=params, headers={"Authorization": token})
+            if response.status_code == 401:
+                token = await self.get_token(rejected=token)
+                response = await self._http.get(path, params=params, headers={"Authorization": token})
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise OneMapError(f"OneMap request to {path} failed: {e}") from e
+
+    async def _coalesced(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Runs fetch() once per key at a time; concurrent callers with the same key share its result."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield() so one caller being cancelled does not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def get_planning_area(self, latitude: float, longitude: float) -> Optional[str]:
+        """Returns OneMap's raw planning area name (e.g. "YISHUN") for a point, or None."""
+        lat, lng = round(latitude, COORD_PRECISION), round(longitude, COORD_PRECISION)
+
+        async def fetch():
+            data = await self._get_json(PLANNING_AREA_PATH, {"latitude": lat, "longitude": lng})
+            if data and isinstance(data, list) and data[0].get("pln_area_n"):
+                return data[0]["pln_area_n"]
+            return None
+
+        return await self._coalesced(("planning_area", lat, lng), fetch)
+
+_shared_client: Optional[OneMapClient] = None
+
+def get_onemap_client() -> OneMapClient:
+    """Returns the process-wide client (created lazily inside the running event loop)."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = OneMapClient()
+    return _shared_client
+
+async def close_onemap_client() -> None:
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -1,4 +1,3 @@
-import requests
 import time
 import os
 import json
@@ -66,6 +65,8 @@ def _get_new_onemap_token() -> dict:
         # NOTE: This error requires fixing your backend's .env file
         raise ValueError("OneMap credentials (EMAIL/PASSWORD) not set in backend environment variables.")
 
+    import requests  # only needed on a token refresh
+
     payload = {"email": ONEMAP_EMAIL, "password": ONEMAP_PASSWORD}
     headers = {"Content-Type": "application/json"}
     response = requests.post(ONEMAP_TOKEN_URL, headers=headers, data=json.dumps(payload))
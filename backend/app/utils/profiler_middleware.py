@@ -1,4 +1,3 @@
-from pyinstrument import Profiler
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.requests import Request
 from starlette.responses import Response
@@ -20,7 +19,8 @@ class PyInstrumentProfilerMiddleware(BaseHTTPMiddleware):
         if "profile" not in request.query_params or request.query_params["profile"].lower() != "true":
             return await call_next(request)
 
-        # 2. Start the profiler
+        # 2. Start the profiler (pyinstrument is only imported once profiling is actually requested)
+        from pyinstrument import Profiler
         profiler = Profiler(async_mode="enabled")
         
         with profiler:
@@ -0,0 +1,154 @@
+"""
+EXPLAIN QUERY PLAN audit for the queries the routes issue.
+
+Each entry below mirrors a filter used by a controller or route. The audit
+asks SQLite for the plan of every statement and reports the tables it would
+read with a full "SCAN" instead of an index "SEARCH". A handful of queries
+are full listings by design (e.g. every hawker centre, index rebuilds); they
+are marked so their scans are expected.
+
+Run manually with:  python -m app.utils.query_plan_audit
+(exits with status 1 if an unexpected full-table scan is found)
+Set QUERY_PLAN_AUDIT=true to also log the report at startup.
+"""
+import os
+import re
+import sys
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import and_, exists, select, tuple_
+from sqlalchemy.engine import Engine
+
+from app.models.business_model import Business
+from app.models.consumer_model import Consumer
+from app.models.favourite_model import Favourite
+from app.models.hawker_centre_model import HawkerCentre
+from app.models.menu_item_model import MenuItem
+from app.models.operating_hour_model import OperatingHour
+from app.models.rating_aggregate_model import RatingAggregate
+from app.models.review_model import Review
+from app.models.user_model import User
+
+QUERY_PLAN_AUDIT = os.getenv("QUERY_PLAN_AUDIT", "false").lower() == "true"
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(?!CONSTANT ROW|\d+ CONSTANT ROWS)(\w+)")
+
+class AuditedQuery(NamedTuple):
+    name: str
+    statement: object
+    full_scan_expected: bool = False
+
+def audited_queries() -> List[AuditedQuery]:
+    """Representative statements for every query shape the routes run (bind values are placeholders)."""
+    biz = Business.__table__.c
+    agg = RatingAggregate.__table__
+    return [
+        # --- reviews (review_controller) ---
+        AuditedQuery("reviews for target", select(Review).where(
+            Review.target_type == "business", Review.target_id == 1
+        ).order_by(Review.created_at.desc())),
+        AuditedQuery("reviews for consumer", select(Review).where(
+            Review.consumer_id == 1
+        ).order_by(Review.created_at.desc())),
+        AuditedQuery("review upsert lookup", select(Review).where(
+            Review.consumer_id == 1, Review.target_type == "business", Review.target_id == 1
+        )),
+        AuditedQuery("review by id and owner", select(Review).where(
+            Review.id == 1, Review.consumer_id == 1
+        )),
+        AuditedQuery("rating aggregate", select(RatingAggregate).where(
+            RatingAggregate.target_type == "business", RatingAggregate.target_id == 1
+        )),
+
+        # --- favourites (favourite_controller) ---
+        AuditedQuery("is favourite", select(exists().where(and_(
+            Favourite.consumer_id == 1, Favourite.target_type == "business", Favourite.target_id == 1
+        )))),
+        AuditedQuery("favourites for consumer", select(Favourite).where(Favourite.consumer_id == 1)),
+        AuditedQuery("favourites among targets", select(Favourite.target_type, Favourite.target_id).where(
+            Favourite.consumer_id == 1,
+            tuple_(Favourite.target_type, Favourite.target_id).in_([("business", 1), ("stall", 2)]),
+        )),
+
+        # --- users / businesses ---
+        AuditedQuery("consumer by id", select(Consumer).where(Consumer.id == 1)),
+        AuditedQuery("user by email", select(User).where(User.email == "a@example.com")),
+        AuditedQuery("user by reset token", select(User).where(User.reset_token == "token")),
+        AuditedQuery("business by license", select(Business).where(Business.license_number == "L1")),
+        AuditedQuery("operating hours for day", select(OperatingHour).where(
+            OperatingHour.license_number == "L1", OperatingHour.day == "Monday"
+        )),
+        AuditedQuery("menu items for business", select(MenuItem).where(MenuItem.license_number == "L1")),
+        AuditedQuery("menu item by id", select(MenuItem).where(MenuItem.id == 1)),
+
+        # --- stalls (stall_route) ---
+        AuditedQuery("stall page", select(biz.id, agg.c.rating_sum, agg.c.rating_count)
+            .select_from(Business.__table__)
+            .outerjoin(agg, and_(agg.c.target_type == "business", agg.c.target_id == biz.id))
+            .where(biz.id > 0).order_by(biz.id).limit(50)),
+        AuditedQuery("stall by id", select(biz.id).where(biz.id == 1)),
+
+        # --- hawker centres (hawker_route) ---
+        AuditedQuery("hawker by id", select(HawkerCentre).where(HawkerCentre.id == 1)),
+        AuditedQuery("all hawker centres", select(HawkerCentre), full_scan_expected=True),
+
+        # --- in-memory index rebuilds (read whole tables on purpose) ---
+        AuditedQuery("open-hours index rebuild", select(OperatingHour), full_scan_expected=True),
+        AuditedQuery("rating aggregate rebuild", select(
+            Review.target_type, Review.target_id, Review.star_rating
+        ), full_scan_expected=True),
+    ]
+
+def explain(engine: Engine, statement) -> List[str]:
+    """Returns the EXPLAIN QUERY PLAN detail lines for a statement."""
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return [row[-1] for row in rows]
+
+def run_audit(engine: Engine) -> List[Dict]:
+    """
+    Explains every audited query. Each result has `name`, `plan` (detail lines),
+    `scans` (tables read with a full scan) and `unexpected` (scans not marked as expected).
+    Returns [] on non-SQLite databases, whose EXPLAIN output differs.
+    """
+    if engine.dialect.name != "sqlite":
+        return []
+
+    results = []
+    for query in audited_queries():
+        plan = explain(engine, query.statement)
+        scans = [m.group(1) for m in (_SCAN_RE.match(line) for line in plan) if m]
+        results.append({
+            "name": query.name,
+            "plan": plan,
+            "scans": scans,
+            "unexpected": [] if query.full_scan_expected else scans,
+        })
+    return results
+
+def print_report(results: List[Dict]) -> int:
+    """Prints the audit and returns the number of queries with unexpected full-table scans."""
+    flagged = 0
+    for result in results:
+        if result["unexpected"]:
+            flagged += 1
+            status = f"FULL SCAN ({', '.join(result['unexpected'])})"
+        else:
+            status = "ok"
+        print(f"[query-plan] {result['name']}: {status}")
+        for line in result["plan"]:
+            print(f"    {line}")
+    print(f"[query-plan] {len(results)} queries audited, {flagged} with unexpected full-table scans")
+    return flagged
+
+def main():
+    from app.database import Base, engine
+    from app.migrations import ensure_indexes
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    flagged = print_report(run_audit(engine))
+    sys.exit(1 if flagged else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Shared loader for the SFA stall workbooks (SFA/centres_output/*.xlsx).
+
+openpyxl parsing dominates every tool that reads these files, so workbooks
+are parsed in parallel across a ProcessPoolExecutor. Each worker also maps
+the file's headers onto one canonical set of columns (the exports disagree:
+"Licence Number" / "License_No" / "license_number", ...), so callers get a
+single DataFrame with the same columns and types whichever file a row came
+from. Rows keep the order of the input files.
+
+Used by app/assets/database_seed/seed_db.py, SFA/query_directory.py and
+SFA/fetch_stall_images.py.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+# 0 or unset = one worker per CPU
+SFA_LOADER_WORKERS = int(os.getenv("SFA_LOADER_WORKERS", "0")) or (os.cpu_count() or 1)
+
+# Canonical column -> header aliases seen across the SFA exports (matched case-insensitively)
+COLUMN_ALIASES = {
+    "license_number": ("Licence Number", "license_number", "License_No", "License Number"),
+    "stall_name": ("Business Name", "Stall_Name", "stall_name"),
+    "licensee_name": ("Licensee Name", "Licensee_Name", "licensee_name"),
+    "establishment_address": ("Establishment Address", "Establishment_Address", "establishment_address"),
+    "postal_code": ("Postal Code", "Postal_Code", "postal_code"),
+    "business_type": ("Type of Food Business", "Business_Type", "business_type"),
+}
+COLUMNS = [*COLUMN_ALIASES, "hawker_centre", "source_file"]
+
+_ALIAS_LOOKUP = {
+    alias.lower(): column for column, aliases in COLUMN_ALIASES.items() for alias in aliases
+}
+
+# (workbook path, hawker centre name or None to infer it from the file)
+Source = Tuple[str, Optional[str]]
+
+def as_text(series: pd.Series) -> pd.Series:
+    """Strings with surrounding whitespace removed; integral numbers (e.g. postal codes read as floats) without ".0"; blanks as NA."""
+    def convert(value):
+        if pd.isna(value):
+            return pd.NA
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        value = str(value).strip()
+        return value if value else pd.NA
+    return series.map(convert).astype("string")
+
+def _hawker_centre_from(df: pd.DataFrame, path: str) -> str:
+    """The file's own "Hawker Centre" column if it has one, else the name after the postal code in the filename."""
+    for col in df.columns:
+        if str(col).strip().lower() == "hawker centre":
+            values = df[col].dropna().astype(str).str.strip()
+            if len(values) > 0:
+                return values.iloc[0]
+    parts = Path(path).stem.split("_", 1)
+    return parts[1] if len(parts) > 1 else parts[0]
+
+def normalise_frame(df: pd.DataFrame, path: str, hawker_centre: Optional[str] = None) -> pd.DataFrame:
+    """Maps one workbook's columns onto COLUMNS. For each canonical column the first alias present wins."""
+    present = {}
+    for col in df.columns:
+        column = _ALIAS_LOOKUP.get(str(col).strip().lower())
+        if column and column not in present:
+            present[column] = col
+
+    out = pd.DataFrame(index=df.index)
+    for column in COLUMN_ALIASES:
+        out[column] = as_text(df[present[column]]) if column in present else pd.Series(pd.NA, index=df.index, dtype="string")
+    out["hawker_centre"] = pd.Series(hawker_centre or _hawker_centre_from(df, path), index=df.index, dtype="string")
+    out["source_file"] = pd.Series(str(path), index=df.index, dtype="string")
+    return out
+
+def read_workbook(path: str, hawker_centre: Optional[str] = None) -> pd.DataFrame:
+    """Parses and normalises a single workbook (or CSV)."""
+    if str(path).lower().endswith(".csv"):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path, engine="openpyxl")
+    return normalise_frame(df, path, hawker_centre)
+
+def _read_source(source: Source) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    """Worker entry point: (frame, None) on success, (None, reason) if the file cannot be read."""
+    path, hawker_centre = source
+    try:
+        return read_workbook(path, hawker_centre), None
+    except FileNotFoundError:
+        return None, "not found"
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def load_workbooks(
+    sources: Iterable[Union[str, Path, Source]],
+    max_workers: Optional[int] = None,
+    on_error: Optional[Callable[[str, str], None]] = None,
+) -> pd.DataFrame:
+    """
+    Loads many workbooks into one DataFrame with COLUMNS, parsing them in parallel.
+    `sources` are paths or (path, hawker centre) pairs. Unreadable files are skipped
+    and reported through on_error(path, reason).
+    """
+    normalised: List[Source] = [
+        (str(s[0]), s[1]) if isinstance(s, tuple) else (str(s), None) for s in sources
+    ]
+    workers = min(max_workers or SFA_LOADER_WORKERS, len(normalised))
+
+    if workers <= 1:
+        results = [_read_source(source) for source in normalised]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() keeps input order, so "first occurrence" stays deterministic for callers
+            results = list(executor.map(_read_source, normalised, chunksize=max(1, len(normalised) // (workers * 4))))
+
+    frames = []
+    for (path, _), (frame, error) in zip(normalised, results):
+        if error is not None:
+            if on_error:
+                on_error(path, error)
+            continue
+        frames.append(frame)
+
+    if not frames:
+        return pd.DataFrame({column: pd.Series(dtype="string") for column in COLUMNS})
+    return pd.concat(frames, ignore_index=True)
+
+def index_sources(index_file_path: str) -> List[Source]:
+    """(workbook path, hawker centre) pairs for every well-formed entry of SFA/index.json."""
+    sfa_dir = os.path.dirname(index_file_path)
+    with open(index_file_path, "r", encoding="utf-8") as f:
+        index_data = json.load(f)
+    return [
+        (os.path.join(sfa_dir, entry["file"]), entry["hawker_centre"])
+        for entry in index_data
+        if entry.get("file") and entry.get("hawker_centre")
+    ]
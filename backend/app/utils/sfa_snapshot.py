@@ -0,0 +1,143 @@
+"""
+Columnar snapshot of the SFA dataset.
+
+index.json, SFA-Scrape/hawker_centres.csv and every workbook listed in the
+index are compiled into Arrow IPC files named after a SHA-256 of the source
+files' contents:
+
+    <snapshot dir>/sfa-<hash>.stalls.arrow
+    <snapshot dir>/sfa-<hash>.hawker_centres.arrow
+
+load_snapshot() re-hashes the sources (a few MB, milliseconds) and reads the
+matching snapshot memory-mapped, rebuilding it only when an input changed.
+Without pyarrow installed it falls back to parsing the sources directly.
+
+Build manually with:  python -m app.utils.sfa_snapshot [--force]
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from app.utils import sfa_loader
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # optional dependency
+    pa = None
+
+HAWKER_CENTRES_CSV = os.path.join("SFA-Scrape", "hawker_centres.csv")
+
+class SfaData(NamedTuple):
+    stalls: pd.DataFrame           # sfa_loader.COLUMNS, source_file relative to the SFA dir
+    hawker_centres: pd.DataFrame   # hawker_centres.csv as read by pandas
+
+def _sfa_dir(index_file_path: str) -> str:
+    return os.path.dirname(os.path.abspath(index_file_path))
+
+def snapshot_dir(sfa_dir: str) -> str:
+    return os.getenv("SFA_SNAPSHOT_DIR") or os.path.join(sfa_dir, ".snapshot")
+
+def source_files(index_file_path: str) -> List[str]:
+    """Every file the snapshot is compiled from, relative to the SFA dir, in a stable order."""
+    sfa_dir = _sfa_dir(index_file_path)
+    with open(index_file_path, "r", encoding="utf-8") as f:
+        index_data = json.load(f)
+    workbooks = sorted({entry["file"] for entry in index_data if entry.get("file") and entry.get("hawker_centre")})
+    files = [os.path.basename(index_file_path), HAWKER_CENTRES_CSV, *workbooks]
+    return [f for f in files if os.path.exists(os.path.join(sfa_dir, f))]
+
+def content_hash(index_file_path: str) -> str:
+    """SHA-256 over the names and bytes of the source files; changes whenever any input does."""
+    sfa_dir = _sfa_dir(index_file_path)
+    digest = hashlib.sha256()
+    for relative in source_files(index_file_path):
+        digest.update(relative.replace(os.sep, "/").encode())
+        digest.update(b"\0")
+        with open(os.path.join(sfa_dir, relative), "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def _snapshot_paths(directory: str, key: str) -> Tuple[str, str]:
+    prefix = os.path.join(directory, f"sfa-{key}")
+    return f"{prefix}.stalls.arrow", f"{prefix}.hawker_centres.arrow"
+
+def read_sources(index_file_path: str) -> SfaData:
+    """Parses the SFA sources directly (workbooks in parallel)."""
+    sfa_dir = _sfa_dir(index_file_path)
+
+    def report(path, reason):
+        print(f"  Skipping: Error reading Excel file {path}: {reason}")
+
+    stalls = sfa_loader.load_workbooks(sfa_loader.index_sources(index_file_path), on_error=report)
+    # Store paths as they appear in index.json, so the snapshot does not depend on where SFA/ lives
+    stalls["source_file"] = stalls["source_file"].map(
+        lambda p: os.path.relpath(p, sfa_dir).replace(os.sep, "/"), na_action="ignore"
+    ).astype("string")
+    hawker_centres = pd.read_csv(os.path.join(sfa_dir, HAWKER_CENTRES_CSV))
+    return SfaData(stalls, hawker_centres)
+
+def _write_arrow(df: pd.DataFrame, path: str) -> None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    # Uncompressed IPC file, so readers can memory-map it without copying
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)  # atomic: concurrent readers never see a partial file
+
+def _read_arrow(path: str) -> pd.DataFrame:
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+def build_snapshot(index_file_path: str, force: bool = False) -> Optional[str]:
+    """Compiles the snapshot for the current inputs unless it already exists. Returns its hash (None without pyarrow)."""
+    if pa is None:
+        return None
+    key = content_hash(index_file_path)
+    directory = snapshot_dir(_sfa_dir(index_file_path))
+    stalls_path, centres_path = _snapshot_paths(directory, key)
+    if not force and os.path.exists(stalls_path) and os.path.exists(centres_path):
+        return key
+
+    data = read_sources(index_file_path)
+    os.makedirs(directory, exist_ok=True)
+    _write_arrow(data.stalls, stalls_path)
+    _write_arrow(data.hawker_centres, centres_path)
+
+    # Drop snapshots of older inputs
+    for name in os.listdir(directory):
+        if name.startswith("sfa-") and not name.startswith(f"sfa-{key}."):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return key
+
+def load_snapshot(index_file_path: str) -> SfaData:
+    """The SFA dataset, read memory-mapped from the snapshot for the current inputs (built on demand)."""
+    key = build_snapshot(index_file_path)
+    if key is None:
+        return read_sources(index_file_path)
+
+    stalls_path, centres_path = _snapshot_paths(snapshot_dir(_sfa_dir(index_file_path)), key)
+    stalls = _read_arrow(stalls_path)
+    # Arrow round-trips the loader's columns as object; restore the typed frame callers expect
+    stalls = stalls.astype({column: "string" for column in sfa_loader.COLUMNS})
+    return SfaData(stalls, _read_arrow(centres_path))
+
+def main():
+    default_index = os.path.join(os.path.dirname(__file__), "..", "..", "SFA", "index.json")
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    index_file_path = os.path.abspath(args[0] if args else default_index)
+    if pa is None:
+        print("pyarrow is not installed; nothing to build (the SFA sources are read directly).")
+        sys.exit(1)
+    key = build_snapshot(index_file_path, force="--force" in sys.argv)
+    print(f"SFA snapshot {key} in {snapshot_dir(_sfa_dir(index_file_path))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Throughput of batch moderation against the local OpenAI stand-in.
+
+Classifies the same backlog of distinct reviews (corpus texts made unique,
+local tier and cache off, so every review needs the LLM) with:
+
+  single      one review per request, one request at a time (what calling
+              guard_review_text in a loop costs)
+  batched     REVIEW_BATCH_SIZE reviews per request, one at a time
+  concurrent  batched, with --concurrency requests in flight under --rate
+
+Stand-in latency is --latency per request plus --per-review-latency per
+review in it (see benchmarks/openai_stub.py).
+
+Usage (from backend/):
+    python -m benchmarks.batch_moderation_bench --reviews 100 --batch-size 20 --concurrency 4 --rate 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import batch_moderation as bm
+from app.services import local_classifier, review_guard
+from app.services.verdict_cache import VerdictCache
+from benchmarks import openai_stub
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reviews", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=bm.REVIEW_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=bm.REVIEW_BATCH_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=bm.REVIEW_BATCH_REQUESTS_PER_SECOND, help="requests per second")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--per-review-latency", type=float, default=0.005)
+    args = parser.parse_args()
+
+    server, base_url = openai_stub.serve(latency=args.latency, per_review_latency=args.per_review_latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    local_classifier.REVIEW_GUARD_LOCAL_CLEAN_BELOW, local_classifier.REVIEW_GUARD_LOCAL_RUDE_ABOVE = 0.0, 1.0
+
+    corpus = local_classifier.read_corpus()
+    texts = [f"{corpus[i % len(corpus)][0]} (#{i})" for i in range(args.reviews)]
+    expected = [openai_stub.label(text) for text in texts]
+
+    runs = {
+        "single": dict(batch_size=1, concurrency=1, requests_per_second=0),
+        "batched": dict(batch_size=args.batch_size, concurrency=1, requests_per_second=0),
+        "concurrent": dict(batch_size=args.batch_size, concurrency=args.concurrency, requests_per_second=args.rate),
+    }
+    print(f"{args.reviews} reviews; stand-in latency {args.latency * 1000:.0f} ms "
+          f"+ {args.per_review_latency * 1000:.0f} ms/review\n")
+    print(f"{'run':<12}{'requests':>9}{'seconds':>9}{'reviews/s':>11}{'errors':>8}{'agree':>8}")
+    try:
+        for name, options in runs.items():
+            review_guard.verdict_cache = VerdictCache(db_path=None)
+            verdicts, stats = asyncio.run(bm.classify_texts(texts, **options))
+            agree = sum(v == review_guard.verdict_for_label(label) for v, label in zip(verdicts, expected))
+            print(f"{name:<12}{stats.requests:>9}{stats.seconds:>9.2f}{len(texts) / stats.seconds:>11.1f}"
+                  f"{stats.errors:>8}{agree / len(texts):>8.0%}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold-start import cost of the API, measured with `python -X importtime`.
+
+Each run imports app.main in a fresh interpreter and parses the
+per-module timings CPython writes to stderr. Reported per run set:
+
+  total   cumulative import time of app.main (best and median of the runs)
+  top     the slowest top-level packages it pulled in
+  lazy    LAZY_MODULES that were imported even though they should only load
+          on first use (pandas for seeding, the OpenAI SDK for review checks, ...)
+
+Exits non-zero when the best run exceeds IMPORT_TIME_BUDGET_MS or a lazy
+module was imported; test/test_import_time.py enforces the same budget.
+
+Usage (from backend/):
+    python -m benchmarks.import_time_bench --runs 5 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Budget for the best of several runs, in milliseconds
+IMPORT_TIME_BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+
+# Heavy dependencies that must not be imported just to serve requests
+LAZY_MODULES = (
+    "pandas", "numpy", "pyarrow", "openpyxl", "openai", "pyinstrument",
+    "passlib", "argon2", "sendgrid", "requests", "jose",
+)
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+class ModuleTime(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 = imported directly by the measured statement
+
+def parse_importtime(stderr: str) -> List[ModuleTime]:
+    """The `-X importtime` lines of stderr, in the order CPython printed them."""
+    modules = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            modules.append(ModuleTime(m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return modules
+
+def measure(module: str = "app.main") -> List[ModuleTime]:
+    """Imports `module` in a fresh interpreter and returns its import timings."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def total_ms(modules: List[ModuleTime], module: str = "app.main") -> float:
+    return next(m.cumulative_us for m in modules if m.name == module and m.depth == 0) / 1000
+
+def top_level_packages(modules: List[ModuleTime], exclude: str = "app") -> Dict[str, float]:
+    """Milliseconds per top-level package (other than `exclude`), counting each package's outermost imports only."""
+    totals: Dict[str, float] = {}
+    ancestors: List[str] = []  # package of each enclosing import, outermost first
+    # CPython prints a module after everything it imported, so walk backwards to meet parents first
+    for m in reversed(modules):
+        package = m.name.split(".")[0]
+        del ancestors[m.depth:]
+        if package not in ancestors and package != exclude:
+            totals[package] = totals.get(package, 0.0) + m.cumulative_us / 1000
+        ancestors.append(package)
+    return totals
+
+def lazy_modules_imported(modules: List[ModuleTime]) -> List[str]:
+    names = {m.name.split(".")[0] for m in modules}
+    return [name for name in LAZY_MODULES if name in names]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--module", default="app.main")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    totals = [total_ms(r, args.module) for r in runs]
+    best = runs[totals.index(min(totals))]
+
+    print(f"import {args.module}: best {min(totals):.0f} ms, median {statistics.median(totals):.0f} ms "
+          f"over {args.runs} runs (budget {IMPORT_TIME_BUDGET_MS} ms)")
+    print("\nSlowest top-level packages (best run):")
+    for package, ms in sorted(top_level_packages(best).items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {package}")
+
+    lazy = lazy_modules_imported(best)
+    print(f"\nLazy modules imported at startup: {', '.join(lazy) or 'none'}")
+    if lazy or min(totals) > IMPORT_TIME_BUDGET_MS:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Local stand-in for the OpenAI Responses endpoint the review guard calls.
+
+Labels reviews offline with the review guard's word lists, so the guard and
+batch moderation can be run and benchmarked without an API key:
+
+  sensitive.txt phrase         POLICY_VIOLATION
+  profanity and <= 5 words     NON_CONSTRUCTIVE_RUDE
+  anything else                CONSTRUCTIVE
+
+A prompt with "[i] text" lines gets one "[i] LABEL" line back per review, as
+batch_moderation asks for; anything else gets a single label. Each response
+takes --latency seconds plus --per-review-latency per review, roughly how
+output length drives a real model's response time.
+
+Usage (from backend/):
+    python -m benchmarks.openai_stub --port 8011
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 OPENAI_API_KEY=stub python -m app.services.batch_moderation
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import local_classifier as lc
+
+_TAGGED_RE = re.compile(r"^\[(\d+)\] (.*)$", re.M)
+
+_profanity = lc.PhraseMatcher.from_file(lc.PROFANITY_PATH)
+_sensitive = lc.PhraseMatcher.from_file(lc.SENSITIVE_PATH)
+
+def label(text: str) -> str:
+    tokens = lc.tokenise(text)
+    if _sensitive.find(tokens):
+        return "POLICY_VIOLATION"
+    if _profanity.find(tokens) and len(tokens) <= 5:
+        return "NON_CONSTRUCTIVE_RUDE"
+    return "CONSTRUCTIVE"
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.2
+    per_review_latency = 0.01
+    requests = 0
+    reviews = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/responses"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        user_text = "\n".join(m["content"] for m in body.get("input", []) if m.get("role") == "user")
+
+        tagged = _TAGGED_RE.findall(user_text)
+        if tagged:
+            output = "\n".join(f"[{i}] {label(text)}" for i, text in tagged)
+        else:
+            output = label(user_text.removeprefix("Review: "))
+        cls = type(self)
+        with cls._count_lock:
+            cls.requests += 1
+            cls.reviews += max(len(tagged), 1)
+        time.sleep(cls.latency + cls.per_review_latency * max(len(tagged), 1))
+
+        payload = json.dumps({
+            "id": f"resp_{cls.requests}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model"),
+            "status": "completed",
+            "output": [{
+                "type": "message", "id": f"msg_{cls.requests}", "role": "assistant", "status": "completed",
+                "content": [{"type": "output_text", "text": output, "annotations": []}],
+            }],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def serve(port: int = 0, latency: float = StubHandler.latency,
+          per_review_latency: float = StubHandler.per_review_latency) -> Tuple[ThreadingHTTPServer, str]:
+    """Starts the stub on a background thread; returns the server and its OPENAI_BASE_URL."""
+    handler = type("Handler", (StubHandler,), {"latency": latency, "per_review_latency": per_review_latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Responses endpoint.")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", type=float, default=StubHandler.latency)
+    parser.add_argument("--per-review-latency", type=float, default=StubHandler.per_review_latency)
+    args = parser.parse_args()
+    server, base_url = serve(args.port, args.latency, args.per_review_latency)
+    print(f"Serving at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Accuracy and throughput of the review guard's local tier.
+
+Runs the labelled corpus (by default only the held-out split the shipped
+model never saw) through:
+
+  regex  the previous net: a profanity regex plus a "short or no detail
+         words" check. It can only block; everything else went to the LLM.
+  local  app.services.local_classifier: phrase tries plus the hashed
+         logistic regression, deciding clean or rude when confident
+
+and reports how many reviews each decides without the LLM, how accurate
+those decisions are, and the time per review.
+
+Usage (from backend/):
+    python -m benchmarks.review_guard_bench [--all] [--repeat 200] [--clean-below 0.1] [--rude-above 0.9]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import local_classifier as lc
+
+_PROFANITY_RE = re.compile(r"\b(dogshit|trash|shit|fuck|idiot|wtf|garbage)\b", re.IGNORECASE)
+_DETAIL_RE = re.compile(r"\b(" + "|".join(sorted(lc.DETAIL_WORDS)) + r")\b", re.IGNORECASE)
+
+def regex_net(text):
+    if _PROFANITY_RE.search(text) and (len(text) < 40 or not _DETAIL_RE.search(text)):
+        return lc.RUDE
+    return lc.ESCALATE
+
+def evaluate(decide, rows):
+    """Counts of decisions against the labels, for one pass over `rows`."""
+    stats = {"decided": 0, "correct": 0, "false_blocks": 0, "missed_rude": 0}
+    for text, rude in rows:
+        decision = decide(text)
+        if decision == lc.ESCALATE:
+            continue
+        stats["decided"] += 1
+        if (decision == lc.RUDE) == bool(rude):
+            stats["correct"] += 1
+        elif decision == lc.RUDE:
+            stats["false_blocks"] += 1
+        else:
+            stats["missed_rude"] += 1
+    return stats
+
+def time_per_review_us(decide, rows, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text, _ in rows:
+            decide(text)
+    return (time.perf_counter() - started) / (repeat * len(rows)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--all", action="store_true", help="evaluate on the whole corpus, not just the held-out split")
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the rows when timing")
+    parser.add_argument("--clean-below", type=float, default=lc.REVIEW_GUARD_LOCAL_CLEAN_BELOW)
+    parser.add_argument("--rude-above", type=float, default=lc.REVIEW_GUARD_LOCAL_RUDE_ABOVE)
+    args = parser.parse_args()
+
+    rows = [r for r in lc.read_corpus() if args.all or lc.is_held_out(r[0])]
+    tier = lc.get_tier()
+    strategies = {
+        "regex": regex_net,
+        "local": lambda text: tier.classify(text, args.clean_below, args.rude_above).decision,
+    }
+    print(f"{len(rows)} reviews ({sum(r for _, r in rows)} rude), "
+          f"{'whole corpus' if args.all else 'held-out split'}; "
+          f"local thresholds clean<{args.clean_below} rude>{args.rude_above}\n")
+    print(f"{'strategy':<9}{'decided':>9}{'accuracy':>10}{'false blocks':>14}{'missed rude':>13}{'us/review':>11}{'reviews/s':>11}")
+    for name, decide in strategies.items():
+        stats = evaluate(decide, rows)
+        us = time_per_review_us(decide, rows, args.repeat)
+        accuracy = stats["correct"] / stats["decided"] if stats["decided"] else float("nan")
+        print(f"{name:<9}{stats['decided'] / len(rows):>9.1%}{accuracy:>10.1%}{stats['false_blocks']:>14}"
+              f"{stats['missed_rude']:>13}{us:>11.1f}{1e6 / us:>11,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-call cost of the file-backed review store at scale.
+
+Writes a reviews.csv of --reviews rows spread over --targets targets, then
+times, on a ReviewStore over it:
+
+  load              first call (parse the snapshot, build the indexes)
+  list_for_target   newest-first listing of one target
+  avg_rating        from the running totals
+  create / update   one appended change each (plus catching up on the log)
+  compact           folding --reviews rows back into reviews.csv
+
+"full scan" is one csv.DictReader pass over the file, which is what every
+call (and every write, plus a full rewrite) cost before the store was
+log-structured.
+
+Usage (from backend/):
+    python -m benchmarks.review_store_bench --reviews 300000 --targets 5000
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.review_store import CSV_HEADERS, ReviewStore
+
+def write_reviews(path, reviews, targets):
+    rng = random.Random(0)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(CSV_HEADERS)
+        for i in range(1, reviews + 1):
+            writer.writerow([i, rng.randrange(reviews // 10 + 1), "business", rng.randrange(targets), rng.randint(1, 5),
+                             "Good food, generous portion, friendly stall owner", "", "2025-10-05T08:06:14Z",
+                             "2025-10-05T08:06:14Z"])
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reviews", type=int, default=300_000)
+    parser.add_argument("--targets", type=int, default=5_000)
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reviews.csv")
+        write_reviews(path, args.reviews, args.targets)
+
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as f:
+            sum(1 for _ in csv.DictReader(f))
+        full_scan = time.perf_counter() - started
+
+        store = ReviewStore(path, compact_after=10**9)
+        started = time.perf_counter()
+        store.avg_rating("business", 0)
+        load = time.perf_counter() - started
+
+        results = {
+            "list_for_target": per_call_us(lambda i: store.list_for_target("business", i % args.targets), args.calls),
+            "avg_rating": per_call_us(lambda i: store.avg_rating("business", i % args.targets), args.calls),
+            "create": per_call_us(lambda i: store.create(1, "business", i % args.targets, 4, "Nice", None), args.calls),
+            "update": per_call_us(lambda i: store.update(args.reviews + i + 1, 1, 5, None, None), args.calls),
+        }
+        started = time.perf_counter()
+        store.compact()
+        compact = time.perf_counter() - started
+
+    print(f"{args.reviews:,} reviews over {args.targets:,} targets\n")
+    print(f"full scan (old per-call cost)  {full_scan * 1000:9.1f} ms")
+    print(f"load (once per process)        {load * 1000:9.1f} ms")
+    for name, us in results.items():
+        print(f"{name:<31}{us:9.1f} us")
+    print(f"compact                        {compact * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Read/write throughput of the SQLite performance profile under concurrent workers.
+
+Each worker is a separate process with its own engine, like a uvicorn
+worker, and loops over the review queries the API runs: listing reviews for
+a stall (read) and inserting a review then bumping its rating aggregate
+(write). The same run is repeated against a fresh database file for:
+
+  baseline  SQLite defaults (rollback journal, synchronous=FULL), as before
+  tuned     app.database.SQLITE_PRAGMAS (WAL, synchronous=NORMAL, mmap, ...)
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_profile_bench --workers 4 --seconds 5 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, SQLITE_PRAGMAS, apply_sqlite_pragmas
+from app.models import (  # noqa: F401
+    user_model, consumer_model, favourite_model, review_model, hawker_centre_model,
+    business_model, operating_hour_model, menu_item_model, rating_aggregate_model
+)
+from app.models.consumer_model import Consumer
+from app.models.rating_aggregate_model import RatingAggregate
+from app.models.review_model import Review
+
+PROFILES = {
+    "baseline": {},
+    "tuned": SQLITE_PRAGMAS,
+}
+
+N_TARGETS = 200
+N_CONSUMERS = 50
+SEED_REVIEWS = 5000
+
+def make_engine(path, pragmas):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    if pragmas:
+        apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+def seed(path, pragmas):
+    engine = make_engine(path, pragmas)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(N_CONSUMERS):
+        session.add(Consumer(email=f"bench{i}@example.com", hashed_password="x", username=f"bench{i}", user_type="consumer"))
+    session.flush()
+    rng = random.Random(0)
+    session.add_all([
+        Review(consumer_id=rng.randint(1, N_CONSUMERS), target_type="business", target_id=rng.randint(1, N_TARGETS),
+               star_rating=rng.randint(1, 5), description="Seeded review")
+        for _ in range(SEED_REVIEWS)
+    ])
+    session.add_all([RatingAggregate(target_type="business", target_id=t) for t in range(1, N_TARGETS + 1)])
+    session.commit()
+    session.close()
+    engine.dispose()
+
+def worker(path, pragmas, seconds, write_ratio, seed_value, results):
+    engine = make_engine(path, pragmas)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    rng = random.Random(seed_value)
+    reads = writes = errors = 0
+    deadline = time.perf_counter() + seconds
+
+    while time.perf_counter() < deadline:
+        target_id = rng.randint(1, N_TARGETS)
+        session = Session()
+        try:
+            if rng.random() < write_ratio:
+                stars = rng.randint(1, 5)
+                session.add(Review(consumer_id=rng.randint(1, N_CONSUMERS), target_type="business",
+                                   target_id=target_id, star_rating=stars, description="Bench review"))
+                session.execute(update(RatingAggregate).where(
+                    RatingAggregate.target_type == "business", RatingAggregate.target_id == target_id
+                ).values(rating_sum=RatingAggregate.rating_sum + stars, rating_count=RatingAggregate.rating_count + 1))
+                session.commit()
+                writes += 1
+            else:
+                session.query(Review).filter(
+                    Review.target_type == "business", Review.target_id == target_id
+                ).order_by(Review.created_at.desc()).all()
+                reads += 1
+        except OperationalError:
+            # "database is locked" after the busy timeout
+            session.rollback()
+            errors += 1
+        finally:
+            session.close()
+
+    engine.dispose()
+    results.put((reads, writes, errors))
+
+def run_profile(name, pragmas, workers, seconds, write_ratio):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, pragmas)
+
+        results = mp.Queue()
+        procs = [mp.Process(target=worker, args=(path, pragmas, seconds, write_ratio, i, results)) for i in range(workers)]
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+
+    reads = sum(t[0] for t in totals)
+    writes = sum(t[1] for t in totals)
+    errors = sum(t[2] for t in totals)
+    print(f"{name:<9} reads/s={reads / seconds:>9.1f}  writes/s={writes / seconds:>8.1f}  locked errors={errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--profile", choices=["baseline", "tuned", "both"], default="both")
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.seconds}s each, write ratio {args.write_ratio}")
+    names = list(PROFILES) if args.profile == "both" else [args.profile]
+    for name in names:
+        run_profile(name, PROFILES[name], args.workers, args.seconds, args.write_ratio)
+
+if __name__ == "__main__":
+    main()
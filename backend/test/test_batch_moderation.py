@@ -0,0 +1,181 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import business_model, favourite_model, menu_item_model, operating_hour_model
+from app.models.consumer_model import Consumer
+from app.models.review_model import Review
+from app.controllers import review_controller as ctrl
+from app.services import batch_moderation as bm
+from app.services import local_classifier, review_guard
+from app.services.verdict_cache import VerdictCache
+from benchmarks import openai_stub
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Local OpenAI stand-in, reached through OPENAI_BASE_URL like a real deployment would."""
+    server, base_url = openai_stub.serve(latency=0.05, per_review_latency=0)
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(review_guard, "verdict_cache", VerdictCache(db_path=None))
+    # Send everything to the stand-in; the local tier has its own tests
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", 0.0)
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_RUDE_ABOVE", 1.0)
+    yield server.RequestHandlerClass
+    server.shutdown()
+
+TEXTS = [
+    "The laksa was too salty and we waited 30 minutes.",
+    "shit food",
+    "Nice satay but I will stab the owner",
+    "THE LAKSA was too salty   and we waited 30 minutes.",
+    "Chicken rice was fragrant, auntie was friendly.",
+]
+
+
+# Test Case 1: Reviews are packed one per line with index tags; labels are read back by index
+def test_case_1_pack_and_parse():
+    assert bm.pack(["first\nline", "second"]) == "[1] first line\n[2] second"
+    output = "[2] NON_CONSTRUCTIVE_RUDE\n1: constructive\n[3] OTHER\n[3] POLICY_VIOLATION\n[9] OTHER"
+    assert bm.parse_labels(output, 4) == ["CONSTRUCTIVE", "NON_CONSTRUCTIVE_RUDE", None, None]
+
+
+# Test Case 2: Distinct texts are classified in batches against the stand-in
+def test_case_2_batches_against_stub(llm):
+    verdicts, stats = asyncio.run(bm.classify_texts(TEXTS * 3, batch_size=2, concurrency=2, requests_per_second=0))
+
+    assert [v["code"] for v in verdicts[:5]] == ["ok", "blocked_rude", "blocked_moderation", "ok", "ok"]
+    assert verdicts[5:10] == verdicts[:5]
+    assert (stats.classified, stats.duplicates, stats.requests, stats.errors) == (4, 11, 2, 0)
+    assert llm.reviews == 4
+
+    # Classified texts are cached, so a second run sends nothing
+    _, stats = asyncio.run(bm.classify_texts(TEXTS))
+    assert (stats.screened, stats.requests) == (5, 0)
+
+
+# Test Case 3: Reviews missing from an answer are retried in a smaller batch
+def test_case_3_retries_missing_labels(monkeypatch):
+    monkeypatch.setattr(review_guard, "verdict_cache", VerdictCache(db_path=None))
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", 0.0)
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_RUDE_ABOVE", 1.0)
+    sizes = []
+
+    async def create(**kwargs):
+        lines = kwargs["input"][1]["content"].splitlines()
+        sizes.append(len(lines))
+        # The first answer forgets the last review
+        answered = lines[:-1] if len(sizes) == 1 else lines
+        return SimpleNamespace(output_text="\n".join(f"[{i}] CONSTRUCTIVE" for i in range(1, len(answered) + 1)))
+
+    async def close():
+        pass
+    client = SimpleNamespace(responses=SimpleNamespace(create=create), close=close)
+    texts = [f"Review number {i} about the noodles" for i in range(8)]
+    verdicts, stats = asyncio.run(bm.classify_texts(texts, batch_size=8, client=client))
+
+    assert sizes == [8, 1]
+    assert all(v["ok"] for v in verdicts) and stats.errors == 0
+
+
+# Test Case 4: The backlog job writes verdicts back in bulk and updates aggregates
+def test_case_4_moderate_backlog(llm, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i, text in enumerate(TEXTS[:3], start=1):
+        db.add(Consumer(email=f"c{i}@example.com", hashed_password="x", username=f"c{i}", user_type="consumer"))
+        db.add(Review(consumer_id=i, target_type="business", target_id=1, star_rating=i + 2,
+                      description=text, status="pending"))
+    db.add(Review(consumer_id=1, target_type="business", target_id=2, star_rating=5, description="Old", status="published"))
+    db.commit()
+
+    report = bm.moderate_backlog(db, scope="pending", batch_size=10, requests_per_second=0)
+
+    assert report.counts == {"published": 1, "rejected": 2, "unchanged": 0, "stale": 0}
+    assert report.stats.requests == 1
+    statuses = dict(db.query(Review.description, Review.status))
+    assert statuses == {TEXTS[0]: "published", TEXTS[1]: "rejected", TEXTS[2]: "rejected", "Old": "published"}
+    assert ctrl.get_avg_rating(db, "business", 1)["count"] == 1
+
+    # A review edited after it was classified keeps its newer state
+    review_id = db.query(Review.id).filter(Review.description == TEXTS[0]).scalar()
+    db.query(Review).filter(Review.id == review_id).update({"description": "Edited"})
+    db.commit()
+    counts = ctrl.apply_moderation_verdicts(db, [(review_id, TEXTS[0], {"ok": False, "code": "blocked_rude"})])
+    assert counts["stale"] == 1
+    db.close()
+    engine.dispose()
+
+
+# Test Case 5: Re-moderating with --no-cache bypasses the local tier as well as the cache
+def test_case_5_no_cache_skips_local_tier(llm, monkeypatch):
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", 0.1)
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_RUDE_ABOVE", 0.9)
+    texts = [TEXTS[0], TEXTS[1]]  # decided locally: clean and rude
+
+    _, stats = asyncio.run(bm.classify_texts(texts, requests_per_second=0))
+    assert (stats.screened, stats.requests) == (2, 0)
+
+    _, stats = asyncio.run(bm.classify_texts(texts, requests_per_second=0, use_local_tier=False))
+    assert (stats.screened, stats.classified, stats.requests) == (0, 2, 1)
+
+    options = []
+    monkeypatch.setattr(bm, "moderate_backlog", lambda db, **kwargs: options.append(kwargs) or bm.BacklogReport(stats, {}))
+    monkeypatch.setattr("app.database.SessionLocal", lambda: SimpleNamespace(close=lambda: None))
+    for argv in (["--scope", "all", "--no-cache"], ["--no-local"], []):
+        bm.main(argv)
+    assert [(o["use_cache"], o["use_local_tier"]) for o in options] == [(False, False), (True, False), (True, True)]
+
+
+# Test Case 6: The rate limiter spaces out request starts
+def test_case_6_rate_limiter():
+    async def burst():
+        limiter = bm.RateLimiter(rate=20)
+        started = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+        return time.monotonic() - started
+
+    assert 0.18 <= asyncio.run(burst()) < 1.0
+
+
+# Test Case 7: Bulk verdicts apply aggregate deltas, skipping reviews another writer moderated meanwhile
+def test_case_7_verdict_deltas(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i, (stars, status) in enumerate(((5, "published"), (3, "published"), (4, "pending")), start=1):
+        db.add(Consumer(email=f"c{i}@example.com", hashed_password="x", username=f"c{i}", user_type="consumer"))
+        db.add(Review(id=i, consumer_id=i, target_type="business", target_id=1, star_rating=stars,
+                      description=f"review {i}", status=status))
+    db.commit()
+    ctrl.rebuild_rating_aggregates(db)
+    monkeypatch.setattr(ctrl, "rebuild_rating_aggregates", lambda db: pytest.fail("full rebuild on the batch path"))
+
+    execute = db.execute
+    def racing_execute(statement, params=None, **kwargs):
+        if isinstance(params, list):  # the bulk UPDATE: review 2 is rejected by someone else first
+            db.query(Review).filter(Review.id == 2).update({"status": "rejected", "moderation_code": "blocked_moderation"})
+            ctrl._apply_rating_change(db, "business", 1, 3, None)
+        return execute(statement, params, **kwargs)
+    monkeypatch.setattr(db, "execute", racing_execute)
+
+    verdicts = [(1, "review 1", {"ok": False, "code": "blocked_rude"}),
+                (2, "review 2", {"ok": False, "code": "blocked_rude"}),
+                (3, "review 3", {"ok": True, "code": "ok"})]
+    assert ctrl.apply_moderation_verdicts(db, verdicts) == {"published": 1, "rejected": 2, "unchanged": 0, "stale": 0}
+
+    monkeypatch.setattr(db, "execute", execute)
+    assert dict(db.query(Review.id, Review.moderation_code)) == {1: "blocked_rude", 2: "blocked_moderation", 3: "ok"}
+    result = ctrl.get_avg_rating(db, "business", 1)
+    assert (result["average_rating"], result["count"]) == (4.0, 1)
+    db.close()
+    engine.dispose()
+
+# python -m pytest test/test_batch_moderation.py
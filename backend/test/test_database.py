@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.database import Base, apply_sqlite_pragmas, make_engine
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import (
+    user_model, consumer_model, favourite_model, review_model, hawker_centre_model,
+    business_model, operating_hour_model, menu_item_model, rating_aggregate_model
+)
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+# Test Case 1: The connect hook applies the performance profile to every new connection
+def test_case_1_profile_applied(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    apply_sqlite_pragmas(engine, {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": "1234",
+        "cache_size": "-2048", "temp_store": "MEMORY",
+    })
+
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "busy_timeout") == 1234
+    assert _pragma(engine, "cache_size") == -2048
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+    engine.dispose()
+
+
+# Test Case 2: Empty values leave SQLite's defaults untouched
+def test_case_2_empty_values_skipped(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'defaults.db'}")
+    apply_sqlite_pragmas(engine, {"journal_mode": "", "synchronous": ""})
+
+    assert _pragma(engine, "journal_mode") == "delete"
+    assert _pragma(engine, "synchronous") == 2  # FULL
+    engine.dispose()
+
+
+# Test Case 3: make_engine applies the pragma profile to SQLite URLs
+def test_case_3_make_engine_sqlite(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    assert _pragma(engine, "journal_mode") == "wal"
+    engine.dispose()
+
+
+# Test Case 4: Every table compiles for PostgreSQL, with enums stored as plain VARCHARs
+def test_case_4_models_compile_for_postgresql():
+    dialect = postgresql.dialect()
+    ddl = "\n".join(str(CreateTable(t).compile(dialect=dialect)) for t in Base.metadata.sorted_tables)
+
+    assert "status VARCHAR(6)" in ddl
+    assert "cuisinetype" not in ddl and "stallstatus" not in ddl
+
+# python -m pytest test/test_database.py
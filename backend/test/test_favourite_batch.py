@@ -0,0 +1,88 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import business_model, favourite_model, menu_item_model, operating_hour_model, review_model
+from app.models.consumer_model import Consumer
+from app.schemas.favourite_schema import FavouriteBatchIn, FavouriteIn
+from app.controllers import favourite_controller as ctrl
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture
+def db_session(engine):
+    session = sessionmaker(bind=engine, autoflush=False)()
+    for i in (1, 2):
+        session.add(Consumer(email=f"c{i}@example.com", hashed_password="x", username=f"c{i}", user_type="consumer"))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements run against favourites, as they are executed."""
+    seen = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "favourites" in statement:
+            seen.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", record)
+
+def _batch(*targets):
+    return FavouriteBatchIn(targets=[FavouriteIn(target_type=t, target_id=i) for t, i in targets])
+
+
+# Test Case 1: The membership bitmap follows request order and costs one query
+def test_case_1_bitmap_in_one_query(db_session, statements):
+    for target in (FavouriteIn(target_type="stall", target_id=3), FavouriteIn(target_type="business", target_id=1)):
+        ctrl.add_favourite(db_session, 1, target)
+    ctrl.add_favourite(db_session, 2, FavouriteIn(target_type="stall", target_id=4))
+    statements.clear()
+
+    targets = [("business", 1), ("stall", 1), ("stall", 3), ("stall", 4), ("business", 3), ("stall", 3)]
+    result = ctrl.are_favourites(db_session, 1, _batch(*targets))
+
+    assert result == {"is_favourite": [True, False, True, False, False, True]}
+    assert len(statements) == 1
+
+
+# Test Case 2: Bulk add and remove report per target and commit once
+def test_case_2_bulk_add_remove(db_session):
+    ctrl.add_favourite(db_session, 1, FavouriteIn(target_type="business", target_id=1))
+    commits = []
+    event.listen(db_session, "after_commit", lambda session: commits.append(1))
+
+    added = ctrl.add_favourites(db_session, 1, _batch(("business", 1), ("stall", 2), ("stall", 2), ("hawkercentre", 5)))
+    assert [r["action"] for r in added["results"]] == ["exists", "added", "added", "added"]
+    assert sorted((f.target_type, f.target_id) for f in ctrl.list_favourites(db_session, 1)) == \
+        [("business", 1), ("hawkercentre", 5), ("stall", 2)]
+
+    removed = ctrl.remove_favourites(db_session, 1, _batch(("stall", 2), ("business", 9), ("hawkercentre", 5)))
+    assert [r["action"] for r in removed["results"]] == ["removed", "not_found", "removed"]
+    assert [(f.target_type, f.target_id) for f in ctrl.list_favourites(db_session, 1)] == [("business", 1)]
+    assert len(commits) == 2
+
+
+# Test Case 3: Unknown consumers and empty or oversized batches are rejected
+def test_case_3_validation(db_session):
+    with pytest.raises(HTTPException) as exc:
+        ctrl.are_favourites(db_session, 99, _batch(("stall", 1)))
+    assert exc.value.status_code == 404
+
+    with pytest.raises(ValidationError):
+        FavouriteBatchIn(targets=[])
+    with pytest.raises(ValidationError):
+        _batch(*[("stall", i) for i in range(201)])
+
+# python -m pytest test/test_favourite_batch.py
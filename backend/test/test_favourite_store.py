@@ -0,0 +1,61 @@
+import shutil
+
+import pytest
+
+from app.services import favourite_store
+from app.services.favourite_store import FavouriteStore
+
+@pytest.fixture
+def path(tmp_path):
+    # Start from the shipped favourites.csv, without touching it
+    copy = tmp_path / "favourites.csv"
+    shutil.copy(favourite_store.FAV_CSV, copy)
+    return str(copy)
+
+
+# Test Case 1: Adds and removes append to the log; the snapshot is not rewritten
+def test_case_1_append_only(path):
+    store = FavouriteStore(path)
+    with open(path) as f:
+        snapshot = f.read()
+
+    assert store.is_favourite(2, "business", 1)
+    assert store.add(7, "business", 10) and store.add(7, "hawker", 3)
+    assert not store.add(7, "business", 10)
+    assert store.remove(2, "business", 1) and not store.remove(2, "business", 1)
+
+    assert [(r["target_type"], r["target_id"]) for r in store.list_by_consumer(7)] == [("business", "10"), ("hawker", "3")]
+    assert not store.is_favourite(2, "business", 1)
+    with open(path) as f:
+        assert f.read() == snapshot
+    assert store.log.log_records == 3
+
+
+# Test Case 2: Compaction folds the log into the snapshot without changing the contents
+def test_case_2_compaction(path):
+    store = FavouriteStore(path, compact_after=5)
+    for target_id in range(6):
+        store.add(9, "business", target_id)
+    store.remove(9, "business", 0)
+
+    assert store.log.log_records == 2  # compacted after the 5th change
+    reloaded = FavouriteStore(path)
+    assert reloaded.list_by_consumer(9) == store.list_by_consumer(9)
+    assert [r["target_id"] for r in reloaded.list_by_consumer(9)] == ["1", "2", "3", "4", "5"]
+    assert reloaded.is_favourite(3, "business", 55)
+
+
+# Test Case 3: Instances sharing the files (e.g. two workers) see each other's writes and compactions
+def test_case_3_shared_files(path):
+    a, b = FavouriteStore(path, compact_after=3), FavouriteStore(path, compact_after=3)
+    assert a.add(5, "business", 1)
+    assert b.is_favourite(5, "business", 1)
+    assert not b.add(5, "business", 1)
+
+    b.remove(5, "business", 1)
+    b.add(5, "business", 2)  # third change: b compacts
+    assert not a.is_favourite(5, "business", 1)
+    assert a.is_favourite(5, "business", 2)
+    assert len(a.list_by_consumer(3)) == 2
+
+# python -m pytest test/test_favourite_store.py
@@ -0,0 +1,112 @@
+import multiprocessing
+import shutil
+import threading
+import time
+
+import pytest
+
+from app.services import csv_log, favourite_store, review_store
+from app.services.favourite_store import FavouriteStore
+from app.services.review_store import ReviewStore
+
+PROCESSES, THREADS, OPS = 4, 2, 40
+
+@pytest.fixture(autouse=True)
+def no_fsync(monkeypatch):
+    # Durability is not under test here; forked workers inherit the setting
+    monkeypatch.setattr(csv_log, "FILE_STORE_FSYNC", False)
+
+def _in_threads(work, *args):
+    threads = [threading.Thread(target=work, args=(*args, t)) for t in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def _favourite_worker(path, worker):
+    store = FavouriteStore(path, compact_after=25)
+
+    def work(store, thread):
+        consumer = 1000 + worker * THREADS + thread
+        for target_id in range(OPS):
+            assert store.add(consumer, "business", target_id)
+            if target_id % 4 == 0:
+                assert store.remove(consumer, "business", target_id)
+    _in_threads(work, store)
+
+def _review_worker(path, worker):
+    store = ReviewStore(path, compact_after=25)
+
+    def work(store, thread):
+        consumer = 1000 + worker * THREADS + thread
+        for n in range(OPS):
+            row = store.create(consumer, "hawker", 1, n % 5 + 1, f"review {n}", None)
+            if n % 5 == 0:
+                assert store.delete(int(row["id"]), consumer)
+    _in_threads(work, store)
+    store.wait_for_compaction()
+
+def _run(target, path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=target, args=(path, w)) for w in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=120)
+    assert [worker.exitcode for worker in workers] == [0] * PROCESSES
+
+
+# Test Case 1: Processes writing one favourites file at once lose nothing, across compactions
+def test_case_1_favourites_across_processes(tmp_path):
+    path = str(tmp_path / "favourites.csv")
+    shutil.copy(favourite_store.FAV_CSV, path)
+    before = FavouriteStore(path)
+    shipped = {c: before.list_by_consumer(c) for c in range(1, 10)}
+
+    _run(_favourite_worker, path)
+
+    store = FavouriteStore(path)
+    expected = [str(t) for t in range(OPS) if t % 4]
+    for consumer in range(1000, 1000 + PROCESSES * THREADS):
+        assert [r["target_id"] for r in store.list_by_consumer(consumer)] == expected
+    assert {c: store.list_by_consumer(c) for c in range(1, 10)} == shipped
+
+
+# Test Case 2: Processes creating reviews at once never share an id or lose a review
+def test_case_2_reviews_across_processes(tmp_path):
+    path = str(tmp_path / "reviews.csv")
+    shutil.copy(review_store.REVIEWS_CSV, path)
+    shipped = len(ReviewStore(path).list_for_target("hawker", 1))
+
+    _run(_review_worker, path)
+
+    store = ReviewStore(path)
+    rows = store.list_for_target("hawker", 1)
+    created = [r for r in rows if int(r["consumer_id"]) >= 1000]
+    assert len(created) == PROCESSES * THREADS * OPS * 4 // 5
+    assert len({r["id"] for r in rows}) == len(rows) == shipped + len(created)
+    for consumer in range(1000, 1000 + PROCESSES * THREADS):
+        assert sorted(r["description"] for r in store.list_for_consumer(consumer)) == \
+            sorted(f"review {n}" for n in range(OPS) if n % 5)
+
+
+# Test Case 3: Writers that queue behind a commit are appended together (group commit)
+def test_case_3_group_commit(tmp_path):
+    store = FavouriteStore(str(tmp_path / "favourites.csv"))
+    store.is_favourite(1, "business", 1)  # create the files
+
+    with store._lock:  # stall the first writer's commit while the others queue up
+        threads = [threading.Thread(target=store.add, args=(t, "business", 1)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        while len(store._queue) < 7:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join()
+
+    assert store.log.appends == 2
+    assert store.log.log_records == 8
+    reloaded = FavouriteStore(store.log.snapshot_path)
+    assert all(reloaded.is_favourite(t, "business", 1) for t in range(8))
+
+# python -m pytest test/test_file_store_concurrency.py
@@ -0,0 +1,88 @@
+import asyncio
+import math
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_async_engine
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import business_model, consumer_model, favourite_model, menu_item_model, operating_hour_model, review_model
+from app.models.hawker_centre_model import HawkerCentre
+from app.services import hawker_geo_index as geo
+
+CENTRES = [
+    {"id": 1, "name": "Maxwell Food Centre", "latitude": 1.2803, "longitude": 103.8448},
+    {"id": 2, "name": "Amoy Street Food Centre", "latitude": 1.2793, "longitude": 103.8466},
+    {"id": 3, "name": "Newton Food Centre", "latitude": 1.3120, "longitude": 103.8390},
+    {"id": 4, "name": "Yishun Park Hawker Centre", "latitude": 1.4222, "longitude": 103.8390},
+    {"id": 5, "name": "Missing Coordinates", "latitude": None, "longitude": None},
+]
+
+@pytest.fixture(autouse=True)
+def built_index():
+    geo.build([dict(c) for c in CENTRES])
+    yield
+    geo.build([])
+    geo.invalidate()
+
+def _brute_force_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    return 2 * geo.EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+# Test Case 1: Results are the k nearest, nearest first, with distances
+def test_case_1_k_nearest():
+    results = geo.nearest(1.2800, 103.8450, k=3)
+
+    assert [r["id"] for r in results] == [1, 2, 3]
+    for r in results:
+        assert r["distance_m"] == pytest.approx(_brute_force_m(1.2800, 103.8450, r["latitude"], r["longitude"]), abs=0.1)
+
+
+# Test Case 2: radius_m drops centres that are out of range
+def test_case_2_radius_filter():
+    results = geo.nearest(1.2800, 103.8450, k=10, radius_m=1000)
+
+    assert [r["id"] for r in results] == [1, 2]
+
+
+# Test Case 3: Centres without coordinates are never indexed, and an empty radius returns nothing
+def test_case_3_edges():
+    assert 5 not in [r["id"] for r in geo.nearest(1.35, 103.82, k=10)]
+    assert geo.nearest(1.0, 104.5, k=5, radius_m=100) == []
+
+
+# Test Case 4: ensure_loaded_async reads the table and builds the index off the event loop thread
+def test_case_4_async_build_in_worker_thread(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'hawkers.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(HawkerCentre(id=9, name="Tiong Bahru Market", address="addr", latitude=1.2850, longitude=103.8320))
+        session.commit()
+    engine.dispose()
+
+    build, threads = geo.build, []
+    def recording_build(centres):
+        threads.append(threading.current_thread())
+        build(centres)
+    monkeypatch.setattr(geo, "build", recording_build)
+
+    async def run():
+        async_engine = make_async_engine(url)
+        try:
+            async with AsyncSession(async_engine) as db:
+                geo.invalidate()
+                await geo.ensure_loaded_async(db)
+                await geo.ensure_loaded_async(db)  # fresh: no second build
+        finally:
+            await async_engine.dispose()
+    asyncio.run(run())
+
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+    assert [r["name"] for r in geo.nearest(1.2850, 103.8320, k=5)] == ["Tiong Bahru Market"]
+
+# python -m pytest test/test_hawker_geo_index.py
@@ -0,0 +1,30 @@
+from benchmarks import import_time_bench as bench
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     numpy.core
+import time:        50 |        150 |   numpy
+import time:       200 |        200 |     sqlalchemy.orm
+import time:        10 |        210 |   sqlalchemy
+import time:         5 |        365 | app.main
+"""
+
+
+# Test Case 1: -X importtime output is parsed and attributed to top-level packages once
+def test_case_1_parses_importtime():
+    modules = bench.parse_importtime(SAMPLE)
+
+    assert bench.total_ms(modules) == 0.365
+    assert bench.top_level_packages(modules) == {"numpy": 0.15, "sqlalchemy": 0.21}
+    assert bench.lazy_modules_imported(modules) == ["numpy"]
+
+
+# Test Case 2: Importing the API stays within budget and loads no heavy dependency eagerly
+def test_case_2_app_import_budget():
+    runs = [bench.measure("app.main") for _ in range(3)]
+    best = min(runs, key=bench.total_ms)
+
+    assert bench.lazy_modules_imported(best) == []
+    assert bench.total_ms(best) <= bench.IMPORT_TIME_BUDGET_MS
+
+# python -m pytest test/test_import_time.py
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import local_classifier as lc
+from app.services import review_guard
+from app.services.verdict_cache import VerdictCache
+
+
+# Test Case 1: Phrases match whole words only, including multi-word and obfuscated spellings
+def test_case_1_phrase_matcher():
+    matcher = lc.PhraseMatcher(["shit", "f*ck", "burn down", "kill yourself", "kill"])
+
+    assert matcher.find(lc.tokenise("SH1T food, f*ck this")) == ["shit", "f*ck"]
+    assert matcher.find(lc.tokenise("They should burn down the stall")) == ["burn down"]
+    assert matcher.find(lc.tokenise("go kill yourself")) == ["kill", "kill yourself"]
+    assert matcher.find(lc.tokenise("shiitake mushrooms, killer sambal, burnt down to a crisp")) == []
+
+
+# Test Case 2: The shipped model decides clear-cut reviews and escalates sensitive ones
+def test_case_2_shipped_model_decisions():
+    tier = lc.LocalTier.load()
+
+    # Accepting locally is opt-in
+    assert tier.classify("The laksa was too salty and we waited 30 minutes for it.").decision == lc.ESCALATE
+    assert tier.classify("The laksa was too salty and we waited 30 minutes for it.", clean_below=0.1).decision == lc.CLEAN
+    assert tier.classify("shit food, shit stall").decision == lc.RUDE
+    assert tier.classify("sh1t stall, idiots").decision == lc.RUDE
+    threat = tier.classify("Nice chicken rice but I will kill the owner")
+    assert (threat.decision, threat.matches) == (lc.ESCALATE, ("kill",))
+    # Thresholds of 0 and 1 turn local decisions off
+    assert tier.classify("shit food, shit stall", clean_below=0.0, rude_above=1.0).decision == lc.ESCALATE
+
+
+# Test Case 3: Training is deterministic and the saved model round-trips
+def test_case_3_train_and_reload(tmp_path):
+    rows = [r for r in lc.read_corpus() if not lc.is_held_out(r[0])]
+    path = str(tmp_path / "model.json")
+    lc.train(rows).save(path)
+
+    shipped, retrained = lc.LocalTier.load(), lc.LocalTier.load(path)
+    for text, _ in lc.read_corpus()[:50]:
+        assert retrained.score(text)[0] == pytest.approx(shipped.score(text)[0], abs=1e-4)
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """Texts sent to a fake LLM that labels everything POLICY_VIOLATION."""
+    calls = []
+    client = SimpleNamespace(responses=SimpleNamespace(
+        create=lambda **kwargs: calls.append(kwargs["input"][-1]["content"]) or SimpleNamespace(output_text="POLICY_VIOLATION")))
+    monkeypatch.setattr(review_guard, "get_client", lambda: client)
+    monkeypatch.setattr(review_guard, "verdict_cache", VerdictCache(db_path=None))
+    return calls
+
+
+# Test Case 4: With local accepts opted in, only escalated reviews reach the LLM
+def test_case_4_guard_skips_llm_for_local_decisions(monkeypatch, llm_calls):
+    monkeypatch.setattr(lc, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", 0.1)
+
+    assert review_guard.guard_review_text("Char kway teow was very oily and the uncle forgot my order.")["ok"] is True
+    assert review_guard.guard_review_text("fucking idiots")["code"] == "blocked_rude"
+    assert llm_calls == []
+    assert review_guard.guard_review_text("The duck rice was fine. Stab the owner.")["code"] == "blocked_moderation"
+    assert len(llm_calls) == 1
+
+
+# Test Case 5: Policy violations the food-review model scores as clean still go to the LLM
+@pytest.mark.parametrize("clean_below", [lc.REVIEW_GUARD_LOCAL_CLEAN_BELOW, 0.1])
+@pytest.mark.parametrize("text", [
+    "make him pay, I know where he lives",                                   # threat
+    "Chicken rice ok. Lonely tonight? Sexy girls, whatsapp 9123 4567",      # sexual solicitation
+    "Nice laksa but the owner is from that dirty race",                      # hate
+    "Cheap eats guide at www.makan-deals.com, visit now",                    # spam link
+    "Great food, more reviews at http://bit.ly/makan",                       # spam link
+    "Good service, email me at deals@promo.sg for vouchers",                 # spam email
+])
+def test_case_5_policy_violations_escalate(monkeypatch, llm_calls, text, clean_below):
+    monkeypatch.setattr(lc, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", clean_below)
+
+    assert lc.LocalTier.load().classify(text, clean_below=clean_below).decision == lc.ESCALATE
+    assert review_guard.guard_review_text(text)["code"] == "blocked_moderation"
+    assert llm_calls == [f"Review: {text}"]
+
+
+# Test Case 6: Harsh but specific complaints are never rejected locally
+@pytest.mark.parametrize("text", [
+    "Useless queue system, waited 30 minutes for a plate of rice",
+    "Pathetic portion for $6, only three prawns",
+    "The chilli is rubbish compared to last year, too sweet now",
+    "Trash bins overflowing near the stall, please clean",
+    "Garbage collection area smells",
+    "Shit service, the staff ignored us for 20 minutes",
+])
+def test_case_6_complaints_not_rejected_locally(text):
+    assert lc.LocalTier.load().classify(text).decision == lc.ESCALATE
+
+# python -m pytest test/test_local_classifier.py
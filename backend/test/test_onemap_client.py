@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.utils.onemap_client import OneMapClient, OneMapError
+
+class _StubOneMap(BaseHTTPRequestHandler):
+    """Minimal local stand-in for the two OneMap endpoints the client uses."""
+    token_calls = 0
+    lookup_calls = 0
+    reject_token = None   # a token the stub answers 401 for
+    latency = 0.05
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        cls = type(self)
+        cls.token_calls += 1
+        time.sleep(cls.latency)
+        self._send(200, {"access_token": f"token-{cls.token_calls}", "expiry_timestamp": int(time.time()) + 3 * 86400})
+
+    def do_GET(self):
+        cls = type(self)
+        if self.headers.get("Authorization") == cls.reject_token:
+            return self._send(401, {"error": "expired"})
+        cls.lookup_calls += 1
+        time.sleep(cls.latency)
+        lat = float(parse_qs(urlparse(self.path).query)["latitude"][0])
+        self._send(200, [{"pln_area_n": "YISHUN" if lat > 1.4 else "BUKIT MERAH"}])
+
+@pytest.fixture
+def stub_server():
+    handler = type("Handler", (_StubOneMap,), {})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield handler, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+
+def _client(base_url):
+    return OneMapClient(base_url=base_url, email="test@example.com", password="pw", use_file_cache=False)
+
+
+# Test Case 1: A burst of identical lookups costs one token fetch and one upstream call
+def test_case_1_coalesces_identical_lookups(stub_server):
+    handler, base_url = stub_server
+
+    async def run():
+        client = _client(base_url)
+        try:
+            return await asyncio.gather(*[client.get_planning_area(1.42, 103.83) for _ in range(20)])
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+
+    assert results == ["YISHUN"] * 20
+    assert handler.token_calls == 1
+    assert handler.lookup_calls == 1
+
+
+# Test Case 2: Distinct lookups run concurrently but share a single token refresh
+def test_case_2_single_flight_token(stub_server):
+    handler, base_url = stub_server
+
+    async def run():
+        client = _client(base_url)
+        try:
+            return await asyncio.gather(*[client.get_planning_area(1.30 + i / 1000, 103.83) for i in range(10)])
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+
+    assert results == ["BUKIT MERAH"] * 10
+    assert handler.token_calls == 1
+    assert handler.lookup_calls == 10
+
+
+# Test Case 3: A 401 replaces the rejected token once and retries
+def test_case_3_refreshes_rejected_token(stub_server):
+    handler, base_url = stub_server
+    handler.reject_token = "token-1"
+
+    async def run():
+        client = _client(base_url)
+        try:
+            return await asyncio.gather(*[client.get_planning_area(1.42, 103.80 + i / 1000) for i in range(5)])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == ["YISHUN"] * 5
+    assert handler.token_calls == 2
+
+
+# Test Case 4: Missing credentials surface as OneMapError
+def test_case_4_missing_credentials(stub_server):
+    _, base_url = stub_server
+
+    async def run():
+        client = OneMapClient(base_url=base_url, email="", password="", use_file_cache=False)
+        try:
+            await client.get_planning_area(1.42, 103.83)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(OneMapError):
+        asyncio.run(run())
+
+# python -m pytest test/test_onemap_client.py
@@ -0,0 +1,149 @@
+import pytest
+from datetime import datetime, time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import consumer_model, favourite_model, review_model, menu_item_model
+from app.models.business_model import Business
+from app.models.operating_hour_model import OperatingHour
+from app.services import open_hours_index as idx
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        idx._schedules = {}
+        idx._days = {}
+        idx._businesses = {}
+        idx._buckets = [frozenset()] * idx.BUCKET_COUNT
+        idx._status_open = [frozenset()] * 7
+        idx.invalidate()
+
+def _minute(day_offset: int, hh: int, mm: int) -> int:
+    return day_offset * idx.MINUTES_PER_DAY + hh * 60 + mm
+
+
+# Test Case 1: minute_of_week counts from Monday 00:00
+def test_case_1_minute_of_week():
+    assert idx.minute_of_week(datetime(2025, 1, 6, 0, 0)) == 0  # Monday
+    assert idx.minute_of_week(datetime(2025, 1, 12, 23, 59)) == idx.MINUTES_PER_WEEK - 1  # Sunday
+
+
+# Test Case 2: Windows are inclusive at both ends and looked up per day
+def test_case_2_window_boundaries():
+    schedule = idx.pack_windows([("Tuesday", time(10, 0), time(14, 0))])
+
+    assert not idx.schedule_contains(schedule, _minute(1, 9, 59))
+    assert idx.schedule_contains(schedule, _minute(1, 10, 0))
+    assert idx.schedule_contains(schedule, _minute(1, 14, 0))
+    assert not idx.schedule_contains(schedule, _minute(1, 14, 1))
+    # Same time on a different day is closed
+    assert not idx.schedule_contains(schedule, _minute(0, 12, 0))
+
+
+# Test Case 3: Overlapping windows are merged, inverted windows are dropped
+def test_case_3_pack_merges_and_drops():
+    starts, ends = idx.pack_windows([
+        ("Monday", time(11, 0), time(15, 0)),
+        ("Monday", time(8, 0), time(12, 0)),
+        ("Friday", time(22, 0), time(2, 0)),
+        ("Funday", time(8, 0), time(9, 0)),
+    ])
+
+    assert list(starts) == [_minute(0, 8, 0)]
+    assert list(ends) == [_minute(0, 15, 0)]
+
+
+# Test Case 4: Businesses without hours return None so callers fall back to status
+def test_case_4_unknown_business_returns_none():
+    idx._schedules = {}
+    assert idx.is_open_at("NO_SUCH_LICENSE", 0) is None
+
+
+# Test Case 5: rebuild_all / rebuild_business reflect the operating_hours table
+def test_case_5_rebuild_from_db(db_session):
+    db_session.add(Business(
+        email="a@example.com", hashed_password="x", username="", user_type="business",
+        license_number="L1", licensee_name="A", establishment_address="addr",
+        hawker_centre="HC", postal_code="000000",
+    ))
+    db_session.add(OperatingHour(license_number="L1", day="Wednesday", start_time=time(6, 0), end_time=time(9, 0)))
+    db_session.commit()
+
+    idx.ensure_loaded(db_session)
+    assert idx.is_open_at("L1", _minute(2, 7, 30)) is True
+    assert idx.is_open_at("L1", _minute(2, 9, 30)) is False
+
+    db_session.query(OperatingHour).filter(OperatingHour.license_number == "L1").update(
+        {OperatingHour.end_time: time(10, 0)}
+    )
+    db_session.commit()
+    idx.rebuild_business(db_session, "L1")
+    assert idx.is_open_at("L1", _minute(2, 9, 30)) is True
+
+
+# Test Case 6: open_business_ids combines scheduled stalls and the status fallback
+def test_case_6_open_business_ids(db_session):
+    for lic, centre in (("L1", "Maxwell Food Centre"), ("L2", "Maxwell Food Centre"), ("L3", "Newton Food Centre")):
+        db_session.add(Business(
+            email=f"{lic}@example.com", hashed_password="x", username="", user_type="business",
+            license_number=lic, licensee_name=lic, establishment_address="addr",
+            hawker_centre=centre, postal_code="000000",
+        ))
+    db_session.add(OperatingHour(license_number="L1", day="Monday", start_time=time(11, 0), end_time=time(14, 0)))
+    db_session.commit()
+    ids = {b.license_number: b.id for b in db_session.query(Business)}
+
+    idx.rebuild_all(db_session)
+    lunch, dinner = _minute(0, 12, 0), _minute(0, 19, 0)
+
+    # L2 and L3 have no hours, so they are open by status at any time
+    assert idx.open_business_ids(lunch) == sorted(ids.values())
+    assert idx.open_business_ids(dinner) == sorted([ids["L2"], ids["L3"]])
+    assert idx.open_business_ids(lunch, "maxwell food centre") == sorted([ids["L1"], ids["L2"]])
+
+    # Giving L2 hours moves it out of the status fallback and into the buckets
+    db_session.add(OperatingHour(license_number="L2", day="Monday", start_time=time(18, 0), end_time=time(22, 0)))
+    db_session.commit()
+    idx.rebuild_business(db_session, "L2")
+    assert idx.open_business_ids(lunch, "Maxwell Food Centre") == [ids["L1"]]
+    assert idx.open_business_ids(dinner, "Maxwell Food Centre") == [ids["L2"]]
+
+
+# Test Case 7: A day without windows falls back to status, as the per-day ORM check did
+def test_case_7_status_fallback_per_day(db_session):
+    for lic, status in (("L1", "OPEN"), ("L2", "CLOSED")):
+        db_session.add(Business(
+            email=f"{lic}@example.com", hashed_password="x", username="", user_type="business",
+            license_number=lic, licensee_name=lic, establishment_address="addr",
+            hawker_centre="HC", postal_code="000000", status=status,
+        ))
+        for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday"):
+            db_session.add(OperatingHour(license_number=lic, day=day, start_time=time(8, 0), end_time=time(20, 0)))
+    db_session.commit()
+    ids = {b.license_number: b.id for b in db_session.query(Business)}
+
+    idx.rebuild_all(db_session)
+    friday_night, saturday = _minute(4, 21, 0), _minute(5, 12, 0)
+
+    assert idx.is_open_at("L1", friday_night) is False
+    assert idx.is_open_at("L1", saturday) is None
+    assert idx.open_business_ids(friday_night) == []
+    assert idx.open_business_ids(saturday) == [ids["L1"]]
+
+    # Adding Saturday hours takes L1 out of that day's status fallback
+    db_session.add(OperatingHour(license_number="L1", day="Saturday", start_time=time(14, 0), end_time=time(18, 0)))
+    db_session.commit()
+    idx.rebuild_business(db_session, "L1")
+    assert idx.is_open_at("L1", saturday) is False
+    assert idx.open_business_ids(saturday) == []
+    assert idx.open_business_ids(_minute(5, 15, 0)) == [ids["L1"]]
+
+# python -m pytest test/test_open_hours_index.py
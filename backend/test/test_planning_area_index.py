@@ -0,0 +1,148 @@
+import json
+import os
+
+import httpx
+import pytest
+
+from app.services import planning_area_index as pai
+
+def _square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+GEOJSON = {
+    "type": "FeatureCollection",
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"PLN_AREA_N": "BUKIT MERAH"},
+            # A square with a square hole in the middle
+            "geometry": {"type": "Polygon", "coordinates": [
+                _square(103.80, 1.27, 103.84, 1.30),
+                _square(103.81, 1.28, 103.83, 1.29),
+            ]},
+        },
+        {
+            "type": "Feature",
+            # data.gov.sg style: attributes only inside the Description HTML
+            "properties": {"Description": "<table><tr><th>PLN_AREA_N</th> <td>YISHUN</td></tr></table>"},
+            "geometry": {"type": "MultiPolygon", "coordinates": [
+                [_square(103.82, 1.41, 103.85, 1.44)],
+                [_square(103.86, 1.41, 103.87, 1.42)],
+            ]},
+        },
+    ],
+}
+
+@pytest.fixture(autouse=True)
+def loaded_index():
+    pai.load_geojson(GEOJSON)
+    yield
+    pai.load_geojson({"features": []})
+
+
+# Test Case 1: Points resolve to the Title Case planning area
+def test_case_1_lookup_inside():
+    assert pai.lookup(1.275, 103.805) == "Bukit Merah"
+    assert pai.lookup(1.425, 103.835) == "Yishun"
+    assert pai.lookup(1.415, 103.865) == "Yishun"  # second MultiPolygon part
+
+
+# Test Case 2: Holes and points outside every polygon return None
+def test_case_2_lookup_outside():
+    assert pai.lookup(1.285, 103.82) is None  # inside the hole
+    assert pai.lookup(1.35, 103.95) is None
+
+
+# Test Case 3: A missing boundary file leaves the index unavailable instead of raising
+def test_case_3_missing_file(tmp_path):
+    pai.load_file(str(tmp_path / "does_not_exist.geojson"))
+    # The previously loaded polygons are untouched by a failed load
+    assert pai.is_available()
+
+    pai.load_geojson({"features": []})
+    assert not pai.is_available()
+
+
+# Test Case 4: load_file reads a GeoJSON file from disk
+def test_case_4_load_file(tmp_path):
+    path = tmp_path / "planning_areas.geojson"
+    path.write_text(json.dumps(GEOJSON), encoding="utf-8")
+    pai.load_geojson({"features": []})
+
+    pai.load_file(str(path))
+    assert pai.is_available()
+    assert pai.lookup(1.275, 103.805) == "Bukit Merah"
+
+
+# Test Case 5: fetch follows data.gov.sg's download flow and only writes a valid file
+def test_case_5_fetch(tmp_path):
+    requests = []
+    def handler(request):
+        requests.append(request.url.path)
+        if request.url.path.endswith("/poll-download"):
+            return httpx.Response(200, json={"code": 0, "data": {"url": "https://files.example/areas.geojson"}})
+        if request.url.host == "files.example":
+            return httpx.Response(200, json=GEOJSON)
+        return httpx.Response(404)
+    path = str(tmp_path / "planning_areas.geojson")
+
+    assert pai.fetch(path, dataset_url="https://api.example/d_1", transport=httpx.MockTransport(handler)) == 2
+    assert requests == ["/d_1/poll-download", "/areas.geojson"]
+    pai.load_geojson({"features": []})
+    pai.load_file(path)
+    assert pai.lookup(1.425, 103.835) == "Yishun"
+
+    empty = httpx.MockTransport(lambda request: httpx.Response(200, json={"data": {"url": "https://x/y"}, "features": []}))
+    with pytest.raises(ValueError):
+        pai.fetch(str(tmp_path / "other.geojson"), transport=empty)
+    assert os.listdir(tmp_path) == ["planning_areas.geojson"]
+
+
+# Test Case 6: Workers never download the boundary file; they pick it up once the setup job has
+def test_case_6_workers_only_load(tmp_path, monkeypatch):
+    fetched = []
+    def fake_fetch(path):
+        fetched.append(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(GEOJSON, f)
+        return 2
+    monkeypatch.setattr(pai, "fetch", fake_fetch)
+    path = str(tmp_path / "planning_areas.geojson")
+    pai.load_geojson({"features": []})
+
+    pai.startup(path)
+    assert not pai.is_available() and fetched == []
+
+    # Off by default; the setup job fetches only when enabled and the file is missing
+    assert pai.fetch_if_missing(path) is None and fetched == []
+    monkeypatch.setattr(pai, "PLANNING_AREA_FETCH_ON_STARTUP", True)
+    assert pai.fetch_if_missing(path) == 2
+    assert pai.fetch_if_missing(path) is None and fetched == [path]
+
+    # The worker notices the file at its next recheck
+    assert not pai.is_available()
+    monkeypatch.setattr(pai, "PLANNING_AREA_RECHECK_SECONDS", 0)
+    assert pai.is_available() and pai.lookup(1.275, 103.805) == "Bukit Merah"
+
+
+# Test Case 7: OneMap fallback answers are memoised per rounded coordinate
+def test_case_7_fallback_memo():
+    assert pai.recalled_fallback(1.30001, 103.80001) == (False, None)
+    pai.remember_fallback(1.30001, 103.80001, "Queenstown")
+    pai.remember_fallback(1.5, 104.5, None)
+    assert pai.recalled_fallback(1.30004, 103.79996) == (True, "Queenstown")
+    assert pai.recalled_fallback(1.5, 104.5) == (True, None)
+
+
+# Test Case 8: The real URA boundary file, when fetched, resolves well-known places
+@pytest.mark.skipif(not os.path.exists(pai.PLANNING_AREA_GEOJSON),
+                    reason="boundary file not fetched (python -m app.services.planning_area_index fetch)")
+def test_case_8_real_boundary_file():
+    pai.load_file()
+    assert pai.lookup(1.2830, 103.8513) == "Downtown Core"     # Raffles Place
+    assert pai.lookup(1.4294, 103.8350) == "Yishun"            # Yishun MRT
+    assert pai.lookup(1.3240, 103.9300) == "Bedok"             # Bedok MRT
+    assert pai.lookup(1.3398, 103.7067) == "Jurong West"       # Jurong West Street 52
+    assert pai.lookup(1.2700, 104.2000) is None                # at sea
+
+# python -m pytest test/test_planning_area_index.py
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import (
+    user_model, consumer_model, favourite_model, review_model, hawker_centre_model,
+    business_model, operating_hour_model, menu_item_model, rating_aggregate_model
+)
+from app.migrations import ensure_indexes
+from app.utils import query_plan_audit
+
+def _index_names(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+# Test Case 1: With the model indexes in place no audited query needs a full-table scan
+def test_case_1_no_unexpected_scans():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    results = query_plan_audit.run_audit(engine)
+
+    assert results
+    assert [r["name"] for r in results if r["unexpected"]] == []
+    listing = next(r for r in results if r["name"] == "reviews for target")
+    assert any("ix_reviews_target_created" in line for line in listing["plan"])
+
+
+# Test Case 2: ensure_indexes upgrades a database created before the indexes existed
+def test_case_2_migrates_existing_tables():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_reviews_target_created"))
+        conn.execute(text("DROP INDEX ix_favourites_consumer_target"))
+
+    flagged = [r["name"] for r in query_plan_audit.run_audit(engine) if r["unexpected"]]
+    assert "reviews for target" in flagged
+    assert "is favourite" in flagged
+
+    assert sorted(ensure_indexes(engine)) == ["ix_favourites_consumer_target", "ix_reviews_target_created"]
+    assert "ix_reviews_target_created" in _index_names(engine, "reviews")
+    # Running it again is a no-op
+    assert ensure_indexes(engine) == []
+    assert [r["name"] for r in query_plan_audit.run_audit(engine) if r["unexpected"]] == []
+
+# python -m pytest test/test_query_plan_audit.py
@@ -0,0 +1,129 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import business_model, favourite_model, menu_item_model, operating_hour_model
+from app.models.consumer_model import Consumer
+from app.models.hawker_centre_model import HawkerCentre
+from app.models.rating_aggregate_model import RatingAggregate
+from app.models.review_model import Review
+from app.schemas.review_schema import ReviewIn
+from app.controllers import review_controller as ctrl
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    for i in (1, 2, 3):
+        session.add(Consumer(email=f"c{i}@example.com", hashed_password="x", username=f"c{i}", user_type="consumer"))
+    session.add(HawkerCentre(id=7, name="Maxwell", address="addr", latitude=1.28, longitude=103.84))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture(autouse=True)
+def allow_all_reviews():
+    with patch("app.controllers.review_controller.guard_review_text", return_value={"ok": True, "code": "ok"}):
+        yield
+
+def _review(target_type="business", target_id=1, stars=5):
+    return ReviewIn(target_type=target_type, target_id=target_id, star_rating=stars, description="Good food")
+
+
+# Test Case 1: Creates, updates and deletes keep the aggregate in step
+def test_case_1_aggregate_follows_writes(db_session):
+    ctrl.upsert_review(db_session, 1, _review(stars=5))
+    ctrl.upsert_review(db_session, 2, _review(stars=3))
+    assert ctrl.get_avg_rating(db_session, "business", 1) == {
+        "target_type": "business", "target_id": 1, "average_rating": 4.0, "count": 2,
+        "histogram": {1: 0, 2: 0, 3: 1, 4: 0, 5: 1},
+    }
+
+    # Re-saving with a new star rating moves the review between histogram buckets
+    out = ctrl.upsert_review(db_session, 2, _review(stars=1))
+    assert out["status"] == "updated"
+    result = ctrl.get_avg_rating(db_session, "business", 1)
+    assert result["average_rating"] == 3.0
+    assert result["histogram"] == {1: 1, 2: 0, 3: 0, 4: 0, 5: 1}
+
+    ctrl.delete_review(db_session, 1, out["review"].id - 1)
+    result = ctrl.get_avg_rating(db_session, "business", 1)
+    assert (result["average_rating"], result["count"]) == (1.0, 1)
+
+
+# Test Case 2: Targets without reviews report zeros
+def test_case_2_no_reviews(db_session):
+    result = ctrl.get_avg_rating(db_session, "business", 99)
+    assert (result["average_rating"], result["count"]) == (0.0, 0)
+
+
+# Test Case 3: Hawker centre reviews also refresh HawkerCentre.rating
+def test_case_3_hawker_rating_column(db_session):
+    ctrl.upsert_review(db_session, 1, _review("hawker", 7, stars=4))
+    ctrl.upsert_review(db_session, 2, _review("hawker", 7, stars=5))
+
+    assert db_session.get(HawkerCentre, 7).rating == 4.5
+
+
+# Test Case 4: rebuild_rating_aggregates reproduces the incrementally maintained rows
+def test_case_4_rebuild_matches_incremental(db_session):
+    for consumer_id, stars in ((1, 2), (2, 4), (3, 4)):
+        ctrl.upsert_review(db_session, consumer_id, _review(stars=stars))
+    ctrl.upsert_review(db_session, 1, _review(target_id=2, stars=5))
+
+    def snapshot():
+        return sorted(
+            (a.target_type, a.target_id, a.rating_sum, a.rating_count, a.stars_1, a.stars_2, a.stars_3, a.stars_4, a.stars_5)
+            for a in db_session.query(RatingAggregate).populate_existing()
+        )
+
+    incremental = snapshot()
+    assert ctrl.rebuild_rating_aggregates(db_session) == 2
+    assert snapshot() == incremental
+
+
+# Test Case 5: The aggregate row is written with one ON CONFLICT upsert, so first reviews cannot race
+def test_case_5_upsert_on_conflict(db_session):
+    stmt = ctrl._rating_upsert("postgresql", "business", 1, {"rating_sum": -4, "rating_count": -1, "stars_4": -1})
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (target_type, target_id) DO UPDATE SET" in sql
+    assert "rating_sum = (rating_aggregates.rating_sum + %(rating_sum_1)s::INTEGER)" in sql
+    assert ctrl._rating_upsert("mysql", "business", 1, {"rating_sum": 4}) is None
+
+    # A row another writer inserted first is incremented, not duplicated
+    db_session.execute(ctrl._rating_upsert("sqlite", "business", 1, {"rating_sum": 4, "rating_count": 1, "stars_4": 1}))
+    ctrl.upsert_review(db_session, 1, _review(stars=2))
+    aggregate = db_session.query(RatingAggregate).populate_existing().one()
+    assert (aggregate.rating_sum, aggregate.rating_count, aggregate.stars_2, aggregate.stars_4) == (6, 2, 1, 1)
+
+
+# Test Case 6: A hawker whose last published review is rejected drops back to 0.0, and the rebuild agrees
+def test_case_6_hawker_rating_reset(db_session):
+    ctrl.upsert_review(db_session, 1, _review("hawker", 7, stars=5))
+    review_id = db_session.query(Review.id).scalar()
+
+    ctrl.apply_moderation_verdicts(db_session, [(review_id, "Good food", {"ok": False, "code": "blocked_rude"})])
+
+    result = ctrl.get_avg_rating(db_session, "hawker", 7)
+    assert (result["average_rating"], result["count"]) == (0.0, 0)
+    db_session.expire_all()
+    assert db_session.get(HawkerCentre, 7).rating == 0.0
+
+    db_session.query(HawkerCentre).update({HawkerCentre.rating: 5.0})
+    ctrl.rebuild_rating_aggregates(db_session)
+    db_session.expire_all()
+    assert db_session.get(HawkerCentre, 7).rating == 0.0
+
+    for consumer_id, stars in ((1, 4), (2, 4), (3, 5)):
+        ctrl.upsert_review(db_session, consumer_id, _review("hawker", 7, stars=stars))
+    db_session.expire_all()
+    assert db_session.get(HawkerCentre, 7).rating == 4.33
+
+# python -m pytest test/test_rating_aggregates.py
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import local_classifier, review_guard
+from app.services.verdict_cache import VerdictCache, cache_key
+
+class FakeClient:
+    """Stands in for the OpenAI client: answers with a fixed label and counts calls."""
+    def __init__(self, label="CONSTRUCTIVE", error=None):
+        self.label, self.error, self.calls = label, error, 0
+        self.responses = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return SimpleNamespace(output_text=self.label)
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(review_guard, "get_client", lambda: fake)
+    monkeypatch.setattr(review_guard, "verdict_cache", VerdictCache(max_size=100, ttl_seconds=60, db_path=None))
+    # Send every review to the (fake) LLM; the local tier is covered in test_local_classifier.py
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_CLEAN_BELOW", 0.0)
+    monkeypatch.setattr(local_classifier, "REVIEW_GUARD_LOCAL_RUDE_ABOVE", 1.0)
+    return fake
+
+
+# Test Case 1: Repeating (or re-spacing/re-casing) a description skips the LLM call
+def test_case_1_repeat_submissions_hit_cache(client):
+    first = review_guard.guard_review_text("The laksa was too salty and the wait was long.")
+    second = review_guard.guard_review_text("  the LAKSA was too salty and\nthe wait was long. ")
+
+    assert first == second == {"ok": True, "code": "ok"}
+    assert client.calls == 1
+
+
+# Test Case 2: Blocking verdicts are cached too, errors are not
+def test_case_2_caches_blocks_not_errors(client):
+    client.label = "POLICY_VIOLATION"
+    assert review_guard.guard_review_text("something unsafe")["code"] == "blocked_moderation"
+    assert review_guard.guard_review_text("something unsafe")["code"] == "blocked_moderation"
+    assert client.calls == 1
+
+    client.error = RuntimeError("timeout")
+    assert review_guard.guard_review_text("new text")["code"] == "llm_error"
+    client.error = None
+    client.label = "CONSTRUCTIVE"
+    assert review_guard.guard_review_text("new text")["ok"] is True
+    assert client.calls == 3
+
+
+# Test Case 3: Entries expire after the TTL and the LRU keeps at most max_size
+def test_case_3_ttl_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.verdict_cache.time.time", lambda: now[0])
+    cache = VerdictCache(max_size=2, ttl_seconds=10, db_path=None)
+
+    cache.put("a", {"ok": True, "code": "ok"})
+    cache.put("b", {"ok": True, "code": "ok"})
+    cache.get("a")                      # a is now most recently used
+    cache.put("c", {"ok": True, "code": "ok"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    now[0] += 11
+    assert cache.get("a") is None
+
+
+# Test Case 4: The SQLite tier is shared across processes/instances and survives restarts
+def test_case_4_sqlite_tier(tmp_path):
+    path = str(tmp_path / "verdicts.db")
+    key = cache_key("Great chicken rice", "gpt-4o-mini")
+    VerdictCache(db_path=path).put(key, {"ok": False, "code": "blocked_rude", "reason": "no"})
+
+    other = VerdictCache(db_path=path)
+    assert other.get(key) == {"ok": False, "code": "blocked_rude", "reason": "no"}
+    assert len(other) == 1  # promoted into memory
+    assert cache_key("Great chicken rice", "another-model") != key
+
+# python -m pytest test/test_review_guard.py
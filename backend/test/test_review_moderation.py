@@ -0,0 +1,185 @@
+import threading
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import business_model, favourite_model, menu_item_model, operating_hour_model
+from app.models.consumer_model import Consumer
+from app.models.review_model import Review
+from app.schemas.review_schema import ReviewIn
+from app.controllers import review_controller as ctrl
+from app.services import moderation_queue, review_guard
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    # A file database: moderation workers use their own sessions on other threads
+    engine = create_engine(f"sqlite:///{tmp_path / 'reviews.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as session:
+        for i in (1, 2):
+            session.add(Consumer(email=f"c{i}@example.com", hashed_password="x", username=f"c{i}", user_type="consumer"))
+        session.commit()
+
+    monkeypatch.setattr(moderation_queue, "_session_factory", lambda: factory)
+    monkeypatch.setattr(moderation_queue, "REVIEW_MODERATION_RETRY_DELAY_SECONDS", 0)
+    yield factory
+    moderation_queue.shutdown()
+    engine.dispose()
+
+class Verdicts(list):
+    """Verdicts the patched guard returns, in order (the last one repeats), and the texts it was called with."""
+    def __init__(self):
+        super().__init__([{"ok": True, "code": "ok"}])
+        self.calls = []
+        self.gate = threading.Event()  # cleared: the guard blocks until it is set
+        self.gate.set()
+
+    def __call__(self, text):
+        self.gate.wait(timeout=5)
+        self.calls.append(text)
+        return self.pop(0) if len(self) > 1 else self[0]
+
+@pytest.fixture
+def verdicts(monkeypatch):
+    guard = Verdicts()
+    monkeypatch.setattr(review_guard, "guard_review_text", guard)
+    return guard
+
+def _review(stars=5, description="Good food, generous portion"):
+    return ReviewIn(target_type="business", target_id=1, star_rating=stars, description=description)
+
+
+# Test Case 1: A submitted review is pending (unlisted, uncounted) until the verdict publishes it
+def test_case_1_pending_then_published(session_factory, verdicts):
+    db = session_factory()
+    verdicts.gate.clear()  # keep the verdict back until the pending state is checked
+    out = ctrl.submit_review(db, 1, _review())
+
+    assert out["review"].status == "pending"
+    assert ctrl.list_reviews_for_target(db, "business", 1) == []
+    assert ctrl.get_avg_rating(db, "business", 1)["count"] == 0
+
+    verdicts.gate.set()
+    moderation_queue.wait_idle(timeout=5)
+    db.expire_all()
+    assert ctrl.get_review_status(db, 1, out["review"].id).status == "published"
+    assert [r.id for r in ctrl.list_reviews_for_target(db, "business", 1)] == [out["review"].id]
+    assert ctrl.get_avg_rating(db, "business", 1)["count"] == 1
+
+
+# Test Case 2: Rejected reviews stay hidden and report the reason to their author
+def test_case_2_rejected(session_factory, verdicts):
+    verdicts[:] = [{"ok": False, "code": "blocked_rude", "reason": review_guard.BOUNCE_MSG}]
+    db = session_factory()
+    review_id = ctrl.submit_review(db, 1, _review())["review"].id
+
+    moderation_queue.wait_idle(timeout=5)
+    db.expire_all()
+    result = ctrl.get_review_status(db, 1, review_id)
+    assert (result.status, result.moderation_code, result.reason) == ("rejected", "blocked_rude", review_guard.BOUNCE_MSG)
+    assert ctrl.get_avg_rating(db, "business", 1)["count"] == 0
+
+
+# Test Case 3: Classifier errors are retried before a verdict is applied
+def test_case_3_retries_llm_errors(session_factory, verdicts):
+    error = {"ok": False, "code": "llm_error", "reason": review_guard.BOUNCE_MSG}
+    verdicts[:] = [error, error, {"ok": True, "code": "ok"}]
+    db = session_factory()
+    review_id = ctrl.submit_review(db, 1, _review())["review"].id
+
+    moderation_queue.wait_idle(timeout=5)
+    db.expire_all()
+    assert ctrl.get_review_status(db, 1, review_id).status == "published"
+    assert len(verdicts.calls) == 3
+
+
+# Test Case 4: Editing a published review re-moderates it; a verdict for the old text is ignored
+def test_case_4_edit_supersedes_old_verdict(session_factory, verdicts):
+    db = session_factory()
+    review_id = ctrl.submit_review(db, 1, _review(stars=5))["review"].id
+    moderation_queue.wait_idle(timeout=5)
+
+    ctrl.submit_review(db, 1, _review(stars=2, description="Edited: noodles were cold"))
+    assert ctrl.apply_moderation_verdict(session_factory(), review_id, "Good food, generous portion", {"ok": True, "code": "ok"}) is None
+    moderation_queue.wait_idle(timeout=5)
+    db.expire_all()
+    review = db.get(Review, review_id)
+    assert (review.status, review.star_rating) == ("published", 2)
+    assert ctrl.get_avg_rating(db, "business", 1)["average_rating"] == 2.0
+
+
+# Test Case 5: In async mode the route answers 202 with a status URL; star-only reviews publish at once
+def test_case_5_route_returns_202(session_factory, verdicts, monkeypatch):
+    from app.routes.review_route import create_review
+    monkeypatch.setattr(moderation_queue, "ASYNC_MODERATION", True)
+    db = session_factory()
+
+    response = Response()
+    result = create_review(consumer_id=1, payload=_review(), response=response, db=db, user_id=1)
+    assert response.status_code == 202
+    assert result["status_url"] == f"/consumers/1/reviews/{result['review'].id}/status"
+
+    response = Response()
+    result = create_review(consumer_id=2, payload=_review(description=""), response=response, db=db, user_id=2)
+    assert response.status_code != 202  # left to the route default, 201
+    assert result["review"].status == "published"
+    moderation_queue.wait_idle(timeout=5)
+
+
+# Test Case 6: Every worker resuming the same pending reviews classifies each one once
+def test_case_6_resume_in_every_worker(session_factory, verdicts):
+    from datetime import datetime, timedelta
+    db = session_factory()
+    for i, claimed_at in ((1, None), (2, None), (3, datetime.utcnow() - timedelta(hours=1))):
+        db.add(Review(consumer_id=1, target_type="business", target_id=i, star_rating=4,
+                      description=f"Pending review {i}", status="pending", moderation_claimed_at=claimed_at))
+    # Claimed a moment ago by a job in another worker
+    db.add(Review(consumer_id=2, target_type="business", target_id=1, star_rating=4,
+                  description="Being classified elsewhere", status="pending", moderation_claimed_at=datetime.utcnow()))
+    db.commit()
+
+    verdicts.gate.clear()  # hold the first jobs in the classifier while the other "workers" resume
+    assert moderation_queue.resume_pending() == 3  # the abandoned claim is taken over
+    moderation_queue.resume_pending()  # a second worker: queues whatever the first has not claimed yet
+    # A third worker that listed the pending reviews before any were claimed
+    for i in (1, 2, 3):
+        review_id = db.query(Review.id).filter(Review.description == f"Pending review {i}").scalar()
+        assert moderation_queue.submit(review_id, f"Pending review {i}").result(timeout=5) is None
+    verdicts.gate.set()
+    moderation_queue.wait_idle(timeout=5)
+
+    assert sorted(verdicts.calls) == [f"Pending review {i}" for i in (1, 2, 3)]
+    db.expire_all()
+    assert dict(db.query(Review.description, Review.status)) == {
+        "Pending review 1": "published", "Pending review 2": "published", "Pending review 3": "published",
+        "Being classified elsewhere": "pending",
+    }
+
+
+# Test Case 7: A failed job gives up its claim so the review is retried on the next resume
+def test_case_7_failed_job_releases_claim(session_factory, verdicts, monkeypatch):
+    db = session_factory()
+    db.add(Review(consumer_id=1, target_type="business", target_id=1, star_rating=4, description="Flaky", status="pending"))
+    db.commit()
+    review_id = db.query(Review.id).scalar()
+
+    def broken(*args):
+        raise RuntimeError("database went away")
+    apply = ctrl.apply_moderation_verdict
+    monkeypatch.setattr(ctrl, "apply_moderation_verdict", broken)
+    assert moderation_queue.submit(review_id, "Flaky").result(timeout=5) is None
+    db.expire_all()
+    assert db.get(Review, review_id).moderation_claimed_at is None
+
+    monkeypatch.setattr(ctrl, "apply_moderation_verdict", apply)
+    assert moderation_queue.resume_pending() == 1
+    moderation_queue.wait_idle(timeout=5)
+    db.expire_all()
+    assert db.get(Review, review_id).status == "published"
+
+# python -m pytest test/test_review_moderation.py
@@ -0,0 +1,65 @@
+import shutil
+
+import pytest
+
+from app.services import review_store
+from app.services.review_store import ReviewStore
+
+@pytest.fixture
+def path(tmp_path):
+    # Start from the shipped reviews.csv, without touching it
+    copy = tmp_path / "reviews.csv"
+    shutil.copy(review_store.REVIEWS_CSV, copy)
+    return str(copy)
+
+
+# Test Case 1: Indexes and running averages follow creates, updates and deletes
+def test_case_1_indexes_and_aggregates(path):
+    store = ReviewStore(path)
+    before = store.avg_rating("business", 3)
+    count = len(store.list_for_target("business", 3))
+
+    created = store.create(9, "business", 3, 1, "Cold noodles,\nslow service", ["/a.jpg", "/b.jpg"])
+    assert int(created["id"]) == max(int(r["id"]) for r in store.list_for_target("business", 3))
+    assert store.avg_rating("business", 3) == round((before * count + 1) / (count + 1), 2)
+
+    store.update(int(created["id"]), 9, 5, None, None)
+    assert store.avg_rating("business", 3) == round((before * count + 5) / (count + 1), 2)
+    assert store.update(int(created["id"]), 8, 1, None, None) is None  # not the owner
+
+    assert [r["description"] for r in store.list_for_consumer(9)] == ["Cold noodles,\nslow service"]
+    assert store.delete(int(created["id"]), 9) and not store.delete(int(created["id"]), 9)
+    assert store.avg_rating("business", 3) == before
+    assert store.list_for_consumer(9) == [] and store.avg_rating("business", 999) is None
+
+
+# Test Case 2: Writes append to the log; background compaction keeps writes made meanwhile
+def test_case_2_background_compaction(path):
+    store = ReviewStore(path, compact_after=10)
+    ids = [int(store.create(1, "hawker", 7, 4, f"Review {i}", None)["id"]) for i in range(10)]
+    store.wait_for_compaction()
+    store.create(1, "hawker", 7, 2, "After compaction", None)
+
+    assert store.log.log_records == 1
+    reloaded = ReviewStore(path)
+    assert reloaded.list_for_target("hawker", 7) == store.list_for_target("hawker", 7)
+    assert reloaded.avg_rating("hawker", 7) == round((4 * 10 + 2) / 11, 2)
+    assert int(reloaded.create(2, "hawker", 7, 3, "", None)["id"]) == ids[-1] + 2
+
+
+# Test Case 3: The snapshot is carried over correctly when writes land between prepare and install
+def test_case_3_writes_during_compaction(path):
+    store, other = ReviewStore(path), ReviewStore(path)
+    store.create(1, "business", 500, 5, "first", None)
+    with store._lock:
+        store._sync()
+        rows, mark = list(store._rows.values()), store.log.mark()
+    prepared = store.log.prepare_snapshot(rows)
+    late = other.create(2, "business", 500, 1, "written while the snapshot was being prepared", None)
+    assert store.log.install_snapshot(prepared, mark)
+
+    for s in (store, other, ReviewStore(path)):
+        assert [r["id"] for r in s.list_for_target("business", 500)] == [late["id"], str(int(late["id"]) - 1)]
+        assert s.avg_rating("business", 500) == 3.0
+
+# python -m pytest test/test_review_store.py
@@ -0,0 +1,87 @@
+import json
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import consumer_model, favourite_model, review_model, menu_item_model, operating_hour_model
+from app.models.business_model import Business, CuisineType
+from app.models.hawker_centre_model import HawkerCentre
+from app.assets.database_seed import seed_db
+from app.utils import sfa_snapshot
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def sfa_dir(tmp_path):
+    """A miniature SFA/ folder: hawker_centres.csv, index.json and two stall workbooks with different headers."""
+    (tmp_path / "SFA-Scrape").mkdir()
+    (tmp_path / "centres_output").mkdir()
+    pd.DataFrame([
+        {"Name": "Maxwell Food Centre", "Block": "1", "Street": "Kadayanallur St", "Building": None,
+         "PostalCode": 69184, "Description": "", "PhotoURL": "", "Latitude": 1.28, "Longitude": 103.84},
+        {"Name": "Adam Road Food Centre", "Block": "2", "Street": "Adam Rd", "Building": None,
+         "PostalCode": 289876, "Description": "", "PhotoURL": "", "Latitude": 1.32, "Longitude": 103.81},
+    ]).to_csv(tmp_path / "SFA-Scrape" / "hawker_centres.csv", index=False)
+
+    pd.DataFrame({
+        "Licence Number": ["L1", "L2", "L2"],
+        "Business Name": ["TZE CHAR", None, "Duplicate"],
+        "Licensee Name": ["A", "B", "C"],
+        "Establishment Address": ["addr 1", "addr 2", "addr 2"],
+        "Postal Code": [69184, 69184, 69184],
+    }).to_excel(tmp_path / "centres_output" / "maxwell.xlsx", index=False)
+    pd.DataFrame({
+        "License_No": [" L3 ", "L1"],
+        "Stall_Name": ["Stall 3", "Repeated elsewhere"],
+        "Licensee_Name": ["D", "E"],
+        "Establishment_Address": ["addr 3", "addr 1"],
+        "Postal_Code": [289876.0, 289876.0],
+    }).to_excel(tmp_path / "centres_output" / "adam.xlsx", index=False)
+
+    index = [
+        {"hawker_centre": "Maxwell Food Centre", "file": "centres_output/maxwell.xlsx"},
+        {"hawker_centre": "Adam Road Food Centre", "file": "centres_output/adam.xlsx"},
+        {"hawker_centre": "Missing", "file": "centres_output/missing.xlsx"},
+    ]
+    (tmp_path / "index.json").write_text(json.dumps(index))
+    return tmp_path
+
+
+# Test Case 1: Column aliases are resolved and licence numbers deduplicated (first occurrence wins)
+def test_case_1_seeds_deduplicated_stalls(db_session, sfa_dir):
+    seed_db.seed_sfa_data_if_empty(db_session, str(sfa_dir / "index.json"))
+
+    stalls = {b.license_number: b for b in db_session.scalars(select(Business))}
+    assert sorted(stalls) == ["L1", "L2", "L3"]
+    assert stalls["L1"].hawker_centre == "Maxwell Food Centre"
+    assert stalls["L2"].stall_name is None
+    assert stalls["L3"].postal_code == "289876"
+    assert stalls["L3"].email == "sfa_placeholder_L3@example.com"
+    assert stalls["L1"].cuisine_type == CuisineType.others
+    assert stalls["L1"].photo.endswith("/TZE CHAR.jpeg")
+    assert stalls["L2"].photo.endswith("/" + seed_db.DEFAULT_BUSINESS_PHOTO)
+
+    centres = db_session.scalars(select(HawkerCentre).order_by(HawkerCentre.id)).all()
+    assert [c.name for c in centres] == ["Maxwell Food Centre", "Adam Road Food Centre"]
+    assert centres[0].address == "Blk 1, Kadayanallur St S(69184)"
+
+
+# Test Case 2: Licences already in the database are not inserted again
+def test_case_2_skips_existing_licenses(sfa_dir):
+    stalls = sfa_snapshot.read_sources(str(sfa_dir / "index.json")).stalls
+
+    records = seed_db.build_business_records(stalls, existing_licenses={"L1"})
+    assert [r["license_number"] for r in records] == ["L2", "L3"]
+
+# python -m pytest test/test_seed_db.py
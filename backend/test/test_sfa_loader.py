@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from app.utils import sfa_loader
+
+@pytest.fixture
+def workbooks(tmp_path):
+    first = tmp_path / "069184_Maxwell Food Centre.xlsx"
+    pd.DataFrame({
+        "Licence Number": ["L1", "L2"],
+        "Business Name": ["Tian Tian", None],
+        "Licensee Name": ["A", "B"],
+        "Postal Code": [69184, 69184],
+    }).to_excel(first, index=False)
+
+    second = tmp_path / "289876_Adam Road Food Centre.xlsx"
+    pd.DataFrame({
+        " license_no ": ["L3"],
+        "STALL_NAME": ["Stall 3"],
+        "Postal_Code": [289876.0],
+        "Hawker Centre": ["Adam Road Food Centre"],
+    }).to_excel(second, index=False)
+    return first, second
+
+
+# Test Case 1: Header aliases map onto one set of typed columns
+def test_case_1_normalises_aliases(workbooks):
+    df = sfa_loader.load_workbooks(workbooks, max_workers=1)
+
+    assert list(df.columns) == sfa_loader.COLUMNS
+    assert set(df.dtypes) == {pd.StringDtype()}
+    assert df["license_number"].tolist() == ["L1", "L2", "L3"]
+    assert df["postal_code"].tolist() == ["69184", "69184", "289876"]  # no ".0" from float cells
+    assert df["stall_name"].isna().tolist() == [False, True, False]
+    # Hawker centre from the filename, then from the file's own column
+    assert df["hawker_centre"].tolist() == ["Maxwell Food Centre", "Maxwell Food Centre", "Adam Road Food Centre"]
+
+
+# Test Case 2: The process pool returns the same rows, in input order
+def test_case_2_parallel_matches_serial(workbooks):
+    sources = [(str(workbooks[1]), "Adam"), (str(workbooks[0]), "Maxwell")]
+
+    serial = sfa_loader.load_workbooks(sources, max_workers=1)
+    parallel = sfa_loader.load_workbooks(sources, max_workers=2)
+
+    assert parallel.equals(serial)
+    assert parallel["hawker_centre"].tolist() == ["Adam", "Maxwell", "Maxwell"]
+
+
+# Test Case 3: Unreadable files are skipped and reported
+def test_case_3_reports_unreadable_files(workbooks, tmp_path):
+    errors = []
+    df = sfa_loader.load_workbooks(
+        [workbooks[0], tmp_path / "missing.xlsx"], max_workers=2,
+        on_error=lambda path, reason: errors.append((path, reason)),
+    )
+
+    assert len(df) == 2
+    assert errors == [(str(tmp_path / "missing.xlsx"), "not found")]
+
+# python -m pytest test/test_sfa_loader.py
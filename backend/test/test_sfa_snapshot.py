@@ -0,0 +1,63 @@
+import json
+import os
+import pandas as pd
+import pytest
+
+from app.utils import sfa_snapshot
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture
+def index_file(tmp_path, monkeypatch):
+    """A miniature SFA/ folder with one indexed workbook; the snapshot goes in a separate directory."""
+    monkeypatch.setenv("SFA_SNAPSHOT_DIR", str(tmp_path / "snapshot"))
+    (tmp_path / "SFA-Scrape").mkdir()
+    (tmp_path / "centres_output").mkdir()
+    pd.DataFrame([{"Name": "Maxwell Food Centre", "PostalCode": 69184}]).to_csv(
+        tmp_path / "SFA-Scrape" / "hawker_centres.csv", index=False
+    )
+    pd.DataFrame({
+        "Licence Number": ["L1", "L2"],
+        "Business Name": ["Tian Tian", None],
+        "Postal Code": [69184, 69184],
+    }).to_excel(tmp_path / "centres_output" / "maxwell.xlsx", index=False)
+    index = tmp_path / "index.json"
+    index.write_text(json.dumps([{"hawker_centre": "Maxwell Food Centre", "file": "centres_output/maxwell.xlsx"}]))
+    return str(index)
+
+
+# Test Case 1: The snapshot holds the same data as parsing the sources directly
+def test_case_1_snapshot_matches_sources(index_file):
+    data = sfa_snapshot.load_snapshot(index_file)
+    expected = sfa_snapshot.read_sources(index_file)
+
+    pd.testing.assert_frame_equal(data.stalls, expected.stalls)
+    pd.testing.assert_frame_equal(data.hawker_centres, expected.hawker_centres)
+    assert list(data.stalls["source_file"]) == ["centres_output/maxwell.xlsx"] * 2
+
+
+# Test Case 2: An unchanged source set reuses the snapshot instead of rebuilding it
+def test_case_2_reuses_snapshot(index_file, monkeypatch):
+    key = sfa_snapshot.build_snapshot(index_file)
+
+    def fail(_):
+        raise AssertionError("snapshot was rebuilt")
+    monkeypatch.setattr(sfa_snapshot, "read_sources", fail)
+
+    assert sfa_snapshot.build_snapshot(index_file) == key
+    assert list(sfa_snapshot.load_snapshot(index_file).stalls["license_number"]) == ["L1", "L2"]
+
+
+# Test Case 3: Changing a workbook changes the hash and replaces the old snapshot
+def test_case_3_rebuilds_on_change(index_file):
+    old_key = sfa_snapshot.build_snapshot(index_file)
+
+    workbook = os.path.join(os.path.dirname(index_file), "centres_output", "maxwell.xlsx")
+    pd.DataFrame({"Licence Number": ["L9"], "Business Name": ["New"]}).to_excel(workbook, index=False)
+    data = sfa_snapshot.load_snapshot(index_file)
+
+    assert sfa_snapshot.content_hash(index_file) != old_key
+    assert list(data.stalls["license_number"]) == ["L9"]
+    assert not any(old_key in name for name in os.listdir(os.environ["SFA_SNAPSHOT_DIR"]))
+
+# python -m pytest test/test_sfa_snapshot.py
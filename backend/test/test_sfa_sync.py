@@ -0,0 +1,134 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import consumer_model, favourite_model, review_model, menu_item_model, operating_hour_model
+from app.models.business_model import Business
+from app.models.hawker_centre_model import HawkerCentre
+from app.assets.database_seed import seed_db, sfa_sync
+from app.migrations import ensure_columns
+from app.services import hawker_geo_index
+from app.utils import sfa_loader, sfa_snapshot
+
+MAXWELL = {"Name": "Maxwell Food Centre", "Block": "1", "Street": "Kadayanallur St", "PostalCode": 69184,
+           "Latitude": 1.28, "Longitude": 103.84}
+
+def _sfa_data(rows, centres=(MAXWELL,)):
+    stalls = pd.DataFrame(rows, columns=sfa_loader.COLUMNS).astype("string")
+    centres = pd.DataFrame(list(centres))
+    return sfa_snapshot.SfaData(stalls, centres)
+
+def _stall(license_number, stall_name, address="addr"):
+    return [license_number, stall_name, "Licensee", address, "069184", None, "Maxwell Food Centre", "centres_output/maxwell.xlsx"]
+
+@pytest.fixture
+def db_session(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+
+    # Initial seed: L1..L4
+    initial = _sfa_data([_stall("L1", "One"), _stall("L2", "Two"), _stall("L3", "Three"), _stall("L4", "Four")])
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: initial)
+    seed_db.seed_sfa_data_if_empty(session, "index.json")
+    try:
+        yield session
+    finally:
+        session.close()
+
+def _businesses(db):
+    db.expire_all()
+    return {b.license_number: b for b in db.scalars(select(Business))}
+
+
+# Test Case 1: New stalls are inserted, changed ones updated and missing ones flagged
+def test_case_1_applies_diff(db_session, monkeypatch):
+    refreshed = _sfa_data([_stall("L1", "One"), _stall("L2", "Two Renamed", "new addr"), _stall("L5", "Five")])
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: refreshed)
+
+    report = sfa_sync.sync_sfa_data(db_session, "index.json")
+
+    assert (report.stalls_added, report.stalls_updated, report.stalls_delisted) == (1, 1, 2)
+    stalls = _businesses(db_session)
+    assert stalls["L2"].stall_name == "Two Renamed"
+    assert stalls["L2"].establishment_address == "new addr"
+    assert stalls["L5"].email == "sfa_placeholder_L5@example.com"
+    assert stalls["L3"].sfa_delisted_at is not None
+    assert stalls["L1"].sfa_delisted_at is None
+    assert db_session.scalar(select(HawkerCentre.id).where(HawkerCentre.name == "Maxwell Food Centre"))
+
+    # A second run with the same data changes nothing
+    report = sfa_sync.sync_sfa_data(db_session, "index.json")
+    assert (report.stalls_added, report.stalls_updated, report.stalls_delisted, report.stalls_relisted) == (0, 0, 0, 0)
+
+
+# Test Case 2: Claimed and owner-edited stalls are never touched
+def test_case_2_leaves_claimed_and_edited_stalls(db_session, monkeypatch):
+    stalls = _businesses(db_session)
+    stalls["L1"].hashed_password = "real-hash"
+    stalls["L2"].stall_name = "Owner's Name"
+    stalls["L2"].profile_updated_at = pd.Timestamp("2026-01-01").to_pydatetime()
+    db_session.commit()
+
+    refreshed = _sfa_data([_stall("L1", "SFA One"), _stall("L2", "SFA Two"), _stall("L3", "Three"), _stall("L4", "Four")])
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: refreshed)
+    report = sfa_sync.sync_sfa_data(db_session, "index.json")
+
+    stalls = _businesses(db_session)
+    assert stalls["L1"].stall_name == "One"
+    assert stalls["L2"].stall_name == "Owner's Name"
+    assert (report.stalls_updated, report.stalls_protected) == (0, 2)
+
+
+# Test Case 3: A delisted licence that reappears is un-flagged; dry runs write nothing
+def test_case_3_relists_and_dry_run(db_session, monkeypatch):
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: _sfa_data([_stall("L1", "One"), _stall("L2", "Two"), _stall("L3", "Three")]))
+    sfa_sync.sync_sfa_data(db_session, "index.json")
+    assert _businesses(db_session)["L4"].sfa_delisted_at is not None
+
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: _sfa_data([_stall(f"L{i}", "Renamed") for i in range(1, 5)]))
+    report = sfa_sync.sync_sfa_data(db_session, "index.json", dry_run=True)
+    assert (report.stalls_updated, report.stalls_relisted) == (4, 1)
+    assert _businesses(db_session)["L1"].stall_name == "One"
+
+    sfa_sync.sync_sfa_data(db_session, "index.json")
+    stalls = _businesses(db_session)
+    assert stalls["L4"].sfa_delisted_at is None
+    assert stalls["L4"].stall_name == "Renamed"
+
+
+# Test Case 4: ensure_columns adds the sync columns to a database created before they existed
+def test_case_4_migrates_existing_businesses():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE businesses DROP COLUMN sfa_delisted_at"))
+        conn.execute(text("ALTER TABLE businesses DROP COLUMN profile_updated_at"))
+
+    assert sorted(ensure_columns(engine)) == ["businesses.profile_updated_at", "businesses.sfa_delisted_at"]
+    assert "sfa_delisted_at" in {c["name"] for c in inspect(engine).get_columns("businesses")}
+    # Running it again is a no-op
+    assert ensure_columns(engine) == []
+
+
+# Test Case 5: Centres added by a sync are served by the nearest-hawker index without waiting for its TTL
+def test_case_5_invalidates_geo_index(db_session, monkeypatch):
+    hawker_geo_index.ensure_loaded(db_session)
+    assert [c["name"] for c in hawker_geo_index.nearest(1.35, 103.94, k=1)] == ["Maxwell Food Centre"]
+
+    tampines = {"Name": "Tampines Round Market", "Block": "137", "Street": "Tampines St 11", "PostalCode": 521137,
+                "Latitude": 1.35, "Longitude": 103.94}
+    refreshed = _sfa_data([_stall("L1", "One")], centres=(MAXWELL, tampines))
+    monkeypatch.setattr(sfa_snapshot, "load_snapshot", lambda path: refreshed)
+    try:
+        assert sfa_sync.sync_sfa_data(db_session, "index.json").hawker_centres_added == 1
+        hawker_geo_index.ensure_loaded(db_session)
+        assert [c["name"] for c in hawker_geo_index.nearest(1.35, 103.94, k=1)] == ["Tampines Round Market"]
+    finally:
+        hawker_geo_index.build([])
+        hawker_geo_index.invalidate()
+
+# python -m pytest test/test_sfa_sync.py
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, make_async_engine
+# Import every model so relationship() targets resolve, as app.main does
+from app.models import consumer_model, favourite_model, review_model, menu_item_model, operating_hour_model, rating_aggregate_model
+from app.models.business_model import Business
+from app.services import open_hours_index
+
+@pytest.fixture
+def db_url(tmp_path):
+    # A file database, so the sync seeding engine and the routes' async engine share it
+    url = f"sqlite:///{tmp_path / 'stalls.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(1, 6):
+        session.add(Business(
+            email=f"stall{i}@example.com", hashed_password="x", username="", user_type="business",
+            license_number=f"L{i}", stall_name=f"Stall {i}", licensee_name=f"Licensee {i}",
+            establishment_address="addr", hawker_centre="HC", postal_code="000000",
+        ))
+    session.commit()
+    open_hours_index.invalidate()
+    session.close()
+    engine.dispose()
+    try:
+        yield url
+    finally:
+        open_hours_index.invalidate()
+
+def _list(db_url, **params):
+    from app.routes.stall_route import get_all_stalls
+    response = Response()
+    params.setdefault("after_id", None)
+    params.setdefault("limit", None)
+    params.setdefault("fields", None)
+
+    async def run():
+        engine = make_async_engine(db_url)
+        try:
+            async with AsyncSession(engine) as db:
+                return await get_all_stalls(response=response, db=db, **params)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run()), response
+
+
+# Test Case 1: Without paging parameters every stall is returned (existing frontend contract)
+def test_case_1_lists_everything_by_default(db_url):
+    stalls, response = _list(db_url)
+
+    assert [s["id"] for s in stalls] == [1, 2, 3, 4, 5]
+    assert stalls[0]["stall_name"] == "Stall 1"
+    assert stalls[0]["is_open"] is True
+    assert "x-next-after-id" not in response.headers
+
+
+# Test Case 2: Keyset pages follow the X-Next-After-Id cursor
+def test_case_2_keyset_pages(db_url):
+    page1, response1 = _list(db_url, limit=2)
+    page2, response2 = _list(db_url, limit=2, after_id=int(response1.headers["x-next-after-id"]))
+    page3, response3 = _list(db_url, limit=2, after_id=int(response2.headers["x-next-after-id"]))
+
+    assert [s["id"] for s in page1 + page2 + page3] == [1, 2, 3, 4, 5]
+    assert "x-next-after-id" not in response3.headers
+
+
+# Test Case 3: fields= projects the DTO and always keeps the id cursor
+def test_case_3_field_projection(db_url):
+    stalls, _ = _list(db_url, limit=1, fields="stall_name, is_open")
+
+    assert stalls == [{"id": 1, "stall_name": "Stall 1", "is_open": True}]
+
+
+# Test Case 4: Unknown fields are rejected - 400
+def test_case_4_unknown_field(db_url):
+    with pytest.raises(HTTPException) as excinfo:
+        _list(db_url, fields="stall_name,hashed_password")
+
+    assert excinfo.value.status_code == 400
+
+# python -m pytest test/test_stall_listing.py